@@ -1,11 +1,33 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from sqlalchemy import event, insert, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import load_only, with_expression
+from datetime import datetime, timedelta
+import json
 import os
+import socket
+import threading
+import time
 from dotenv import load_dotenv
-import google.generativeai as genai
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
+from job_queue import JobQueue
+from summary_cache import SummaryCache
+from content_change import change_ratio, content_hash
+from summary_chunks import CHUNK_PROMPT, REDUCE_PROMPT, split_chunks
+from summary_batch import RateLimiter, batch_prompt, is_rate_limit_error, pack_notes, parse_batch_summaries
+from summary_providers import create_provider
+from search_index import SearchIndex, query_terms
+from search_rank import SearchRanker
+from response_cache import ResponseCache
+from event_bus import create_event_bus
+from db_engine import engine_options, install_sqlite_pragmas, pool_stats
+from embeddings import EMBEDDING_DIM, embed_note, embed_text, from_bytes, to_bytes
+from vector_index import VectorIndex
+from note_transfer import TransferError, iter_json_records, note_fields
+from pagination import PaginationError, decode_cursor, encode_cursor, keyset_page, parse_limit
 
 # Load environment variables from .env file
 load_dotenv()
@@ -19,16 +41,20 @@ if DATABASE_URL.startswith("postgres://"):
 
 app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Pool sizes, timeouts and SQLite pragmas come from the DB_* / SQLITE_* variables
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(DATABASE_URL)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')
 db = SQLAlchemy(app)
+with app.app_context():
+    install_sqlite_pragmas(db.engine)
+
+# SUMMARY_PROVIDER picks Gemini, an OpenAI-compatible server or the offline stub
+summary_provider = create_provider()
+MODEL_NAME = summary_provider.model_name
 
-# Load API key from environment variable
-api_key = os.getenv('GEMINI_API_KEY')
-if not api_key:
-    print("Warning: GEMINI_API_KEY environment variable is not set")
-    api_key = "dummy_key"  # Fallback for development
-genai.configure(api_key=api_key)
-model = genai.GenerativeModel('gemini-2.0-flash')  # Using the correct model name
+# Bump the version whenever the prompt changes so cached summaries are regenerated
+SUMMARY_PROMPT = "Summarize this text in one or two sentences: {content}"
+SUMMARY_PROMPT_VERSION = 1
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -37,6 +63,13 @@ class User(db.Model):
     password_hash = db.Column(db.String(128))
     notes = db.relationship('Note', backref='user', lazy=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped by every change to the user's notes; keys response_cache and the ETags
+    notes_version = db.Column(db.Integer, default=0, nullable=False)
+    # Highest version whose tombstones were pruned; older sync tokens must start over
+    tombstone_horizon = db.Column(db.Integer, default=0, nullable=False)
+    # Bumped when embeddings are written; only keys semantic search responses,
+    # so derived data doesn't invalidate every ETag or wake the live feeds
+    embeddings_version = db.Column(db.Integer, default=0, nullable=False)
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -44,6 +77,9 @@ class User(db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+# Characters of content included in card view responses
+PREVIEW_LENGTH = 200
+
 class Note(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -54,6 +90,40 @@ class Note(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     order = db.Column(db.Integer)
+    summary_status = db.Column(db.String(20), default='pending')
+    # When a worker set summary_status to 'running'; see SUMMARY_LEASE_SECONDS
+    summary_claimed_at = db.Column(db.DateTime)
+    # Hash of the content the current summary was made from, and how much of
+    # the note has changed since (summed over edits too small to re-summarize)
+    summary_hash = db.Column(db.String(64))
+    summary_drift = db.Column(db.Float, default=0.0)
+    # float32 vector from embed_note(), filled in by the background 'embedding' job
+    embedding = db.deferred(db.Column(db.LargeBinary))
+    # The owner's notes_version when this note last changed; /notes/changes reads it
+    version = db.Column(db.Integer, default=0, nullable=False)
+    # Only populated by card_query(); the leading slice of content for list views
+    preview = db.query_expression()
+
+    __table_args__ = (
+        # Category-filtered listings and the per-category counts
+        db.Index('ix_note_user_category_created', 'user_id', 'category', 'created_at'),
+        # Listings in the user's manual order
+        db.Index('ix_note_user_order', 'user_id', 'order'),
+        # Delta sync
+        db.Index('ix_note_user_version', 'user_id', 'version'),
+    )
+
+    def keep_updated_at(self):
+        """Leave updated_at out of the next flush's onupdate; it marks the user's last edit"""
+        self.updated_at = Note.updated_at
+
+    def set_summary(self, summary, content):
+        """Store a summary of `content`, which may be a little older than the current content"""
+        self.keep_updated_at()
+        self.summary = summary
+        self.summary_status = 'done'
+        self.summary_hash = content_hash(content)
+        self.summary_drift = change_ratio(content, self.content) if content != self.content else 0.0
 
     def to_dict(self):
         return {
@@ -62,10 +132,155 @@ class Note(db.Model):
             'content': self.content,
             'category': self.category,
             'summary': self.summary,
+            'summary_status': self.summary_status or 'done',
             'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
             'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S')
         }
 
+    def to_card_dict(self):
+        """Card grid representation: a content preview instead of the full body"""
+        preview = self.preview or ''
+        if len(preview) > PREVIEW_LENGTH:
+            preview = preview[:PREVIEW_LENGTH].rstrip() + '...'
+        return {
+            'id': self.id,
+            'title': self.title,
+            'preview': preview,
+            'category': self.category,
+            'summary': self.summary,
+            'summary_status': self.summary_status or 'done',
+            'order': self.order,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+def card_query(query):
+    """Restrict a note query to the columns the card grid needs"""
+    # One extra character tells to_card_dict whether the preview was cut short
+    return query.options(
+        load_only(Note.id, Note.title, Note.category, Note.summary, Note.summary_status,
+                  Note.created_at, Note.updated_at, Note.order, Note.user_id, Note.version),
+        with_expression(Note.preview, db.func.substr(Note.content, 1, PREVIEW_LENGTH + 1)),
+    )
+
+class NoteTombstone(db.Model):
+    """Left behind by a deleted note so /notes/changes can report the delete"""
+    id = db.Column(db.Integer, primary_key=True)
+    note_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_note_tombstone_user_version', 'user_id', 'version'),
+    )
+
+class JobLease(db.Model):
+    """Lets one process at a time run a named background task"""
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+def lease_holder():
+    # Per process: gunicorn workers share the hostname but not the pid
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def acquire_lease(name, seconds):
+    """Take or renew the named lease for `seconds`; False while another process holds it"""
+    now = datetime.utcnow()
+    values = {'holder': lease_holder(), 'expires_at': now + timedelta(seconds=seconds)}
+    taken = JobLease.query.filter(JobLease.name == name, (JobLease.holder == values['holder']) |
+                                  (JobLease.expires_at < now)).update(values, synchronize_session=False)
+    try:
+        if not taken:
+            db.session.execute(insert(JobLease).values(name=name, **values))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    return True
+
+def release_lease(name):
+    JobLease.query.filter_by(name=name, holder=lease_holder()).delete(synchronize_session=False)
+    db.session.commit()
+
+class SummaryCacheEntry(db.Model):
+    key = db.Column(db.String(64), primary_key=True)
+    summary = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+summary_cache = SummaryCache(
+    db, SummaryCacheEntry, MODEL_NAME, SUMMARY_PROMPT_VERSION,
+    lru_size=int(os.getenv('SUMMARY_CACHE_SIZE', '1024')),
+    ttl=timedelta(days=int(os.getenv('SUMMARY_CACHE_TTL_DAYS', '30'))),
+    max_rows=int(os.getenv('SUMMARY_CACHE_MAX_ROWS', '10000')),
+)
+
+def owner_version():
+    """SQL expression for the notes_version of a note's owner, for stamping Note.version"""
+    return db.select(User.notes_version).where(User.id == Note.user_id).scalar_subquery()
+
+def bump_notes_version(user_id=None, note_ids=None):
+    """Mark a user's notes as changed, in the same transaction as the change itself.
+
+    The bump makes cached responses and ETags go stale, and the notes in
+    `note_ids` are stamped with the new version so /notes/changes reports
+    them. Background jobs that only have note ids leave out `user_id`.
+    The UPDATE locks the user's row until commit, so versions are handed
+    out in commit order. Stamping a note keeps its updated_at: that's the
+    user's last edit, which search ranking and sync clients show.
+    """
+    if user_id is None:
+        user_ids = [uid for (uid,) in db.session.query(Note.user_id).filter(
+            Note.id.in_(note_ids)).distinct()]
+    else:
+        user_ids = [user_id]
+    User.query.filter(User.id.in_(user_ids)).update({User.notes_version: User.notes_version + 1},
+                                                    synchronize_session=False)
+    # Live feeds are told once the transaction commits
+    db.session.info.setdefault('changed_users', set()).update(user_ids)
+    if note_ids:
+        Note.query.filter(Note.id.in_(note_ids)).update(
+            {Note.version: owner_version(), Note.updated_at: Note.updated_at}, synchronize_session=False)
+
+event_bus = create_event_bus()
+
+def bump_embeddings_version(user_ids):
+    User.query.filter(User.id.in_(user_ids)).update(
+        {User.embeddings_version: User.embeddings_version + 1}, synchronize_session=False)
+
+def notes_channel(user_id):
+    return f"notes:{user_id}"
+
+@event.listens_for(db.session, 'after_commit')
+def publish_note_changes(session):
+    for user_id in session.info.pop('changed_users', ()):
+        event_bus.publish(notes_channel(user_id))
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_note_changes(session):
+    session.info.pop('changed_users', None)
+
+# Days a delete stays reportable to sync clients; a client that has been
+# away longer gets a full resync
+SYNC_TOMBSTONE_DAYS = float(os.getenv('SYNC_TOMBSTONE_DAYS', '90'))
+
+def record_deletes(user_id, note_ids):
+    """Bump the user's version and leave tombstones for deleted notes, pruning expired ones"""
+    bump_notes_version(user_id)
+    version = db.session.query(User.notes_version).filter_by(id=user_id).scalar()
+    db.session.add_all([NoteTombstone(note_id=note_id, user_id=user_id, version=version)
+                        for note_id in note_ids])
+
+    expired = NoteTombstone.query.filter(
+        NoteTombstone.user_id == user_id,
+        NoteTombstone.created_at < datetime.utcnow() - timedelta(days=SYNC_TOMBSTONE_DAYS))
+    # Tombstones expire in the order they were written, so this only moves forward
+    horizon = expired.with_entities(db.func.max(NoteTombstone.version)).scalar()
+    if horizon is not None:
+        expired.delete(synchronize_session=False)
+        User.query.filter_by(id=user_id).update({User.tombstone_horizon: horizon}, synchronize_session=False)
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -74,24 +289,381 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-def generate_summary(content):
+response_cache = ResponseCache(
+    max_entries=int(os.getenv('RESPONSE_CACHE_ENTRIES', '512')),
+    max_bytes=int(os.getenv('RESPONSE_CACHE_MB', '32')) * 1024 * 1024,
+    compress_min_bytes=int(os.getenv('COMPRESS_MIN_BYTES', '1024')),
+)
+
+def versioned_response(f):
+    """Serve a GET endpoint through response_cache with a strong ETag.
+
+    The key includes the user's notes_version, so a matching
+    If-None-Match gets a 304 after one primary-key lookup, without
+    running the view or reading any notes. Semantic search results also
+    depend on embeddings_version. The versions are read before the view
+    runs, so a concurrent write can only make a cached body newer than
+    its key, never older.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        user_id = session['user_id']
+        version, embeddings = db.session.query(User.notes_version, User.embeddings_version).filter_by(
+            id=user_id).first() or (0, 0)
+        if request.args.get('mode') == 'semantic':
+            version = (version, embeddings)
+        key = (user_id, version, request.full_path)
+        encoding = response_cache.choose_encoding(request.accept_encodings)
+        etag = response_cache.etag(key, encoding)
+        headers = {'Cache-Control': 'private, no-cache', 'Vary': 'Accept-Encoding, Cookie'}
+
+        if etag in request.if_none_match:
+            response_cache.count_not_modified()
+            response = Response(status=304, headers=headers)
+            response.set_etag(etag)
+            return response
+
+        entry = response_cache.get(key)
+        if entry is None:
+            response = app.make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            entry = response_cache.put(key, response)
+        body, applied = response_cache.body(key, entry, encoding)
+        response = Response(body, mimetype=entry.mimetype, headers=entry.headers)
+        response.headers.update(headers)
+        if applied != 'identity':
+            response.headers['Content-Encoding'] = applied
+        response.set_etag(etag)
+        return response
+    return decorated_function
+
+# SUMMARY_RATE_LIMIT caps model calls per minute across all threads (0 = no cap)
+rate_limiter = RateLimiter(int(os.getenv('SUMMARY_RATE_LIMIT', '0')))
+
+def call_model(prompt):
+    """Send a prompt to the summary model within the shared rate limit"""
+    rate_limiter.acquire()
+    try:
+        text = summary_provider.complete(prompt)
+    except Exception as e:
+        if is_rate_limit_error(e):
+            rate_limiter.cool_down()
+        raise
+    rate_limiter.succeeded()
+    return text
+
+# Notes longer than this are summarized a chunk at a time and the chunk summaries combined
+SUMMARY_CHUNK_CHARS = int(os.getenv('SUMMARY_CHUNK_CHARS', '6000'))
+
+def summarize_chunk(chunk):
+    """Summary of one chunk of a long note, cached by the chunk's own content"""
+    with app.app_context():
+        return summary_cache.get_or_create(summary_cache.key_for(chunk, stage='chunk'),
+                                           lambda: call_model(CHUNK_PROMPT.format(content=chunk)))
+
+def summary_prompt(content):
+    """The prompt whose reply is the note's summary.
+
+    Long notes are split into content-defined chunks that are summarized
+    separately (the map step, cached per chunk, so an edit only pays for
+    the chunks it touched); the prompt then asks the model to combine
+    those summaries.
+    """
+    if len(content) <= SUMMARY_CHUNK_CHARS:
+        return SUMMARY_PROMPT.format(content=content)
+    chunks = split_chunks(content, min_chars=SUMMARY_CHUNK_CHARS // 3, max_chars=SUMMARY_CHUNK_CHARS)
+    with ThreadPoolExecutor(max_workers=summary_provider.max_concurrency) as executor:
+        combined = '\n\n'.join(executor.map(summarize_chunk, chunks))
+    if len(combined) > SUMMARY_CHUNK_CHARS:
+        # Still too long to combine in one go: summarize the summaries
+        return summary_prompt(combined)
+    return REDUCE_PROMPT.format(content=combined)
+
+def summarize(content, refresh=False):
+    """Summarize note content with the configured model, raising on failure"""
+    def create():
+        return call_model(summary_prompt(content))
+    return summary_cache.get_or_create(summary_cache.key_for(content), create, refresh=refresh)
+
+def summarize_many(contents):
+    """Summarize several note contents, asking for all cache misses in one prompt.
+
+    If the batch reply can't be parsed, the notes it covered are
+    summarized one at a time instead.
+    """
+    keys = [summary_cache.key_for(content) for content in contents]
+    summaries = [summary_cache.get(key) for key in keys]
+    missing = [i for i, summary in enumerate(summaries) if summary is None]
+    if len(missing) > 1:
+        reply = call_model(batch_prompt([contents[i] for i in missing]))
+        parsed = parse_batch_summaries(reply, len(missing))
+        if parsed is None:
+            print(f"Could not parse batch summary reply for {len(missing)} notes; summarizing them one by one")
+        else:
+            for i, summary in zip(missing, parsed):
+                summary_cache.put(keys[i], summary)
+                summaries[i] = summary
+    for i in missing:
+        if summaries[i] is None:
+            summaries[i] = summarize(contents[i])
+    return summaries
+
+def generate_summary(content, refresh=False):
     """Generate a summary of the note content using Gemini API"""
     try:
-        response = model.generate_content(f"Summarize this text in one or two sentences: {content}")
-        return response.text
+        return summarize(content, refresh=refresh)
     except Exception as e:
         print(f"Error generating summary: {e}")
         return None
 
+# How long a worker's claim on a summary lasts. A note still 'running' after
+# that belongs to a worker that died (a deploy, OOM or restart) and is
+# claimed again, so keep it well above the longest summary call.
+SUMMARY_LEASE_SECONDS = float(os.getenv('SUMMARY_LEASE_SECONDS', '900'))
+
+def summary_lease_held():
+    """Filter for notes a live worker is summarizing right now"""
+    expired = datetime.utcnow() - timedelta(seconds=SUMMARY_LEASE_SECONDS)
+    return ((Note.summary_status == 'running') & Note.summary_claimed_at.isnot(None) &
+            (Note.summary_claimed_at >= expired))
+
+def summary_claimable():
+    """Filter for notes a summary job may claim: pending, or running on an expired lease"""
+    return (Note.summary_status == 'pending') | (
+        (Note.summary_status == 'running') & ~summary_lease_held())
+
+def process_summary_job(note_id):
+    """Fill in the summary for a note queued by create/update"""
+    # Claim the job so duplicate enqueues (e.g. from several workers) only run once
+    claimed_at = datetime.utcnow()
+    claimed = Note.query.filter(Note.id == note_id, summary_claimable()).update(
+        {'summary_status': 'running', 'summary_claimed_at': claimed_at, 'updated_at': Note.updated_at},
+        synchronize_session=False)
+    db.session.commit()
+    if not claimed:
+        return
+
+    note = db.session.get(Note, note_id)
+    content = note.content
+    try:
+        summary = summarize(content)
+    except Exception:
+        # Hand the job back so the retry can claim it again
+        note.keep_updated_at()
+        note.summary_status = 'pending'
+        db.session.commit()
+        raise
+
+    db.session.refresh(note)
+    # A substantive edit while we were waiting on the model set the note back
+    # to pending and queued a newer job, or our lease ran out and another
+    # worker took over; let that one win
+    if note.summary_status == 'running' and note.summary_claimed_at == claimed_at:
+        note.set_summary(summary, content)
+        bump_notes_version(note.user_id, [note.id])
+        db.session.commit()
+
+def fail_summary_job(note_id):
+    """Mark a note's summary as failed once retries are exhausted"""
+    Note.query.filter_by(id=note_id, summary_status='pending').update(
+        {'summary_status': 'failed', 'updated_at': Note.updated_at}, synchronize_session=False)
+    bump_notes_version(note_ids=[note_id])
+    db.session.commit()
+
+# Packing limits for backfills: notes per prompt and total characters of content
+SUMMARY_BATCH_NOTES = int(os.getenv('SUMMARY_BATCH_NOTES', '8'))
+SUMMARY_BATCH_CHARS = int(os.getenv('SUMMARY_BATCH_CHARS', '4000'))
+
+def needs_summary():
+    """Filter for notes whose summary is missing, failed or stale, unless a worker has them now.
+
+    Pending notes count as missing: the queue meant to run them may be
+    gone (an interrupted backfill, a CLI import), and claiming makes a
+    duplicate job harmless. A summary is stale once the content has
+    changed since it was made, which is what a nonzero summary_drift
+    records; summaries from before change tracking are left alone.
+    """
+    missing = (Note.summary.is_(None) | (Note.summary == '') |
+               Note.summary_status.in_(['pending', 'running', 'failed']))
+    stale = Note.summary_drift > 0
+    return (missing | stale) & (Note.summary_status.is_(None) | ~summary_lease_held())
+
+def plan_summary_backfill(user_id=None, after_id=0, limit=None):
+    """Note id batches to summarize, in id order, packed by content length"""
+    query = db.session.query(Note.id, db.func.length(Note.content)).filter(
+        needs_summary(), Note.id > after_id).order_by(Note.id)
+    if user_id is not None:
+        query = query.filter(Note.user_id == user_id)
+    if limit is not None:
+        query = query.limit(limit)
+    return pack_notes(query.all(), max_notes=SUMMARY_BATCH_NOTES, max_chars=SUMMARY_BATCH_CHARS)
+
+def mark_pending(note_ids):
+    Note.query.filter(Note.id.in_(note_ids)).update(
+        {'summary_status': 'pending', 'updated_at': Note.updated_at}, synchronize_session=False)
+    bump_notes_version(note_ids=note_ids)
+    db.session.commit()
+
+def process_summary_batch_job(note_ids):
+    """Summarize several pending notes with as few model calls as possible"""
+    claimed_at = datetime.utcnow()
+    claimed = Note.query.filter(Note.id.in_(note_ids), summary_claimable()).update(
+        {'summary_status': 'running', 'summary_claimed_at': claimed_at, 'updated_at': Note.updated_at},
+        synchronize_session=False)
+    db.session.commit()
+    if not claimed:
+        return
+
+    notes = Note.query.filter(Note.id.in_(note_ids), Note.summary_status == 'running',
+                              Note.summary_claimed_at == claimed_at).all()
+    contents = [note.content for note in notes]
+    try:
+        summaries = summarize_many(contents)
+    except Exception:
+        mark_pending([note.id for note in notes])
+        raise
+
+    for note, content, summary in zip(notes, contents, summaries):
+        db.session.refresh(note)
+        # Same rule as process_summary_job: a newer edit or claim wins
+        if note.summary_status == 'running' and note.summary_claimed_at == claimed_at:
+            note.set_summary(summary, content)
+    bump_notes_version(note_ids=note_ids)
+    db.session.commit()
+
+def fail_summary_batch_job(note_ids):
+    Note.query.filter(Note.id.in_(note_ids), Note.summary_status == 'pending').update(
+        {'summary_status': 'failed', 'updated_at': Note.updated_at}, synchronize_session=False)
+    bump_notes_version(note_ids=note_ids)
+    db.session.commit()
+
+summary_queue = JobQueue(
+    app,
+    workers=int(os.getenv('SUMMARY_WORKERS', '2')),
+    max_retries=int(os.getenv('SUMMARY_MAX_RETRIES', '3')),
+    backoff=float(os.getenv('SUMMARY_RETRY_BACKOFF', '2')),
+)
+summary_queue.register('summary', process_summary_job, on_failure=fail_summary_job)
+summary_queue.register('summary_batch', process_summary_batch_job, on_failure=fail_summary_batch_job)
+
+def process_embedding_job(note_id):
+    """Compute a note's embedding and write it to the user's vector index"""
+    note = db.session.query(Note.user_id, Note.title, Note.content).filter_by(id=note_id).first()
+    if note is None:
+        return
+    vector = embed_note(note.title, note.content)
+    # The embedding is derived data: keep updated_at at the user's last edit
+    written = db.session.execute(update(Note).where(Note.id == note_id).values(
+        embedding=to_bytes(vector), updated_at=Note.updated_at)).rowcount
+    if not written:
+        return
+    # Semantic search results can change; nothing else that's cached does
+    bump_embeddings_version([note.user_id])
+    db.session.commit()
+    vector_index.upsert(note.user_id, [(note_id, vector)])
+
+def embed_missing_notes(after_id=0, limit=500, user_id=None, update_index=True):
+    """Embed up to `limit` notes after `after_id` that have no embedding.
+
+    Returns the last note id handled, or None once there are none left.
+    Scripts pass update_index=False: the vector index files belong to the
+    web app, which rebuilds a user's index when it's missing notes.
+    """
+    query = db.session.query(Note.id, Note.user_id, Note.title, Note.content).filter(
+        Note.embedding.is_(None), Note.id > after_id)
+    if user_id is not None:
+        query = query.filter(Note.user_id == user_id)
+    rows = query.order_by(Note.id).limit(limit).all()
+    if not rows:
+        return None
+    vectors = {}
+    for row in rows:
+        vector = embed_note(row.title, row.content)
+        written = db.session.execute(update(Note).where(Note.id == row.id, Note.embedding.is_(None)).values(
+            embedding=to_bytes(vector), updated_at=Note.updated_at)).rowcount
+        if written:
+            vectors.setdefault(row.user_id, []).append((row.id, vector))
+    if vectors:
+        bump_embeddings_version(list(vectors))
+    db.session.commit()
+    if update_index:
+        for owner_id, items in vectors.items():
+            vector_index.upsert(owner_id, items)
+    return rows[-1].id
+
+# Notes embedded per job while catching up on notes that have no embedding
+EMBEDDING_BACKFILL_BATCH = int(os.getenv('EMBEDDING_BACKFILL_BATCH', '500'))
+
+def process_embedding_backfill_job(after_id):
+    """Embed a batch of notes that have no embedding, then queue the next batch.
+
+    Every process queues the first batch when it starts, but only the one
+    holding the 'embedding_backfill' lease goes on, so each note is
+    embedded once and the queue holds one backfill job at a time.
+    """
+    if not acquire_lease('embedding_backfill', 300):
+        return
+    last_id = embed_missing_notes(after_id, EMBEDDING_BACKFILL_BATCH)
+    if last_id is None:
+        release_lease('embedding_backfill')
+    else:
+        summary_queue.enqueue('embedding_backfill', last_id)
+
+summary_queue.register('embedding', process_embedding_job)
+summary_queue.register('embedding_backfill', process_embedding_backfill_job)
+
+search_index = SearchIndex(db)
+search_ranker = SearchRanker(
+    recency_weight=float(os.getenv('SEARCH_RECENCY_WEIGHT', '0.2')),
+    half_life_days=float(os.getenv('SEARCH_RECENCY_HALF_LIFE_DAYS', '30')),
+    order_weight=float(os.getenv('SEARCH_ORDER_WEIGHT', '0.1')),
+)
+# How many candidates the ranking stage re-scores, and how much of each note it reads
+SEARCH_RERANK_DEPTH = int(os.getenv('SEARCH_RERANK_DEPTH', '200'))
+SEARCH_RERANK_CHARS = int(os.getenv('SEARCH_RERANK_CHARS', '20000'))
+vector_index = VectorIndex(
+    os.getenv('SEMANTIC_INDEX_DIR', os.path.join(app.instance_path, 'vectors')), EMBEDDING_DIM,
+    ann_threshold=int(os.getenv('SEMANTIC_ANN_THRESHOLD', '50000')),
+)
+
 # Create database tables
 with app.app_context():
     db.create_all()
+    search_index.install()
+
+def recover_background_jobs():
+    """Requeue summaries the last process left pending or running and embed notes that have none"""
+    try:
+        for (pending_id,) in db.session.query(Note.id).filter(summary_claimable()):
+            summary_queue.enqueue('summary', pending_id)
+        if db.session.query(Note.id).filter(Note.embedding.is_(None)).first():
+            summary_queue.enqueue('embedding_backfill', 0)
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        print(f"Skipping pending summary recovery (run migrate_db.py?): {e}")
+
+# Recovery runs on the first request rather than at import, so scripts that
+# import the app (migrations, importers, benchmarks) don't start job workers
+_recovery_lock = threading.Lock()
+_recovery_done = False
+
+@app.before_request
+def recover_background_jobs_once():
+    global _recovery_done
+    if _recovery_done:
+        return
+    with _recovery_lock:
+        if _recovery_done:
+            return
+        _recovery_done = True
+    recover_background_jobs()
 
 @app.route('/')
 @login_required
 def index():
-    notes = Note.query.filter_by(user_id=session['user_id']).order_by(Note.created_at.desc()).all()
-    return render_template('index.html', notes=notes)
+    # Notes are fetched page by page from the JSON endpoints
+    return render_template('index.html')
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -141,33 +713,77 @@ def logout():
 @login_required
 def create_note():
     data = request.json
-    summary = generate_summary(data['content'])
     
     note = Note(
         title=data['title'],
         content=data['content'],
         category=data.get('category', 'uncategorized'),
-        summary=summary,
+        summary_status='pending',
+        order=next_top_order(session['user_id']),
         user_id=session['user_id']
     )
     db.session.add(note)
+    db.session.flush()
+    bump_notes_version(session['user_id'], [note.id])
     db.session.commit()
+    summary_queue.enqueue('summary', note.id)
+    summary_queue.enqueue('embedding', note.id)
     return jsonify(note.to_dict()), 201
 
+@app.route('/notes/<int:note_id>', methods=['GET'])
+@login_required
+@versioned_response
+def get_note(note_id):
+    note = Note.query.filter_by(id=note_id, user_id=session['user_id']).first_or_404()
+    return jsonify(note.to_dict())
+
+# Share of a note's words that has to change, summed over edits since the last
+# summary, before the note is summarized again; smaller edits keep the old summary
+SUMMARY_CHANGE_THRESHOLD = float(os.getenv('SUMMARY_CHANGE_THRESHOLD', '0.15'))
+
+def needs_resummary(note, old_content):
+    """Whether an edit from `old_content` to `note.content` calls for a new summary.
+
+    Small edits are added up in `note.summary_drift`, so a run of typo
+    fixes eventually triggers a new summary too.
+    """
+    new_hash = content_hash(note.content)
+    if new_hash == note.summary_hash:
+        # Back to exactly what was summarized
+        note.summary_drift = 0.0
+        return False
+    if new_hash == content_hash(old_content):
+        return False
+    if not note.summary:
+        # Nothing to keep; summarize unless a job is already on its way
+        return note.summary_status not in ('pending', 'running')
+
+    drift = note.summary_drift or 0.0
+    drift += change_ratio(old_content, note.content, stop_at=SUMMARY_CHANGE_THRESHOLD - drift)
+    note.summary_drift = drift
+    return drift >= SUMMARY_CHANGE_THRESHOLD
+
 @app.route('/notes/<int:note_id>', methods=['PUT'])
 @login_required
 def update_note(note_id):
     note = Note.query.filter_by(id=note_id, user_id=session['user_id']).first_or_404()
     data = request.json
+    old_title, old_content = note.title, note.content
     
     note.title = data['title']
     note.content = data['content']
     note.category = data.get('category', note.category)
     
-    if note.content != data['content']:
-        note.summary = generate_summary(data['content'])
+    resummarize = needs_resummary(note, old_content)
+    if resummarize:
+        note.summary_status = 'pending'
+    bump_notes_version(note.user_id, [note.id])
     
     db.session.commit()
+    if resummarize:
+        summary_queue.enqueue('summary', note.id)
+    if note.title != old_title or note.content != old_content:
+        summary_queue.enqueue('embedding', note.id)
     return jsonify(note.to_dict())
 
 @app.route('/notes/<int:note_id>', methods=['DELETE'])
@@ -175,42 +791,619 @@ def update_note(note_id):
 def delete_note(note_id):
     note = Note.query.filter_by(id=note_id, user_id=session['user_id']).first_or_404()
     db.session.delete(note)
+    record_deletes(note.user_id, [note_id])
     db.session.commit()
+    vector_index.delete(note.user_id, [note_id])
     return '', 204
 
+# Keyset columns for each list ordering; the last column breaks ties
+SORT_ORDERS = {
+    'created': ([Note.created_at, Note.id], True),
+    'order': ([Note.order, Note.id], False),
+}
+
+@app.errorhandler(PaginationError)
+def handle_pagination_error(e):
+    return jsonify({'error': str(e)}), 400
+
+# Spacing between consecutive order values, so most moves can take the midpoint
+# of their new neighbours and only touch one row
+ORDER_GAP = 1024
+
+def next_top_order(user_id):
+    """Order value that puts a new note at the top of the user's list"""
+    top = db.session.query(db.func.min(Note.order)).filter_by(user_id=user_id).scalar()
+    return top - ORDER_GAP if top is not None else 0
+
+def paginated_response(results, next_cursor):
+    """JSON list body, with the next page's cursor in the X-Next-Cursor header"""
+    response = jsonify(results)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+def list_view():
+    """Apply the `view` parameter: full notes by default, or `card` for the grid"""
+    view = request.args.get('view', 'full')
+    if view == 'card':
+        return card_query, Note.to_card_dict
+    if view == 'full':
+        return (lambda query: query), Note.to_dict
+    raise PaginationError(f"Invalid view: {view}")
+
+def keyset_response(query):
+    """Page through `query` using the `sort`, `limit` and `cursor` parameters"""
+    sort = request.args.get('sort', 'created')
+    if sort not in SORT_ORDERS:
+        raise PaginationError(f"Invalid sort: {sort}")
+    columns, descending = SORT_ORDERS[sort]
+    project, serialize = list_view()
+    notes, next_cursor = keyset_page(project(query), columns, request.args.get('cursor'),
+                                     parse_limit(request.args.get('limit')), descending)
+    return paginated_response([serialize(note) for note in notes], next_cursor)
+
+def filter_category(query):
+    """Apply the optional `category` parameter in SQL"""
+    category = request.args.get('category')
+    if category and category != 'all':
+        query = query.filter(Note.category == category)
+    return query
+
+@app.route('/notes', methods=['GET'])
+@login_required
+@versioned_response
+def list_notes():
+    return keyset_response(filter_category(Note.query.filter_by(user_id=session['user_id'])))
+
 @app.route('/notes/search')
 @login_required
+@versioned_response
 def search_notes():
-    query = request.args.get('q', '')
-    notes = Note.query.filter(
-        Note.user_id == session['user_id'],
+    query = request.args.get('q', '').strip()
+    mode = request.args.get('mode', 'text')
+    if mode not in ('text', 'semantic'):
+        raise PaginationError(f"Invalid mode: {mode}")
+    if query and mode == 'semantic':
+        return semantic_search_response(query)
+    if query:
+        return ranked_search_response(query)
+    return keyset_response(filter_category(Note.query.filter_by(user_id=session['user_id'])))
+
+def import_note_records(user_id, records, batch_size=500, enqueue=True):
+    """Insert notes from export or legacy notes.json records in batched transactions.
+
+    Imported notes go below the user's existing ones in file order. Notes
+    without a summary are marked pending and, if `enqueue` is set, handed
+    to the background queue instead of being summarized inline. Returns a
+    dict with the imported count, per-note errors, and whether the whole
+    input was read.
+    """
+    bottom = db.session.query(db.func.max(Note.order)).filter_by(user_id=user_id).scalar()
+    next_order = bottom + ORDER_GAP if bottom is not None else 0
+    result = {'imported': 0, 'errors': [], 'complete': True}
+    batch = []
+
+    def flush():
+        if not batch:
+            return
+        ids = db.session.scalars(insert(Note).returning(Note.id, sort_by_parameter_order=True), batch).all()
+        bump_notes_version(user_id, ids)
+        db.session.commit()
+        result['imported'] += len(ids)
+        if enqueue:
+            for note_id, fields in zip(ids, batch):
+                if fields['summary_status'] == 'pending':
+                    summary_queue.enqueue('summary', note_id)
+                summary_queue.enqueue('embedding', note_id)
+        batch.clear()
+
+    try:
+        for index, record in enumerate(records, 1):
+            try:
+                fields = note_fields(record)
+            except TransferError as e:
+                if len(result['errors']) < 100:
+                    result['errors'].append(f"Note {index}: {e}")
+                continue
+            fields.update(user_id=user_id, order=next_order,
+                          summary_status='done' if fields['summary'] else 'pending')
+            next_order += ORDER_GAP
+            batch.append(fields)
+            if len(batch) >= batch_size:
+                flush()
+    except TransferError as e:
+        # Malformed JSON: keep what was parsed before it
+        result['errors'].append(str(e))
+        result['complete'] = False
+    flush()
+    return result
+
+@app.route('/notes/import', methods=['POST'])
+@login_required
+def import_notes():
+    """Import an NDJSON stream or JSON array of notes from the request body"""
+    result = import_note_records(session['user_id'], iter_json_records(request.stream))
+    return jsonify(result), 200 if result['complete'] else 400
+
+@app.route('/notes/export')
+@login_required
+def export_notes():
+    """Stream all of the user's notes as NDJSON without loading them all at once"""
+    user_id = session['user_id']
+
+    def generate():
+        query = Note.query.filter_by(user_id=user_id).order_by(Note.order, Note.id).yield_per(500)
+        for note in query:
+            yield json.dumps(note.to_dict()) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson', headers={
+        'Content-Disposition': 'attachment; filename=notes.ndjson',
+    })
+
+@app.route('/notes/stats')
+@login_required
+@versioned_response
+def note_stats():
+    """Per-category note counts from a single GROUP BY"""
+    rows = db.session.query(Note.category, db.func.count(Note.id)).filter(
+        Note.user_id == session['user_id']).group_by(Note.category)
+    counts = {category: count for category, count in rows}
+    return jsonify({'all': sum(counts.values()), 'categories': counts})
+
+def parse_sync_token(token):
+    """(version, note_id, deletes_seen) from a /notes/changes token.
+
+    A None note_id means the whole version was seen. deletes_seen is the
+    version up to which the client knows of every delete; while a full
+    download is paged through it's ahead of `version`.
+    """
+    if not token:
+        return -1, None, -1
+    values = decode_cursor(token)
+    if (len(values) not in (2, 3) or not isinstance(values[0], int)
+            or not (values[1] is None or isinstance(values[1], int))
+            or not all(isinstance(value, int) for value in values[2:])):
+        raise PaginationError(f"Invalid sync token: {token}")
+    return values[0], values[1], max([values[0]] + values[2:])
+
+def changes_since(user_id, since, limit, project, serialize):
+    """Body of a /notes/changes response: notes changed and ids deleted after the `since` token"""
+    since_version, since_id, deletes_seen = parse_sync_token(since)
+    current, horizon = db.session.query(User.notes_version, User.tombstone_horizon).filter_by(id=user_id).one()
+    if since_version > current:
+        raise PaginationError("Sync token is newer than the server's data; sync again without one")
+    if since and deletes_seen < horizon:
+        raise PaginationError("Sync token has expired; sync again without one")
+    if since_id is None and since_version == current:
+        return {'notes': [], 'deleted': [], 'token': since, 'more': False}
+
+    changed = Note.version > since_version
+    if since_id is not None:
+        changed |= (Note.version == since_version) & (Note.id > since_id)
+    notes = project(Note.query.filter(Note.user_id == user_id, changed)).order_by(
+        Note.version, Note.id).limit(limit + 1).all()
+    more = len(notes) > limit
+    notes = notes[:limit]
+    upto = notes[-1].version if more else current
+    if more:
+        # A full download needs no earlier deletes: those notes just aren't in it
+        deletes_seen = max(deletes_seen, upto) if since else current
+        token = encode_cursor([upto, notes[-1].id] + ([deletes_seen] if deletes_seen > upto else []))
+    else:
+        token = encode_cursor([current, None])
+
+    deleted = []
+    if since:
+        # A delete can be reported twice across a page boundary; applying it again is harmless
+        deleted = [note_id for (note_id,) in db.session.query(NoteTombstone.note_id).filter(
+            NoteTombstone.user_id == user_id, NoteTombstone.version > since_version,
+            NoteTombstone.version <= upto)]
+    return {'notes': [serialize(note) for note in notes], 'deleted': deleted,
+            'token': token, 'more': more}
+
+@app.route('/notes/changes')
+@login_required
+def note_changes():
+    """Notes created or changed, and ids of notes deleted, since a sync token.
+
+    Without `since` every note is returned. The response carries the
+    `token` to pass as `since` next time, and `more` when the page was cut
+    off at `limit`. Clients should apply `deleted` before `notes`. A
+    client that's already in sync costs one primary-key lookup.
+    """
+    project, serialize = list_view()
+    return jsonify(changes_since(session['user_id'], request.args.get('since'),
+                                 parse_limit(request.args.get('limit')), project, serialize))
+
+# Seconds between comments sent on an idle change feed, so proxies keep it open
+EVENTS_KEEPALIVE = float(os.getenv('EVENTS_KEEPALIVE', '25'))
+# Live feeds each hold a server thread, so only this many stay open per
+# process; further tabs poll instead. gunicorn.conf.py sets it to the
+# threads it reserves for them.
+EVENTS_MAX_FEEDS = int(os.getenv('EVENTS_MAX_FEEDS', '16'))
+# A live feed ends after this many seconds and the browser reconnects, so a
+# thread is never tied to one tab indefinitely
+EVENTS_MAX_SECONDS = float(os.getenv('EVENTS_MAX_SECONDS', '300'))
+# How long a tab that didn't get a live feed waits before polling again
+EVENTS_POLL_SECONDS = float(os.getenv('EVENTS_POLL_SECONDS', '30'))
+feed_slots = threading.BoundedSemaphore(EVENTS_MAX_FEEDS)
+
+@app.route('/notes/events')
+@login_required
+def note_events():
+    """Push changes to the user's notes over Server-Sent Events.
+
+    Each `changes` event has the /notes/changes body in card view, and its
+    event id is the sync token, so a reconnecting EventSource resumes from
+    where it left off via Last-Event-ID. The stream opens with a `ready`
+    event, or `reset` if the token it was given can't be resumed and the
+    client should reload.
+
+    An open feed holds a server thread, so at most EVENTS_MAX_FEEDS stay
+    open per process and each closes after EVENTS_MAX_SECONDS. When none
+    is free the response sends what changed and closes with a longer
+    `retry`, turning the EventSource into a poll until a feed frees up.
+    """
+    user_id = session['user_id']
+    live = feed_slots.acquire(blocking=False)
+    subscription = None
+    try:
+        # Subscribe before reading the version, so no change can slip in between
+        if live:
+            subscription = event_bus.subscribe(notes_channel(user_id))
+        current, horizon = db.session.query(User.notes_version, User.tombstone_horizon).filter_by(id=user_id).one()
+    except BaseException:
+        if subscription is not None:
+            subscription.close()
+        if live:
+            feed_slots.release()
+        raise
+    token = request.headers.get('Last-Event-ID') or request.args.get('since')
+    opening = 'ready'
+    try:
+        version, _, deletes_seen = parse_sync_token(token)
+        if token and not (version <= current and deletes_seen >= horizon):
+            raise PaginationError("Sync token can't be resumed")
+    except PaginationError:
+        token, opening = None, 'reset'
+    changed = token is not None
+    token = token or encode_cursor([current, None])
+    # Don't hold a pooled connection for the life of the stream
+    db.session.remove()
+
+    def generate():
+        nonlocal token, changed
+        retry = 3000 if live else int(EVENTS_POLL_SECONDS * 1000)
+        yield f"retry: {retry}\n" + sse_event({'token': token}, event=opening, id=token)
+        deadline = time.monotonic() + EVENTS_MAX_SECONDS
+        while True:
+            while changed:
+                page = changes_since(user_id, token, 500, card_query, Note.to_card_dict)
+                db.session.remove()
+                token = page['token']
+                if page['notes'] or page['deleted']:
+                    yield sse_event(page, event='changes', id=token)
+                changed = page['more']
+            remaining = deadline - time.monotonic()
+            if not live or remaining <= 0:
+                return
+            changed = subscription.wait(min(EVENTS_KEEPALIVE, remaining))
+            if not changed:
+                yield ": keepalive\n\n"
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+    if live:
+        # Runs however the stream ends, even if it never started
+        @response.call_on_close
+        def close_feed():
+            subscription.close()
+            feed_slots.release()
+    return response
+
+def offset_page():
+    """`limit` and the offset in `cursor`, for result lists that are ranked per query"""
+    # Ranks are recomputed per query, so relevance pages are addressed by offset
+    limit = parse_limit(request.args.get('limit'))
+    cursor = request.args.get('cursor')
+    offset = decode_cursor(cursor)[0] if cursor else 0
+    if not isinstance(offset, int) or offset < 0:
+        raise PaginationError(f"Invalid cursor: {cursor}")
+    return limit, offset
+
+def search_candidates(user_id, query, category, limit, offset):
+    """(note_id, snippet) matches in the cheap first-stage order: index rank, or newest first"""
+    if search_index.enabled and query_terms(query):
+        return search_index.search(user_id, query, limit=limit, offset=offset, category=category)
+    matches = substring_search(user_id, query)
+    if category:
+        matches = matches.filter(Note.category == category)
+    matches = matches.with_entities(Note.id).order_by(Note.created_at.desc(), Note.id.desc())
+    return [(note_id, None) for (note_id,) in matches.limit(limit).offset(offset)]
+
+def rerank(user_id, query, matches):
+    """Re-score first-stage matches with search_ranker"""
+    rows = db.session.query(
+        Note.id, Note.title, Note.summary, Note.updated_at, Note.order,
+        db.func.substr(Note.content, 1, SEARCH_RERANK_CHARS).label('content'),
+    ).filter(Note.id.in_([note_id for note_id, _ in matches])).all()
+    terms = query_terms(query)
+    total = doc_freqs = None
+    if search_index.enabled and terms:
+        total = db.session.query(db.func.count(Note.id)).filter(Note.user_id == user_id).scalar()
+        doc_freqs = search_index.document_frequencies(user_id, terms)
+    snippets = dict(matches)
+    return [(note_id, snippets[note_id]) for note_id in search_ranker.rank(rows, terms, total, doc_freqs)]
+
+def ranked_search_response(query):
+    """Page through matches in relevance order.
+
+    The first SEARCH_RERANK_DEPTH candidates are re-ranked by
+    search_ranker; deeper pages continue in first-stage order, so the
+    cost of a search doesn't grow with the number of matches.
+    """
+    limit, offset = offset_page()
+    user_id = session['user_id']
+    category = request.args.get('category')
+    if category == 'all':
+        category = None
+    pool = search_candidates(user_id, query, category, SEARCH_RERANK_DEPTH + 1, 0)
+    matches = rerank(user_id, query, pool[:SEARCH_RERANK_DEPTH])[offset:offset + limit + 1]
+    if len(pool) > SEARCH_RERANK_DEPTH and len(matches) <= limit:
+        matches += search_candidates(user_id, query, category, limit + 1 - len(matches),
+                                     max(offset, SEARCH_RERANK_DEPTH))
+    next_cursor = encode_cursor([offset + limit]) if len(matches) > limit else None
+    matches = matches[:limit]
+    project, serialize = list_view()
+    notes = {note.id: note for note in project(Note.query.filter(Note.id.in_([m[0] for m in matches])))}
+    results = []
+    for note_id, snippet in matches:
+        # Skip notes deleted since the candidates were fetched
+        if note_id not in notes:
+            continue
+        result = serialize(notes[note_id])
+        if snippet is not None:
+            result['snippet'] = snippet
+        results.append(result)
+    return paginated_response(results, next_cursor)
+
+def sync_vector_index(user_id):
+    """Rebuild the user's vector index from Note.embedding if it's missing notes or has extra ones"""
+    embedded = db.session.query(Note.id).filter(
+        Note.user_id == user_id, Note.embedding.isnot(None)).count()
+    if vector_index.count(user_id) != embedded:
+        rows = db.session.query(Note.id, Note.embedding).filter(
+            Note.user_id == user_id, Note.embedding.isnot(None)).yield_per(1000)
+        vector_index.rebuild(user_id, ((note_id, from_bytes(data)) for note_id, data in rows))
+
+def semantic_search_response(query):
+    """Page through notes by embedding similarity to the query"""
+    limit, offset = offset_page()
+    user_id = session['user_id']
+    sync_vector_index(user_id)
+
+    allowed_ids = None
+    category = request.args.get('category')
+    if category and category != 'all':
+        allowed_ids = [note_id for (note_id,) in db.session.query(Note.id).filter_by(
+            user_id=user_id, category=category)]
+    matches = vector_index.search(user_id, embed_text(query), offset + limit + 1, allowed_ids)[offset:]
+    next_cursor = encode_cursor([offset + limit]) if len(matches) > limit else None
+    matches = matches[:limit]
+
+    project, serialize = list_view()
+    notes = {note.id: note for note in project(Note.query.filter(Note.id.in_([m[0] for m in matches])))}
+    results = []
+    for note_id, score in matches:
+        if note_id in notes:
+            result = serialize(notes[note_id])
+            result['score'] = round(score, 4)
+            results.append(result)
+    return paginated_response(results, next_cursor)
+
+def substring_search(user_id, query):
+    """Unindexed ILIKE match, used when full-text search isn't available"""
+    return Note.query.filter(
+        Note.user_id == user_id,
         (Note.title.ilike(f'%{query}%')) |
         (Note.content.ilike(f'%{query}%')) |
         (Note.summary.ilike(f'%{query}%'))
-    ).order_by(Note.created_at.desc()).all()
-    return jsonify([note.to_dict() for note in notes])
+    )
 
 @app.route('/notes/<int:note_id>/summarize', methods=['POST'])
 @login_required
 def regenerate_summary(note_id):
     note = Note.query.filter_by(id=note_id, user_id=session['user_id']).first_or_404()
-    note.summary = generate_summary(note.content)
+    # Served from the summary cache unless the client explicitly asks for a fresh one
+    refresh = request.args.get('refresh') == '1'
+    summary = generate_summary(note.content, refresh=refresh)
+    if summary is None:
+        note.keep_updated_at()
+        note.summary = None
+    else:
+        note.set_summary(summary, note.content)
+    bump_notes_version(note.user_id, [note.id])
     db.session.commit()
     return jsonify(note.to_dict())
 
+def sse_event(data, event=None, id=None):
+    """Format one Server-Sent Events message"""
+    prefix = f"event: {event}\n" if event else ""
+    if id is not None:
+        prefix += f"id: {id}\n"
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@app.route('/notes/<int:note_id>/summarize/stream')
+@login_required
+def stream_summary(note_id):
+    """Stream a new summary to the browser token by token over Server-Sent Events.
+
+    Each chunk is sent as a default `message` event with {"text": ...};
+    a `done` event carries the full summary once it's been saved, and a
+    `failed` event reports errors. Run under gunicorn's gthread workers so
+    an open stream only occupies one thread.
+    """
+    note = Note.query.filter_by(id=note_id, user_id=session['user_id']).first_or_404()
+    content = note.content
+    key = summary_cache.key_for(content)
+    cached = None if request.args.get('refresh') == '1' else summary_cache.get(key)
+    # Don't hold a pooled connection while the model streams
+    db.session.remove()
+
+    def generate():
+        if cached is not None:
+            summary = cached
+            yield sse_event({'text': summary})
+        else:
+            parts = []
+            try:
+                for text in summary_provider.stream(summary_prompt(content)):
+                    parts.append(text)
+                    yield sse_event({'text': text})
+            except Exception as e:
+                print(f"Error streaming summary: {e}")
+                yield sse_event({'error': 'Summary generation failed'}, event='failed')
+                return
+            summary = ''.join(parts)
+            summary_cache.put(key, summary)
+
+        current = db.session.get(Note, note_id)
+        if current is not None and current.content == content:
+            current.set_summary(summary, content)
+            bump_notes_version(current.user_id, [current.id])
+            db.session.commit()
+        yield sse_event({'summary': summary}, event='done')
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Stop proxies such as nginx from buffering the whole stream
+        'X-Accel-Buffering': 'no',
+    })
+
+@app.route('/notes/summarize/batch', methods=['POST'])
+@login_required
+def summarize_batch():
+    """Queue summaries for the user's notes that are missing, failed or stale.
+
+    Takes an optional JSON body {"limit": n}; the response says how many
+    notes were queued and how many are still left for another call.
+    """
+    limit = parse_limit((request.get_json(silent=True) or {}).get('limit'))
+    user_id = session['user_id']
+    batches = plan_summary_backfill(user_id, limit=limit)
+    note_ids = [note_id for batch in batches for note_id in batch]
+    if note_ids:
+        mark_pending(note_ids)
+    for batch in batches:
+        summary_queue.enqueue('summary_batch', batch)
+    remaining = Note.query.filter(Note.user_id == user_id, needs_summary()).count()
+    return jsonify({'queued': len(note_ids), 'prompts': len(batches), 'remaining': remaining}), 202
+
+@app.route('/summary-cache/stats')
+@login_required
+def summary_cache_stats():
+    return jsonify(summary_cache.stats())
+
+@app.route('/db/pool/stats')
+@login_required
+def db_pool_stats():
+    return jsonify(pool_stats(db.engine))
+
+@app.route('/response-cache/stats')
+@login_required
+def response_cache_stats():
+    return jsonify(response_cache.stats())
+
+@app.route('/summary-provider/stats')
+@login_required
+def summary_provider_stats():
+    return jsonify(summary_provider.stats())
+
 @app.route('/notes/reorder', methods=['POST'])
 @login_required
 def reorder_notes():
+    """Reorder notes, either as a full list or as a single move.
+
+    Full form: {"order": [id, ...]} gives the listed notes evenly spaced
+    positions in one bulk UPDATE. Move form: {"id": id, "prev_id": id,
+    "next_id": id} places one note between its new neighbours (either may
+    be null at the ends of the list), which usually updates just that row.
+    """
     data = request.json
-    order = data.get('order', [])
-    
-    for index, note_id in enumerate(order):
-        note = Note.query.filter_by(id=note_id, user_id=session['user_id']).first()
-        if note:
-            note.order = index
-    
+    user_id = session['user_id']
+    # Bumped first so set_orders stamps the moved notes with the new version
+    bump_notes_version(user_id)
+
+    if 'id' in data:
+        if not move_note(user_id, data['id'], data.get('prev_id'), data.get('next_id')):
+            return jsonify({'error': 'Note not found'}), 404
+    else:
+        order = data.get('order', [])
+        # One query to drop ids the user doesn't own, one UPDATE for the rest
+        owned = {note_id for (note_id,) in db.session.query(Note.id).filter(
+            Note.id.in_(order), Note.user_id == user_id)}
+        set_orders(user_id, {note_id: index * ORDER_GAP
+                             for index, note_id in enumerate(order) if note_id in owned})
+
     db.session.commit()
     return jsonify({'status': 'success'})
 
+def set_orders(user_id, orders, chunk_size=500):
+    """Write {note_id: order} with one CASE update per chunk, stamping the owner's current version"""
+    items = list(orders.items())
+    for start in range(0, len(items), chunk_size):
+        chunk = dict(items[start:start + chunk_size])
+        Note.query.filter(Note.id.in_(chunk), Note.user_id == user_id).update(
+            {Note.order: db.case(chunk, value=Note.id), Note.version: owner_version(),
+             Note.updated_at: Note.updated_at}, synchronize_session=False)
+
+def move_note(user_id, note_id, prev_id, next_id):
+    """Give a note an order between prev_id and next_id; False if any isn't the user's"""
+    ids = {i for i in (note_id, prev_id, next_id) if i is not None}
+    orders = dict(db.session.query(Note.id, Note.order).filter(Note.id.in_(ids), Note.user_id == user_id))
+    if len(orders) != len(ids):
+        return False
+
+    position = order_between(*neighbour_orders(user_id, note_id, orders.get(prev_id), orders.get(next_id)))
+    if position is None:
+        # No integer left between the neighbours: re-space everything once
+        renumber_orders(user_id)
+        orders = dict(db.session.query(Note.id, Note.order).filter(Note.id.in_(ids)))
+        position = order_between(*neighbour_orders(user_id, note_id, orders.get(prev_id), orders.get(next_id)))
+    set_orders(user_id, {note_id: position})
+    return True
+
+def neighbour_orders(user_id, note_id, before, after):
+    """The orders a moved note goes between, trusting `before` when the pair is out of order.
+
+    A stale list can send neighbours that are no longer in order; the
+    note then goes right after `before`, ahead of whatever really
+    follows it there.
+    """
+    if before is not None and after is not None and after <= before:
+        after = db.session.query(db.func.min(Note.order)).filter(
+            Note.user_id == user_id, Note.order > before, Note.id != note_id).scalar()
+    return before, after
+
+def order_between(before, after):
+    """Order value strictly between two neighbours (None for an open end)"""
+    if before is None and after is None:
+        return 0
+    if before is None:
+        return after - ORDER_GAP
+    if after is None:
+        return before + ORDER_GAP
+    if after - before < 2:
+        return None
+    return (before + after) // 2
+
+def renumber_orders(user_id):
+    """Spread a user's notes ORDER_GAP apart, keeping their current order"""
+    ids = [note_id for (note_id,) in db.session.query(Note.id).filter_by(user_id=user_id)
+           .order_by(Note.order, Note.id)]
+    set_orders(user_id, {note_id: index * ORDER_GAP for index, note_id in enumerate(ids)})
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=int(os.getenv('PORT', 5000)))
\ No newline at end of file
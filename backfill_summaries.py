@@ -0,0 +1,100 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app import (app, User, SUMMARY_BATCH_NOTES, fail_summary_batch_job, mark_pending,
+                 plan_summary_backfill, process_summary_batch_job)
+from summary_batch import is_rate_limit_error
+
+def load_progress(path, user):
+    """Id to resume after, if the progress file is from a run over the same notes"""
+    if not os.path.exists(path):
+        return 0
+    with open(path) as file:
+        progress = json.load(file)
+    return progress['after_id'] if progress.get('user') == user else 0
+
+def save_progress(path, user, after_id):
+    with open(path, 'w') as file:
+        json.dump({'user': user, 'after_id': after_id}, file)
+
+def run_batch(note_ids, retries):
+    """Summarize one packed batch, retrying with backoff; returns (done, failed) counts"""
+    with app.app_context():
+        # Marked just before it runs, so an interrupted run leaves at most
+        # the in-flight batches pending, and a resumed run selects them again
+        mark_pending(note_ids)
+        for attempt in range(retries + 1):
+            try:
+                process_summary_batch_job(note_ids)
+                return len(note_ids), 0
+            except Exception as e:
+                if attempt == retries:
+                    print(f"Giving up on notes {note_ids}: {e}")
+                    fail_summary_batch_job(note_ids)
+                    return 0, len(note_ids)
+                # The shared rate limiter already paused callers after a 429
+                delay = 0 if is_rate_limit_error(e) else 2 ** attempt
+                print(f"Batch {note_ids} failed ({e}), retrying in {delay}s")
+                time.sleep(delay)
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize notes whose summary is missing, failed or stale")
+    parser.add_argument('--user', help="Only backfill this user's notes")
+    parser.add_argument('--limit', type=int, help="Stop after this many notes")
+    parser.add_argument('--concurrency', type=int, default=4, help="Model calls in flight at once (default: 4)")
+    parser.add_argument('--retries', type=int, default=3, help="Retries per batch (default: 3)")
+    parser.add_argument('--progress-file', default='.summary_backfill.json',
+                        help="Where progress is saved so an interrupted run can resume")
+    parser.add_argument('--restart', action='store_true', help="Ignore saved progress")
+    parser.add_argument('--dry-run', action='store_true', help="Only report what would be summarized")
+    args = parser.parse_args()
+
+    with app.app_context():
+        user_id = None
+        if args.user:
+            user = User.query.filter_by(username=args.user).first()
+            if user is None:
+                print(f"User '{args.user}' not found")
+                sys.exit(1)
+            user_id = user.id
+
+        if args.dry_run:
+            batches = plan_summary_backfill(user_id, limit=args.limit)
+            notes = sum(len(batch) for batch in batches)
+            print(f"{notes} notes need a summary ({len(batches)} prompts)")
+            return
+
+        after_id = 0 if args.restart else load_progress(args.progress_file, args.user)
+        if after_id:
+            print(f"Resuming after note {after_id}")
+
+        # Work through the notes a chunk at a time so progress is saved regularly
+        chunk_size = max(1, args.concurrency) * SUMMARY_BATCH_NOTES * 4
+        done = failed = prompts = 0
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+            while args.limit is None or done + failed < args.limit:
+                limit = chunk_size if args.limit is None else min(chunk_size, args.limit - done - failed)
+                batches = plan_summary_backfill(user_id, after_id=after_id, limit=limit)
+                if not batches:
+                    break
+                for batch_done, batch_failed in executor.map(lambda batch: run_batch(batch, args.retries), batches):
+                    done += batch_done
+                    failed += batch_failed
+                prompts += len(batches)
+                after_id = batches[-1][-1]
+                save_progress(args.progress_file, args.user, after_id)
+                elapsed = time.monotonic() - started
+                print(f"{done} summarized, {failed} failed, {prompts} prompts, "
+                      f"{done / elapsed:.1f} notes/s (through note {after_id})")
+
+    if args.limit is None and os.path.exists(args.progress_file):
+        os.remove(args.progress_file)
+    print(f"Done: {done} summarized, {failed} failed")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Compare full-text search latency against the old ILIKE scan.
+
+Usage: python benchmarks/bench_search.py [sizes...]   (default: 10000 100000 1000000)
+
+Each size gets a fresh SQLite database in a temporary directory with every
+note owned by a single user, which is the worst case for the ILIKE path.
+Set BENCH_DATABASE_URL to a Postgres database to benchmark the GIN index
+instead; its note table is emptied before each run.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+WORDS = (
+    "meeting project budget review design apple garden travel recipe invoice "
+    "deadline client report music workout grocery family weekend idea draft "
+    "launch roadmap feedback sprint backlog holiday flight hotel dinner book"
+).split()
+VOCABULARY_SIZE = 20000
+QUERIES = ["budget", "rev", "apple garden", "flight hotel", "nonexistentterm"]
+REPEATS = 20
+BATCH = 10000
+
+tmpdir = tempfile.mkdtemp(prefix='bench_search_')
+os.environ['DATABASE_URL'] = os.getenv('BENCH_DATABASE_URL', f"sqlite:///{os.path.join(tmpdir, 'bench.db')}")
+os.environ.setdefault('SUMMARY_MODEL', 'stub')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, Note, User, search_index, substring_search  # noqa: E402
+
+
+def vocabulary(rng):
+    """Common words first, then made-up filler, weighted roughly by Zipf's law"""
+    syllables = ['ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'ti', 'vo', 'ze', 'pa', 'qu', 'dr']
+    filler = {''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+              for _ in range(VOCABULARY_SIZE)}
+    words = WORDS + sorted(filler - set(WORDS))
+    weights = [1 / (rank + 10) for rank in range(len(words))]
+    return words, weights
+
+
+def sentence(rng, vocab, n):
+    words, weights = vocab
+    return ' '.join(rng.choices(words, weights, k=n))
+
+
+def populate(size, user_id):
+    rng = random.Random(size)
+    vocab = vocabulary(rng)
+    db.session.query(Note).delete()
+    db.session.commit()
+    for start in range(0, size, BATCH):
+        rows = [{
+            'title': sentence(rng, vocab, 4),
+            'content': sentence(rng, vocab, 60),
+            'summary': sentence(rng, vocab, 15),
+            'category': 'work',
+            'user_id': user_id,
+            'summary_status': 'done',
+        } for _ in range(min(BATCH, size - start))]
+        db.session.execute(Note.__table__.insert(), rows)
+        db.session.commit()
+
+
+def time_query(fn):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]
+    with app.app_context():
+        user = User.query.filter_by(username='bench').first()
+        if user is None:
+            user = User(username='bench', email='bench@example.com')
+            user.set_password('bench')
+            db.session.add(user)
+            db.session.commit()
+
+        print(f"{'notes':>9}  {'query':<16} {'ilike ms':>9} {'fts ms':>9} {'speedup':>8} {'hits':>7}")
+        for size in sizes:
+            started = time.perf_counter()
+            populate(size, user.id)
+            print(f"# populated {size} notes in {time.perf_counter() - started:.1f}s")
+            for query in QUERIES:
+                ilike = time_query(lambda: substring_search(user.id, query)
+                                   .order_by(Note.created_at.desc()).limit(50).all())
+                fts = time_query(lambda: search_index.search(user.id, query, limit=50))
+                hits = len(search_index.search(user.id, query))
+                print(f"{size:>9}  {query:<16} {ilike:>9.2f} {fts:>9.2f} {ilike / max(fts, 1e-6):>7.1f}x {hits:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark the local embeddings and the memory-mapped vector index.
+
+Usage: python benchmarks/bench_semantic.py [sizes...]   (default: 10000 100000)
+
+Reports embedding throughput, exact top-10 latency over the memory-mapped
+matrix, and IVF latency and recall@10 against the exact results. Needs
+only NumPy; no database or network.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embeddings import EMBEDDING_DIM, embed_note, embed_text  # noqa: E402
+from vector_index import VectorIndex  # noqa: E402
+
+WORDS = (
+    "meeting project budget review design apple garden travel recipe invoice "
+    "deadline client report music workout grocery family weekend idea draft "
+    "launch roadmap feedback sprint backlog holiday flight hotel dinner book"
+).split()
+QUERIES = ["budget review", "holiday flight", "recipe dinner", "sprint backlog", "garden"]
+REPEATS = 20
+K = 10
+
+
+def sentence(rng, n):
+    return ' '.join(rng.choice(WORDS) + rng.choice(['', 's', 'ing', 'ed']) for _ in range(n))
+
+
+def time_query(fn):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+    directory = tempfile.mkdtemp(prefix='bench_semantic_')
+    exact = VectorIndex(directory, EMBEDDING_DIM, ann_threshold=0)
+    approximate = VectorIndex(directory, EMBEDDING_DIM, ann_threshold=1)
+
+    print(f"{'notes':>9}  {'query':<16} {'exact ms':>9} {'ivf ms':>9} {'recall@10':>10}")
+    for size in sizes:
+        rng = random.Random(size)
+        started = time.perf_counter()
+        vectors = [(i, embed_note(sentence(rng, 4), sentence(rng, 60))) for i in range(size)]
+        elapsed = time.perf_counter() - started
+        print(f"# embedded {size} notes in {elapsed:.1f}s ({size / elapsed:.0f} notes/s)")
+        exact.rebuild(size, vectors)
+
+        # First search builds the IVF index
+        started = time.perf_counter()
+        approximate.search(size, embed_text("warm up"), K)
+        print(f"# built IVF index in {time.perf_counter() - started:.2f}s")
+
+        for query in QUERIES:
+            vector = embed_text(query)
+            exact_ms = time_query(lambda: exact.search(size, vector, K))
+            ivf_ms = time_query(lambda: approximate.search(size, vector, K))
+            truth = {note_id for note_id, _ in exact.search(size, vector, K)}
+            found = {note_id for note_id, _ in approximate.search(size, vector, K)}
+            print(f"{size:>9}  {query:<16} {exact_ms:>9.2f} {ivf_ms:>9.2f} {len(truth & found) / K:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+// Compare the old innerHTML grid rebuild with the keyed, windowed NoteGrid
+// in jsdom, no browser needed:
+//
+//   npm install --no-save jsdom
+//   node benchmarks/render_bench.js [sizes...]    (default: 1000 10000)
+//
+// jsdom doesn't do layout, so the grid uses its fallback of 3 columns and a
+// 768px viewport; scrolling is simulated by moving the container's top.
+const path = require('path');
+const { performance } = require('perf_hooks');
+const { JSDOM } = require('jsdom');
+const { NoteGrid, renderNoteCard } = require(path.join(__dirname, '..', 'static', 'js', 'note_grid.js'));
+
+const COLUMNS = 3;
+const RUNS = 5;
+const WORDS = ['meeting', 'project', 'idea', 'budget', 'travel', 'recipe', 'draft', 'review', 'launch', 'notes'];
+
+function makeNotes(count) {
+    const notes = [];
+    for (let i = 0; i < count; i++) {
+        const words = Array.from({ length: 30 }, (_, j) => WORDS[(i * 7 + j * 3) % WORDS.length]);
+        notes.push({
+            id: i + 1,
+            title: `${WORDS[i % WORDS.length]} ${i}`,
+            category: ['work', 'personal', 'ideas'][i % 3],
+            preview: words.join(' '),
+            summary: i % 4 ? `Summary: ${words.slice(0, 12).join(' ')}` : null,
+            summary_status: i % 4 ? 'done' : 'pending',
+            created_at: new Date(Date.UTC(2024, 0, 1) + i * 60000).toISOString()
+        });
+    }
+    return notes;
+}
+
+function newPage() {
+    const dom = new JSDOM('<!DOCTYPE html><div class="notes-container" id="notes-container"></div>');
+    return dom.window.document.getElementById('notes-container');
+}
+
+// What displayNotes() used to do on every fetch and keystroke
+function rebuild(container, notes) {
+    container.innerHTML = notes.map(renderNoteCard).join('');
+    container.querySelectorAll('.note-card').forEach(card => {
+        card.setAttribute('draggable', true);
+        for (const type of ['click', 'dragstart', 'dragend', 'dragover', 'dragleave', 'drop']) {
+            card.addEventListener(type, () => {});
+        }
+    });
+}
+
+function time(fn) {
+    const samples = [];
+    for (let i = 0; i < RUNS; i++) {
+        const start = performance.now();
+        fn(i);
+        samples.push(performance.now() - start);
+    }
+    samples.sort((a, b) => a - b);
+    return samples[Math.floor(samples.length / 2)];
+}
+
+function bench(size) {
+    const notes = makeNotes(size);
+    // A keystroke that narrows the list, and a refresh where one summary arrived
+    const filtered = notes.filter(note => note.title.includes('1'));
+    const refreshed = notes.map(note => ({ ...note }));
+    refreshed[1] = { ...refreshed[1], summary: 'Summary: updated' };
+
+    const results = [];
+    const report = (name, ms, container) => {
+        results.push({ case: name, 'median ms': ms.toFixed(2), 'cards in DOM': container.children.length });
+    };
+
+    let container = newPage();
+    report('rebuild: initial render', time(() => rebuild(container, notes)), container);
+    report('rebuild: refresh', time(() => rebuild(container, refreshed)), container);
+    report('rebuild: filter', time(i => rebuild(container, i % 2 ? notes : filtered)), container);
+
+    let grid;
+    report('grid: initial render', time(() => {
+        container = newPage();
+        grid = new NoteGrid(container, { columns: COLUMNS });
+        grid.setNotes(notes);
+    }), container);
+    report('grid: refresh', time(i => grid.setNotes(i % 2 ? notes : refreshed)), container);
+    report('grid: filter', time(i => grid.setNotes(i % 2 ? notes : filtered)), container);
+
+    grid.setNotes(notes);
+    const height = Math.ceil(notes.length / COLUMNS) * grid.measure().stride;
+    let top = 0;
+    container.getBoundingClientRect = () => ({ top });
+    report('grid: scroll one screen', time(() => {
+        top = -((Math.abs(top) + 768) % height);
+        grid.render();
+    }), container);
+
+    console.log(`\n${size} notes`);
+    console.table(results);
+}
+
+const sizes = process.argv.slice(2).map(Number);
+for (const size of sizes.length ? sizes : [1000, 10000]) bench(size);
@@ -0,0 +1,28 @@
+import difflib
+import hashlib
+
+from summary_cache import normalize_content
+
+
+def content_hash(content):
+    """sha256 of the whitespace-normalized content"""
+    return hashlib.sha256(normalize_content(content).encode('utf-8')).hexdigest()
+
+
+def change_ratio(old, new, stop_at=1.0):
+    """Fraction of words that differ between two versions of a note (0 = same, 1 = unrelated).
+
+    difflib's cheap upper bounds on similarity are tried first, and the
+    full word-by-word comparison only runs when they can't already show
+    a change of at least `stop_at`. In that case the result is only a
+    lower bound, which is all a threshold check needs.
+    """
+    a, b = old.split(), new.split()
+    if a == b:
+        return 0.0
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    for upper_bound in (matcher.real_quick_ratio, matcher.quick_ratio):
+        change = 1.0 - upper_bound()
+        if change >= stop_at:
+            return change
+    return 1.0 - matcher.ratio()
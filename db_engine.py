@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    """How long requests wait to get a connection out of the pool.
+
+    Waits include opening a new connection while the pool is still
+    growing. Percentiles cover the last `window` checkouts.
+    """
+
+    def __init__(self, window=1000):
+        self._waits = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._total = 0.0
+        self._max = 0.0
+
+    def record(self, seconds, timed_out=False):
+        with self._lock:
+            self._waits.append(seconds)
+            self._total += seconds
+            self._max = max(self._max, seconds)
+            if timed_out:
+                self._timeouts += 1
+            else:
+                self._checkouts += 1
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            count = self._checkouts + self._timeouts
+
+            def percentile(p):
+                return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 3) if waits else 0.0
+
+            return {
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'wait_ms': {
+                    'avg': round(self._total / count * 1000, 3) if count else 0.0,
+                    'p50': percentile(0.50),
+                    'p95': percentile(0.95),
+                    'p99': percentile(0.99),
+                    'max': round(self._max * 1000, 3),
+                },
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records every checkout wait in pool_metrics"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.record(time.perf_counter() - started)
+        return connection
+
+
+def _env_bool(name, default):
+    return os.getenv(name, default).lower() in ('1', 'true', 'yes', 'on')
+
+
+def is_memory_sqlite(url):
+    return url in ('sqlite://', 'sqlite:///') or ':memory:' in url or 'mode=memory' in url
+
+
+def engine_options(url):
+    """SQLALCHEMY_ENGINE_OPTIONS for `url`, tuned with the DB_* environment variables"""
+    if url.startswith('sqlite') and is_memory_sqlite(url):
+        # One shared connection; Flask-SQLAlchemy's defaults are right for it
+        return {}
+
+    options = {
+        'poolclass': TimedQueuePool,
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', '30')),
+    }
+    if url.startswith('sqlite'):
+        busy_timeout = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+        options['connect_args'] = {'timeout': busy_timeout / 1000, 'check_same_thread': False}
+        return options
+
+    # Server databases: drop connections the server or a proxy has closed
+    options['pool_pre_ping'] = _env_bool('DB_POOL_PRE_PING', '1')
+    options['pool_recycle'] = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    if url.startswith('postgresql'):
+        connect_args = {'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '10'))}
+        statement_timeout = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '30000'))
+        if statement_timeout:
+            connect_args['options'] = f"-c statement_timeout={statement_timeout}"
+        options['connect_args'] = connect_args
+    return options
+
+
+def install_sqlite_pragmas(engine):
+    """WAL journaling and related pragmas on every new SQLite connection.
+
+    WAL lets readers run alongside the single writer, which matters once
+    gunicorn threads, the summary workers and live feeds share the file.
+    """
+    if engine.dialect.name != 'sqlite' or is_memory_sqlite(str(engine.url)):
+        return
+    synchronous = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    busy_timeout = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    cache_kib = int(os.getenv('SQLITE_CACHE_KIB', '20000'))
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={synchronous}")
+        cursor.execute(f"PRAGMA busy_timeout={busy_timeout}")
+        cursor.execute(f"PRAGMA cache_size=-{cache_kib}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+
+def pool_stats(engine):
+    """Current pool occupancy plus the checkout wait metrics"""
+    pool = engine.pool
+    stats = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(size=pool.size(), checked_in=pool.checkedin(), checked_out=pool.checkedout(),
+                     overflow=pool.overflow())
+    else:
+        stats['status'] = pool.status()
+    stats.update(pool_metrics.stats())
+    return stats
@@ -0,0 +1,49 @@
+import re
+import zlib
+
+import numpy as np
+
+EMBEDDING_DIM = 256
+
+
+def _features(text):
+    """Hashed words and character trigrams of each word"""
+    for word in re.findall(r'\w+', text.lower()):
+        yield 'w:' + word
+        padded = f'#{word}#'
+        for i in range(len(padded) - 2):
+            yield padded[i:i + 3]
+
+
+def embed_text(text, dim=EMBEDDING_DIM):
+    """Deterministic local embedding: signed feature hashing of words and trigrams.
+
+    Needs no model or network, so results are reproducible offline. Notes
+    that share words or word fragments (typos, plurals, inflections) end
+    up close together. The vector is L2-normalized, so a dot product is
+    the cosine similarity.
+    """
+    hashes = np.fromiter((zlib.crc32(f.encode('utf-8')) for f in _features(text)), dtype=np.uint32)
+    vector = np.zeros(dim, dtype=np.float32)
+    if len(hashes):
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+        np.add.at(vector, hashes % dim, signs)
+        # Dampen very frequent features so long notes aren't dominated by them
+        vector = np.sign(vector) * np.sqrt(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+    return vector
+
+
+def embed_note(title, content):
+    # The title counts double; it's usually the best description of the note
+    return embed_text(f"{title} {title} {content}")
+
+
+def to_bytes(vector):
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def from_bytes(data):
+    return np.frombuffer(data, dtype=np.float32)
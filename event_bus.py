@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+from collections import defaultdict
+
+
+class Subscription:
+    """One listener on a channel; publishes to the channel wake it up.
+
+    Publishes are coalesced: a subscriber only learns that something
+    happened since it last looked, and is expected to fetch the details
+    itself. That keeps a slow subscriber from building up a backlog.
+    """
+
+    def __init__(self, bus, channel):
+        self.bus = bus
+        self.channel = channel
+        self._event = threading.Event()
+
+    def notify(self):
+        self._event.set()
+
+    def wait(self, timeout=None):
+        """True if the channel was published to since the last wait, False on timeout"""
+        fired = self._event.wait(timeout)
+        self._event.clear()
+        return fired
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventBus:
+    """In-process pub/sub: a publish wakes every subscriber on that channel in this process"""
+
+    def __init__(self):
+        self._channels = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def publish(self, channel):
+        self._wake(channel)
+
+    def stats(self):
+        with self._lock:
+            return {'channels': len(self._channels),
+                    'subscribers': sum(len(s) for s in self._channels.values())}
+
+    def _wake(self, channel):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.notify()
+
+
+class RedisEventBus(EventBus):
+    """Pub/sub across processes through Redis.
+
+    Publishes go to Redis, and one listener thread per process receives
+    every channel under `prefix` and wakes the local subscribers. `client`
+    is a redis-py client, or anything with the same publish() and
+    pubsub() methods (fakeredis, or a small stand-in in tests).
+    """
+
+    def __init__(self, client, prefix='notes:', reconnect_delay=1.0):
+        super().__init__()
+        self.client = client
+        self.prefix = prefix
+        self.reconnect_delay = reconnect_delay
+        self._listener = threading.Thread(target=self._listen, name='event-bus-redis', daemon=True)
+        self._listener.start()
+
+    def publish(self, channel):
+        try:
+            self.client.publish(channel, '')
+        except Exception as e:
+            # Subscribers in this process can still be told
+            print(f"Error publishing to Redis: {e}")
+            self._wake(channel)
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f'{self.prefix}*')
+                for message in pubsub.listen():
+                    if message['type'] in ('message', 'pmessage'):
+                        channel = message['channel']
+                        if isinstance(channel, bytes):
+                            channel = channel.decode('utf-8')
+                        self._wake(channel)
+            except Exception as e:
+                print(f"Event bus lost its Redis connection, reconnecting: {e}")
+            time.sleep(self.reconnect_delay)
+
+
+def create_event_bus():
+    """In-process bus, or a Redis-backed one when EVENT_BUS_URL is set (needs the redis package)"""
+    url = os.getenv('EVENT_BUS_URL')
+    if not url:
+        return EventBus()
+    import redis
+    return RedisEventBus(redis.Redis.from_url(url))
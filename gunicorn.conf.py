@@ -0,0 +1,36 @@
+"""Gunicorn settings, sized from the CPU count. Each can be overridden from the environment.
+
+Requests mostly wait on the database or the summary model, so workers
+are threaded (gthread) and get several threads per core. Open
+Server-Sent Events feeds are long-lived, so each worker gets
+EVENTS_MAX_FEEDS threads for them on top of GUNICORN_THREADS. The live change feed, the response cache and
+the summary job queue live in each worker process, so more than one
+worker is only started by default when EVENT_BUS_URL points the feeds
+at a shared Redis; otherwise set WEB_CONCURRENCY explicitly.
+"""
+import multiprocessing
+import os
+
+cpus = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+default_workers = min(2 * cpus + 1, 9) if os.getenv('EVENT_BUS_URL') else 1
+workers = int(os.getenv('WEB_CONCURRENCY', default_workers))
+# A single worker gets more threads to make up for being alone
+request_threads = int(os.getenv('GUNICORN_THREADS', max(8, min(4 * cpus, 32) if workers == 1 else 2 * cpus)))
+# Live change feeds hold their thread for minutes, so they get threads of
+# their own on top; app.py caps open feeds at this many per worker
+feed_threads = int(os.getenv('EVENTS_MAX_FEEDS', request_threads))
+os.environ['EVENTS_MAX_FEEDS'] = str(feed_threads)
+threads = request_threads + feed_threads
+
+# Time the worker may go without a heartbeat; open streams send keepalives
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+# One pooled database connection per request thread; feeds only borrow one
+# briefly between waits, and overflow covers them and the background
+# summary and embedding workers. Read by db_engine in each worker.
+os.environ.setdefault('DB_POOL_SIZE', str(request_threads))
@@ -0,0 +1,46 @@
+import argparse
+import os
+import sys
+
+from app import app, User, embed_missing_notes, import_note_records
+from note_storage import open_storage
+from note_transfer import iter_json_records
+
+def import_file(user_id, path):
+    """Import a desktop notes store or an NDJSON/JSON export"""
+    if os.path.exists(f"{path}.log"):
+        # A desktop store: recent adds, edits and deletes are only in the log
+        # until it's compacted, so read it the way the desktop app does
+        return import_note_records(user_id, open_storage(path, 'log').load(), enqueue=False)
+    with open(path, 'rb') as file:
+        return import_note_records(user_id, iter_json_records(file), enqueue=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Import notes from a desktop notes.json or an NDJSON export")
+    parser.add_argument('path', nargs='?', default='notes.json', help="File to import (default: notes.json)")
+    parser.add_argument('--user', required=True, help="Username that will own the imported notes")
+    args = parser.parse_args()
+
+    with app.app_context():
+        user = User.query.filter_by(username=args.user).first()
+        if user is None:
+            print(f"User '{args.user}' not found")
+            sys.exit(1)
+
+        # Summaries are left pending for backfill_summaries.py (or "summarize all" in
+        # the web app); embeddings are local and cheap, so they're computed here
+        result = import_file(user.id, args.path)
+        after_id = 0
+        while after_id is not None:
+            after_id = embed_missing_notes(after_id, user_id=user.id, update_index=False)
+
+    print(f"Imported {result['imported']} notes for {args.user}")
+    if result['imported']:
+        print("Run backfill_summaries.py to summarize notes imported without a summary")
+    for error in result['errors']:
+        print(f"  {error}")
+    if not result['complete']:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
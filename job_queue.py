@@ -0,0 +1,95 @@
+import os
+import queue
+import random
+import threading
+
+
+class JobQueue:
+    """In-process background job queue with a fixed pool of worker threads.
+
+    Handlers are registered per job kind and run inside an application
+    context, so they can use the database session like a normal request.
+    A handler that raises is retried with exponential backoff until
+    `max_retries` is reached, at which point the kind's failure callback
+    (if any) is called.
+    """
+
+    def __init__(self, app, workers=2, max_retries=3, backoff=2.0, max_backoff=60.0):
+        self.app = app
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._handlers = {}
+        self._queue = queue.Queue()
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def register(self, kind, handler, on_failure=None):
+        """Register the handler (and optional give-up callback) for a job kind"""
+        self._handlers[kind] = (handler, on_failure)
+
+    def enqueue(self, kind, *args, attempt=0):
+        """Queue a job; worker threads are started on first use"""
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        self._ensure_started()
+        self._queue.put((kind, args, attempt))
+
+    def pending(self):
+        """Approximate number of jobs waiting to be picked up"""
+        return self._queue.qsize()
+
+    def _ensure_started(self):
+        # Threads don't survive a fork, so gunicorn workers each start their own pool
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            self._threads = []
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            kind, args, attempt = self._queue.get()
+            try:
+                self._process(kind, args, attempt)
+            finally:
+                self._queue.task_done()
+
+    def _process(self, kind, args, attempt):
+        handler, on_failure = self._handlers[kind]
+        try:
+            with self.app.app_context():
+                handler(*args)
+        except Exception as e:
+            if attempt < self.max_retries:
+                delay = self._retry_delay(attempt)
+                print(f"Job {kind}{args} failed ({e}), retrying in {delay:.1f}s")
+                timer = threading.Timer(delay, self._queue.put, args=((kind, args, attempt + 1),))
+                timer.daemon = True
+                timer.start()
+            else:
+                print(f"Job {kind}{args} failed after {attempt + 1} attempts: {e}")
+                if on_failure:
+                    self._call_on_failure(kind, on_failure, args)
+
+    def _call_on_failure(self, kind, on_failure, args):
+        # An error here must not take the worker thread down with it
+        try:
+            with self.app.app_context():
+                on_failure(*args)
+        except Exception as e:
+            print(f"Failure callback for job {kind}{args} raised: {e}")
+
+    def _retry_delay(self, attempt):
+        # Exponential backoff with jitter so retries from many workers don't line up
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
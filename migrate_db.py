@@ -1,31 +1,306 @@
-from app import app, db, Note
-from sqlalchemy import text
+"""Versioned schema migrations for SQLite and Postgres.
 
-def migrate():
+Usage: python migrate_db.py [--status] [--batch-size N] [--pause SECONDS]
+
+Applied versions are recorded in `schema_migrations`, so each step runs
+once per database and new steps are picked up on the next run. Every
+step also checks the live schema first, which makes databases upgraded
+by the old migrate_db.py safe to run through it. Data backfills run in
+short batched transactions and save their position with each batch in
+`schema_backfill`, so an interrupted run continues where it stopped.
+On Postgres, DDL gives up after --lock-timeout instead of queueing
+behind long transactions, and indexes are built CONCURRENTLY.
+"""
+import argparse
+import sys
+import time
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError
+
+from app import app, db, ORDER_GAP
+from search_index import PG_DOCUMENT, SearchIndex
+
+MIGRATIONS = []
+
+
+def migration(version, name):
+    def register(fn):
+        MIGRATIONS.append((version, name, fn))
+        return fn
+    return register
+
+
+def quote(name):
+    # "user" and "order" are reserved words
+    return f'"{name}"'
+
+
+class Migrator:
+    """Dialect-aware schema and batched backfill helpers for the migration steps"""
+
+    def __init__(self, engine, batch_size=5000, pause=0.0, lock_timeout_ms=5000):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.pause = pause
+        self.lock_timeout_ms = lock_timeout_ms
+
+    @property
+    def dialect(self):
+        return self.engine.dialect.name
+
+    def execute(self, sql, **params):
+        with self.engine.begin() as conn:
+            return conn.execute(text(sql), params)
+
+    def ddl(self, sql):
+        """Run one DDL statement, failing fast on Postgres if the table is busy"""
+        with self.engine.begin() as conn:
+            if self.dialect == 'postgresql':
+                conn.execute(text(f"SET LOCAL lock_timeout = {int(self.lock_timeout_ms)}"))
+            conn.execute(text(sql))
+
+    def has_column(self, table, column):
+        return column in {c['name'] for c in inspect(self.engine).get_columns(table)}
+
+    def add_column(self, table, column, type_, extra=''):
+        """Add a column unless it exists; returns True if it was added"""
+        if self.has_column(table, column):
+            print(f"  {table}.{column} already exists")
+            return False
+        type_sql = type_.compile(dialect=self.engine.dialect)
+        self.ddl(f"ALTER TABLE {quote(table)} ADD COLUMN {quote(column)} {type_sql} {extra}".rstrip())
+        print(f"  added {table}.{column}")
+        return True
+
+    def create_index(self, name, table, columns_sql, using=''):
+        """Create an index if missing, without blocking writes on Postgres"""
+        if self.dialect != 'postgresql':
+            self.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {quote(table)} {using} ({columns_sql})")
+            return
+        with self.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            valid = conn.execute(text(
+                "SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+                "WHERE c.relname = :name"), {'name': name}).scalar()
+            if valid is False:
+                # Left behind by an interrupted concurrent build
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+            # Large builds outlast the app's DB_STATEMENT_TIMEOUT_MS; RESET restores it
+            conn.execute(text("SET statement_timeout = 0"))
+            try:
+                conn.execute(text(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {quote(table)} {using} ({columns_sql})"))
+            finally:
+                conn.execute(text("RESET statement_timeout"))
+
+    def backfill_by_id(self, name, sql, table='note'):
+        """Run `sql` over id ranges `:start < id <= :end` of `table`, batch_size ids at a time"""
+        position = self._progress(name)
+        top = self.execute(f"SELECT MAX(id) FROM {quote(table)}").scalar() or 0
+        while position < top:
+            end = position + self.batch_size
+            with self.engine.begin() as conn:
+                conn.execute(text(sql), {'start': position, 'end': end})
+                self._save_progress(conn, name, end)
+            position = end
+            print(f"  {name}: {min(position, top)}/{top} ids")
+            time.sleep(self.pause)
+
+    def backfill_by_user(self, name, sql):
+        """Run `sql` over whole users `:after < user_id <= :upto`, about batch_size notes at a time"""
+        after = self._progress(name)
+        while True:
+            counts = self.execute(
+                "SELECT user_id, COUNT(*) FROM note WHERE user_id > :after "
+                "GROUP BY user_id ORDER BY user_id LIMIT 1000", after=after).all()
+            if not counts:
+                return
+            total, upto = 0, after
+            for user_id, count in counts:
+                upto, total = user_id, total + count
+                if total >= self.batch_size:
+                    break
+            with self.engine.begin() as conn:
+                conn.execute(text(sql), {'after': after, 'upto': upto})
+                self._save_progress(conn, name, upto)
+            after = upto
+            print(f"  {name}: users up to {upto} ({total} notes in batch)")
+            time.sleep(self.pause)
+
+    def _progress(self, name):
+        position = self.execute("SELECT position FROM schema_backfill WHERE name = :name", name=name).scalar()
+        if position:
+            print(f"  {name}: resuming after {position}")
+        return position or 0
+
+    def _save_progress(self, conn, name, position):
+        updated = conn.execute(text("UPDATE schema_backfill SET position = :position WHERE name = :name"),
+                               {'name': name, 'position': position})
+        if not updated.rowcount:
+            conn.execute(text("INSERT INTO schema_backfill (name, position) VALUES (:name, :position)"),
+                         {'name': name, 'position': position})
+
+
+@migration(1, 'create missing tables')
+def create_tables(m):
+    db.create_all()
+
+
+@migration(2, 'note order')
+def note_order(m):
+    m.add_column('note', 'order', db.Integer())
+    # Built before the backfill so each batch's per-user lookups use an index
+    # instead of scanning the table (migration 3 then finds it in place)
+    m.create_index('ix_note_user_order', 'note', 'user_id, "order"')
+    # Notes without a position go on top, newest first, above any the user
+    # has already ordered; each user's notes are numbered in one window pass
+    m.backfill_by_user('note_order', f"""
+        UPDATE note SET "order" = ranked.position
+        FROM (
+            SELECT pending.id, COALESCE(bounds.top, 0) - pending.rn * {ORDER_GAP} AS position
+            FROM (
+                SELECT id, user_id,
+                       ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY created_at, id) AS rn
+                FROM note
+                WHERE "order" IS NULL AND user_id > :after AND user_id <= :upto
+            ) AS pending
+            LEFT JOIN (
+                SELECT user_id, MIN("order") AS top
+                FROM note
+                WHERE "order" IS NOT NULL AND user_id > :after AND user_id <= :upto
+                GROUP BY user_id
+            ) AS bounds ON bounds.user_id = pending.user_id
+        ) AS ranked
+        WHERE note.id = ranked.id
+    """)
+
+
+@migration(3, 'note listing indexes')
+def note_indexes(m):
+    m.create_index('ix_note_user_category_created', 'note', 'user_id, category, created_at')
+    m.create_index('ix_note_user_order', 'note', 'user_id, "order"')
+
+
+@migration(4, 'summary status')
+def summary_status(m):
+    m.add_column('note', 'summary_status', db.String(20))
+    # Existing notes were summarized synchronously, so they're done
+    m.backfill_by_id('summary_status', """
+        UPDATE note SET summary_status = 'done'
+        WHERE summary_status IS NULL AND id > :start AND id <= :end
+    """)
+
+
+@migration(5, 'summary change tracking')
+def summary_change_tracking(m):
+    # Unknown for existing summaries; the first edit is measured against the previous content
+    m.add_column('note', 'summary_hash', db.String(64))
+    m.add_column('note', 'summary_drift', db.Float(), 'DEFAULT 0')
+    m.backfill_by_id('summary_drift', """
+        UPDATE note SET summary_drift = 0
+        WHERE summary_drift IS NULL AND id > :start AND id <= :end
+    """)
+
+
+@migration(6, 'note embeddings')
+def note_embeddings(m):
+    # The web app embeds notes without one in batches, in one process, once it serves a request
+    m.add_column('note', 'embedding', db.LargeBinary())
+
+
+@migration(7, 'notes version')
+def notes_version(m):
+    # A constant default fills existing rows without rewriting the table on Postgres 11+
+    m.add_column('user', 'notes_version', db.Integer(), 'NOT NULL DEFAULT 0')
+    # Existing notes all count as changed before the first sync
+    m.add_column('note', 'version', db.Integer(), 'NOT NULL DEFAULT 0')
+    m.create_index('ix_note_user_version', 'note', 'user_id, version')
+
+
+@migration(8, 'full-text search index')
+def full_text_index(m):
+    if m.dialect == 'postgresql':
+        m.create_index('ix_note_fts', 'note', f"({PG_DOCUMENT})", using='USING GIN')
+    else:
+        SearchIndex(db).install()
+
+
+@migration(9, 'tombstone pruning')
+def tombstone_pruning(m):
+    m.add_column('user', 'tombstone_horizon', db.Integer(), 'NOT NULL DEFAULT 0')
+    m.add_column('note_tombstone', 'created_at', db.DateTime())
+    # Existing tombstones start their retention period now
+    m.backfill_by_id('tombstone_created_at', """
+        UPDATE note_tombstone SET created_at = CURRENT_TIMESTAMP
+        WHERE created_at IS NULL AND id > :start AND id <= :end
+    """, table='note_tombstone')
+
+
+@migration(10, 'summary claim lease')
+def summary_claim_lease(m):
+    # Notes already 'running' have no claim time, so they count as expired
+    m.add_column('note', 'summary_claimed_at', db.DateTime())
+
+
+@migration(11, 'embeddings version')
+def embeddings_version(m):
+    m.add_column('user', 'embeddings_version', db.Integer(), 'NOT NULL DEFAULT 0')
+    # The job_lease table
+    db.create_all()
+
+
+def ensure_bookkeeping(m):
+    m.execute("""CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name VARCHAR(200) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""")
+    m.execute("""CREATE TABLE IF NOT EXISTS schema_backfill (
+        name VARCHAR(100) PRIMARY KEY,
+        position BIGINT NOT NULL
+    )""")
+
+
+def migrate(batch_size=5000, pause=0.0, lock_timeout_ms=5000, status_only=False):
     with app.app_context():
-        with db.engine.connect() as conn:
-            # Check if order column exists
-            result = conn.execute(text("PRAGMA table_info(note)"))
-            columns = [row[1] for row in result]
-            
-            if 'order' not in columns:
-                # Add order column
-                conn.execute(text("ALTER TABLE note ADD COLUMN \"order\" INTEGER"))
-                
-                # Set initial order based on created_at
-                conn.execute(text("""
-                    UPDATE note 
-                    SET "order" = (
-                        SELECT COUNT(*) 
-                        FROM note AS n2 
-                        WHERE n2.created_at <= note.created_at
-                    ) - 1
-                """))
-                
-                conn.commit()
-                print("Migration completed successfully!")
-            else:
-                print("Order column already exists.")
+        m = Migrator(db.engine, batch_size, pause, lock_timeout_ms)
+        ensure_bookkeeping(m)
+        applied = {version for (version,) in m.execute("SELECT version FROM schema_migrations")}
+        pending = [step for step in sorted(MIGRATIONS) if step[0] not in applied]
+
+        if status_only:
+            for version, name, _ in sorted(MIGRATIONS):
+                print(f"{version:>4}  {'applied' if version in applied else 'pending':<8} {name}")
+            return
+
+        if not pending:
+            print("Database is up to date.")
+            return
+        for version, name, step in pending:
+            print(f"Migration {version}: {name}")
+            started = time.perf_counter()
+            step(m)
+            m.execute("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)",
+                      version=version, name=name)
+            print(f"  done in {time.perf_counter() - started:.1f}s")
+        print("Migration completed successfully!")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations")
+    parser.add_argument('--status', action='store_true', help="List migrations and whether they've run")
+    parser.add_argument('--batch-size', type=int, default=5000, help="Rows per backfill transaction (default: 5000)")
+    parser.add_argument('--pause', type=float, default=0.0,
+                        help="Seconds to sleep between backfill batches, to leave room for live traffic")
+    parser.add_argument('--lock-timeout', type=int, default=5000,
+                        help="Postgres: milliseconds DDL may wait for a table lock (default: 5000)")
+    args = parser.parse_args()
+    try:
+        migrate(args.batch_size, args.pause, args.lock_timeout, args.status)
+    except OperationalError as e:
+        print(f"Migration stopped, run it again to resume: {e}")
+        sys.exit(1)
+
 
 if __name__ == '__main__':
-    migrate() 
\ No newline at end of file
+    main()
@@ -0,0 +1,84 @@
+class NoteRecord:
+    """A desktop note; uses __slots__ so large collections stay compact in memory"""
+    __slots__ = ('id', 'title', 'content', 'timestamp')
+
+    def __init__(self, id, title, content, timestamp):
+        self.id = id
+        self.title = title
+        self.content = content
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['id'], data['title'], data['content'], data['timestamp'])
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'content': self.content,
+            'timestamp': self.timestamp
+        }
+
+
+class NoteCollection:
+    """Notes indexed by id, iterated in display order.
+
+    Lookup, add and delete are O(1). New ids come from a counter that only
+    moves forward; pass the storage's `next_id` to carry it across
+    restarts, so an id is never handed out twice.
+    """
+
+    def __init__(self, notes=(), next_id=1):
+        # dicts keep insertion order, which doubles as the display order
+        self._by_id = {}
+        self._next_id = next_id
+        for data in notes:
+            self.insert(NoteRecord.from_dict(data))
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def __contains__(self, note_id):
+        return note_id in self._by_id
+
+    def get(self, note_id):
+        return self._by_id.get(note_id)
+
+    def add(self, title, content, timestamp):
+        """Create a note with the next free id and append it"""
+        note = NoteRecord(self._next_id, title, content, timestamp)
+        self.insert(note)
+        return note
+
+    def insert(self, note):
+        """Add an existing record, keeping the id allocator ahead of it"""
+        if note.id in self._by_id:
+            raise ValueError(f"Duplicate note id {note.id}")
+        self._by_id[note.id] = note
+        self._next_id = max(self._next_id, note.id + 1)
+
+    def remove(self, note_id):
+        """Remove and return a note, or None if there's no such id"""
+        return self._by_id.pop(note_id, None)
+
+    def move(self, note_id, before_id=None):
+        """Move a note in the display order to just before `before_id` (or the end)"""
+        note = self._by_id.pop(note_id)
+        if before_id is None:
+            self._by_id[note_id] = note
+            return
+        reordered = {}
+        for other_id, other in self._by_id.items():
+            if other_id == before_id:
+                reordered[note_id] = note
+            reordered[other_id] = other
+        reordered.setdefault(note_id, note)
+        self._by_id = reordered
+
+    def dicts(self):
+        """Lazily serialize every note, for writing a storage snapshot"""
+        return (note.to_dict() for note in self._by_id.values())
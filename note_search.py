@@ -0,0 +1,41 @@
+class IncrementalSearch:
+    """Case-insensitive substring search over desktop notes that reuses work between keystrokes.
+
+    Each note's lowercased title and content are cached once, not on
+    every search. When a query contains the previous query (the user kept
+    typing), only the previous matches can still match, so only those
+    are rechecked.
+    """
+
+    def __init__(self, notes=()):
+        self._text = {}
+        self._last_query = None
+        self._last_matches = None
+        for note in notes:
+            self.update(note)
+
+    def update(self, note):
+        """Index a new or edited note"""
+        self._text[note.id] = f"{note.title}\0{note.content}".lower()
+        self._last_query = None
+
+    def remove(self, note_id):
+        self._text.pop(note_id, None)
+        self._last_query = None
+
+    def invalidate(self):
+        """Forget the previous results, e.g. after the display order changed"""
+        self._last_query = None
+
+    def search(self, query, notes):
+        """Ids of the notes matching `query`, in the collection's display order"""
+        query = query.lower()
+        if not query:
+            matches = [note.id for note in notes]
+        elif self._last_query is not None and self._last_query in query:
+            matches = [note_id for note_id in self._last_matches if query in self._text[note_id]]
+        else:
+            matches = [note.id for note in notes if query in self._text[note.id]]
+        self._last_query = query
+        self._last_matches = matches
+        return matches
@@ -0,0 +1,293 @@
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import datetime
+
+
+def atomic_write_json(filename, data):
+    """Write JSON to a temp file and rename it over `filename`.
+
+    The rename is atomic, so readers (and a crash at any point) see either
+    the old file or the new one, never a half-written mix.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_path = tempfile.mkstemp(prefix='.notes-', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as file:
+            json.dump(data, file, indent=4)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, filename)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def next_id_after(notes):
+    return max((note['id'] for note in notes), default=0) + 1
+
+
+def quarantine(filename):
+    """Move an unreadable file aside instead of letting the next save overwrite it"""
+    backup = f"{filename}.corrupt-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    os.replace(filename, backup)
+    print(f"Could not read {filename}; moved it to {backup}")
+
+
+class JsonStorage:
+    """The original format: the whole notes list in one JSON file.
+
+    Every change rewrites the file, but it's done atomically. `next_id` is
+    one past the highest id ever stored, including deleted notes; when
+    that's higher than the snapshot shows, it's kept in `<filename>.meta`
+    so the snapshot stays a plain list older versions can read.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.meta_filename = f"{filename}.meta"
+        self.next_id = 1
+
+    def load(self):
+        """Return the stored notes as a list of dicts"""
+        notes = list(self._read_snapshot().values())
+        self.next_id = max(self._read_next_id(), next_id_after(notes))
+        return notes
+
+    def put(self, note, notes):
+        """Persist an added or edited note dict.
+
+        `notes` is every note dict after the change; it may be a lazy
+        iterable, and is only consumed when a full snapshot is written.
+        """
+        self.next_id = max(self.next_id, note['id'] + 1)
+        self.save_all(notes)
+
+    def delete(self, note_id, notes):
+        """Persist a deletion; `notes` is every remaining note dict"""
+        self.next_id = max(self.next_id, note_id + 1)
+        self.save_all(notes)
+
+    def apply_changes(self, changed, deleted_ids, notes):
+        """Persist a batch of edited notes and deletions in one write"""
+        self.next_id = max(self.next_id, next_id_after(changed), max(deleted_ids, default=0) + 1)
+        self.save_all(notes)
+
+    def save_all(self, notes):
+        notes = list(notes)
+        self.next_id = max(self.next_id, next_id_after(notes))
+        if self.next_id > next_id_after(notes):
+            # Written first: a crash in between only skips ids, never reuses them
+            atomic_write_json(self.meta_filename, {'next_id': self.next_id})
+        atomic_write_json(self.filename, notes)
+
+    def _read_next_id(self):
+        if not os.path.exists(self.meta_filename):
+            return 1
+        try:
+            with open(self.meta_filename, 'r') as file:
+                return json.load(file)['next_id']
+        except (json.JSONDecodeError, KeyError):
+            quarantine(self.meta_filename)
+            return 1
+
+    def _read_snapshot(self):
+        if not os.path.exists(self.filename):
+            return {}
+        try:
+            with open(self.filename, 'r') as file:
+                notes = json.load(file)
+        except json.JSONDecodeError:
+            quarantine(self.filename)
+            return {}
+
+        # Older versions numbered notes len(notes) + 1, which repeats ids after
+        # a delete; give repeats fresh ids rather than silently merging them
+        by_id = {}
+        next_id = max((note['id'] for note in notes), default=0) + 1
+        for note in notes:
+            if note['id'] in by_id:
+                note['id'] = next_id
+                next_id += 1
+            by_id[note['id']] = note
+        return by_id
+
+
+class AppendLogStorage(JsonStorage):
+    """notes.json snapshot plus an append-only log of changes since it was written.
+
+    Each put/delete appends one line to `<filename>.log`, so a change costs
+    O(1) I/O however many notes there are. Once the log holds
+    `compact_every` operations it's folded into a fresh snapshot. The
+    snapshot stays in the original notes.json format, so older versions of
+    the app can still read it after a compaction.
+    """
+
+    def __init__(self, filename, compact_every=1000, fsync=True):
+        super().__init__(filename)
+        self.log_filename = f"{filename}.log"
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self._log_ops = 0
+
+    def load(self):
+        notes = self._read_snapshot()
+        self._log_ops = 0
+        # Deleted ids stay reserved: the log still names them
+        log_next_id = 1
+        if os.path.exists(self.log_filename):
+            good_end = 0
+            with open(self.log_filename, 'rb') as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        # A crash mid-append leaves at most one partial line at the end
+                        break
+                    if entry['op'] == 'put':
+                        notes[entry['note']['id']] = entry['note']
+                        log_next_id = max(log_next_id, entry['note']['id'] + 1)
+                    elif entry['op'] == 'delete':
+                        notes.pop(entry['id'], None)
+                        log_next_id = max(log_next_id, entry['id'] + 1)
+                    self._log_ops += 1
+                    good_end += len(line)
+            self._repair_log(good_end)
+        notes = list(notes.values())
+        self.next_id = max(self._read_next_id(), next_id_after(notes), log_next_id)
+        if self._log_ops >= self.compact_every:
+            self.save_all(notes)
+        return notes
+
+    def put(self, note, notes):
+        self.next_id = max(self.next_id, note['id'] + 1)
+        self._append([{'op': 'put', 'note': note}], notes)
+
+    def delete(self, note_id, notes):
+        self.next_id = max(self.next_id, note_id + 1)
+        self._append([{'op': 'delete', 'id': note_id}], notes)
+
+    def apply_changes(self, changed, deleted_ids, notes):
+        """Append a batch of changes with a single write and fsync"""
+        self.next_id = max(self.next_id, next_id_after(changed), max(deleted_ids, default=0) + 1)
+        self._append([{'op': 'delete', 'id': note_id} for note_id in deleted_ids] +
+                     [{'op': 'put', 'note': note} for note in changed], notes)
+
+    def save_all(self, notes):
+        """Write a full snapshot and start a new, empty log"""
+        super().save_all(notes)
+        # Safe to truncate only after the snapshot is in place; replaying the
+        # old log over the new snapshot would just reapply the same changes
+        open(self.log_filename, 'w').close()
+        self._log_ops = 0
+
+    def _repair_log(self, good_end):
+        """Cut a torn last line off the log so the next append starts on a line of its own"""
+        with open(self.log_filename, 'rb+') as file:
+            size = file.seek(0, os.SEEK_END)
+            repaired = good_end < size
+            if repaired:
+                print(f"Dropping {size - good_end} bytes of an incomplete change from {self.log_filename}")
+                file.truncate(good_end)
+            if good_end:
+                file.seek(good_end - 1)
+                if file.read(1) != b'\n':
+                    # The crash came after the record but before its newline
+                    file.seek(good_end)
+                    file.write(b'\n')
+                    repaired = True
+            if repaired:
+                file.flush()
+                os.fsync(file.fileno())
+
+    def _append(self, entries, notes):
+        if not entries:
+            return
+        with open(self.log_filename, 'a') as file:
+            file.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+            file.flush()
+            if self.fsync:
+                os.fsync(file.fileno())
+        self._log_ops += len(entries)
+        if self._log_ops >= self.compact_every:
+            self.save_all(notes)
+
+
+class SQLiteStorage:
+    """Notes stored as one row per note in a SQLite database.
+
+    The id allocator's high-water mark is kept in the `meta` table, so
+    deleting the newest note doesn't free its id.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.next_id = 1
+        self.conn = sqlite3.connect(filename)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS notes (id INTEGER PRIMARY KEY, data TEXT NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.conn.commit()
+
+    def load(self):
+        notes = [json.loads(data) for (data,) in self.conn.execute("SELECT data FROM notes ORDER BY id")]
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()
+        self.next_id = max(row[0] if row else 1, next_id_after(notes))
+        return notes
+
+    def put(self, note, notes=None):
+        self.next_id = max(self.next_id, note['id'] + 1)
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO notes (id, data) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET data = excluded.data",
+                (note['id'], json.dumps(note)))
+
+    def delete(self, note_id, notes=None):
+        self.next_id = max(self.next_id, note_id + 1)
+        with self.conn:
+            self.conn.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+            self._save_next_id()
+
+    def apply_changes(self, changed, deleted_ids, notes=None):
+        self.next_id = max(self.next_id, next_id_after(changed), max(deleted_ids, default=0) + 1)
+        with self.conn:
+            self.conn.executemany("DELETE FROM notes WHERE id = ?", [(note_id,) for note_id in deleted_ids])
+            self.conn.executemany(
+                "INSERT INTO notes (id, data) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET data = excluded.data",
+                [(note['id'], json.dumps(note)) for note in changed])
+            self._save_next_id()
+
+    def save_all(self, notes):
+        notes = list(notes)
+        self.next_id = max(self.next_id, next_id_after(notes))
+        with self.conn:
+            self.conn.execute("DELETE FROM notes")
+            self.conn.executemany("INSERT INTO notes (id, data) VALUES (?, ?)",
+                                  [(note['id'], json.dumps(note)) for note in notes])
+            self._save_next_id()
+
+    def _save_next_id(self):
+        self.conn.execute("INSERT INTO meta (key, value) VALUES ('next_id', ?) "
+                          "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (self.next_id,))
+
+
+def open_storage(filename="notes.json", backend=None):
+    """Open the notes store; NOTES_STORAGE picks 'log' (default), 'json' or 'sqlite'"""
+    backend = backend or os.getenv('NOTES_STORAGE', 'log')
+    if backend == 'json':
+        return JsonStorage(filename)
+    if backend == 'sqlite':
+        storage = SQLiteStorage(os.path.splitext(filename)[0] + '.sqlite3')
+        # First run on SQLite: bring over the notes from the JSON files
+        if not storage.load():
+            legacy = AppendLogStorage(filename)
+            existing = legacy.load()
+            if existing:
+                storage.next_id = legacy.next_id
+                storage.save_all(existing)
+        return storage
+    if backend == 'log':
+        return AppendLogStorage(filename)
+    raise ValueError(f"Unknown storage backend: {backend}")
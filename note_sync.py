@@ -0,0 +1,152 @@
+import argparse
+import getpass
+import json
+import os
+import sys
+import time
+
+import requests
+
+from note_storage import atomic_write_json, open_storage
+
+
+class SyncError(Exception):
+    pass
+
+
+def desktop_note(note):
+    """Server note dict in the desktop format, keeping the web-only fields alongside"""
+    return {
+        'id': note['id'],
+        'title': note['title'],
+        'content': note['content'],
+        'timestamp': note['created_at'],
+        'category': note.get('category'),
+        'summary': note.get('summary'),
+        'updated_at': note.get('updated_at'),
+    }
+
+
+class NoteSyncClient:
+    """Keeps a local copy of a user's web notes current through /notes/changes.
+
+    Notes are kept with the desktop storage backends, keyed by their
+    server ids, and the sync token is saved in `<filename>.sync`, so the
+    copy stays readable offline and each pull only downloads what changed.
+    Sync is one way: edits are made in the web app.
+    """
+
+    def __init__(self, server, filename='synced_notes.json', timeout=30):
+        self.server = server.rstrip('/')
+        self.filename = filename
+        self.state_filename = f"{filename}.sync"
+        self.timeout = timeout
+        self.http = requests.Session()
+        self.storage = open_storage(filename)
+        self.notes = {note['id']: note for note in self.storage.load()}
+        self.token = self._load_token()
+
+    def login(self, username, password):
+        response = self.http.post(f"{self.server}/login", data={'username': username, 'password': password},
+                                  allow_redirects=False, timeout=self.timeout)
+        if response.status_code != 302:
+            raise SyncError("Login failed: check the username and password")
+
+    def pull(self, page_size=500):
+        """Apply every change since the last pull; returns (changed, deleted) counts.
+
+        Each page of changes is written to storage as one batch. A full
+        download is collected in memory and written as a single snapshot,
+        together with its token, once the last page has arrived; if it's
+        interrupted, the next pull starts it over.
+        """
+        changed = deleted = 0
+        token = self.token
+        notes = self.notes if token else {}
+        while True:
+            params = {'limit': page_size}
+            if token:
+                params['since'] = token
+            response = self.http.get(f"{self.server}/notes/changes", params=params,
+                                     allow_redirects=False, timeout=self.timeout)
+            if response.status_code == 302:
+                raise SyncError("Not logged in")
+            if response.status_code == 400 and token:
+                # The server doesn't recognise our token (e.g. its database was restored)
+                print(f"Starting a full sync: {response.json().get('error')}")
+                self.reset()
+                token, notes = None, {}
+                continue
+            response.raise_for_status()
+            page = response.json()
+
+            deleted_ids = [note_id for note_id in page['deleted'] if notes.pop(note_id, None) is not None]
+            page_notes = [desktop_note(note) for note in page['notes']]
+            for note in page_notes:
+                notes[note['id']] = note
+            changed += len(page_notes)
+            deleted += len(deleted_ids)
+
+            if self.token:
+                self.storage.apply_changes(page_notes, deleted_ids, notes.values())
+                self.token = page['token']
+                self._save_token()
+            token = page['token']
+            if not page['more']:
+                if not self.token:
+                    self.storage.save_all(notes.values())
+                    self.notes, self.token = notes, token
+                    self._save_token()
+                return changed, deleted
+
+    def reset(self):
+        """Forget the local copy and the token, so the next pull downloads everything"""
+        self.notes = {}
+        self.storage.save_all([])
+        self.token = None
+        self._save_token()
+
+    def _load_token(self):
+        if not os.path.exists(self.state_filename):
+            return None
+        with open(self.state_filename, 'r') as file:
+            state = json.load(file)
+        # A token is only meaningful to the server that issued it
+        return state.get('token') if state.get('server') == self.server else None
+
+    def _save_token(self):
+        atomic_write_json(self.state_filename, {'server': self.server, 'token': self.token})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep a local copy of your web notes in sync")
+    parser.add_argument('--server', default=os.getenv('NOTES_SERVER', 'http://127.0.0.1:5000'))
+    parser.add_argument('--user', required=True, help="Web app username")
+    parser.add_argument('--file', default='synced_notes.json', help="Local notes file (default: synced_notes.json)")
+    parser.add_argument('--watch', type=float, metavar='SECONDS',
+                        help="Keep running and pull again every SECONDS")
+    args = parser.parse_args()
+
+    password = os.getenv('NOTES_PASSWORD') or getpass.getpass(f"Password for {args.user}: ")
+    client = NoteSyncClient(args.server, args.file)
+    try:
+        client.login(args.user, password)
+        while True:
+            try:
+                changed, deleted = client.pull()
+                print(f"{len(client.notes)} notes: {changed} updated, {deleted} deleted")
+            except requests.RequestException as e:
+                if not args.watch:
+                    raise
+                # Offline: keep the local copy and try again next time
+                print(f"Sync failed, will retry: {e}")
+            if not args.watch:
+                break
+            time.sleep(args.watch)
+    except (SyncError, requests.RequestException) as e:
+        print(e)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
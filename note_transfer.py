@@ -0,0 +1,88 @@
+import codecs
+import json
+from datetime import datetime
+
+# Timestamp formats written by to_dict() and by the desktop apps' notes.json
+TIMESTAMP_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%S.%f")
+
+
+class TransferError(ValueError):
+    pass
+
+
+def iter_json_records(stream, chunk_size=64 * 1024):
+    """Yield objects from a stream holding NDJSON or a single JSON array.
+
+    The stream is read and decoded a chunk at a time, so memory stays
+    bounded by the largest single record rather than the whole upload.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    eof = False
+
+    while True:
+        # Skip record separators: whitespace, array brackets and commas
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,[]':
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                return
+            buffer, pos = '', 0
+        else:
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise TransferError(f"Invalid JSON near character {e.pos}: {e.msg}")
+            else:
+                yield record
+                pos = end
+                continue
+
+        chunk = stream.read(chunk_size)
+        if isinstance(chunk, bytes):
+            chunk = text.decode(chunk, final=not chunk)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def parse_timestamp(value):
+    """Parse an exported or legacy timestamp, returning None if it's missing or unknown"""
+    if not isinstance(value, str):
+        return None
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def note_fields(record):
+    """Map an export record or a legacy notes.json entry onto Note columns"""
+    if not isinstance(record, dict):
+        raise TransferError("Each note must be a JSON object")
+    title = record.get('title')
+    content = record.get('content')
+    if not isinstance(title, str) or not title.strip() or not isinstance(content, str):
+        raise TransferError("Each note needs a title and content")
+    category = record.get('category')
+    if category is not None and not isinstance(category, str):
+        raise TransferError("category must be a string")
+    summary = record.get('summary')
+    if summary is not None and not isinstance(summary, str):
+        raise TransferError("summary must be a string")
+
+    # Legacy notes only have a single 'timestamp'
+    created_at = parse_timestamp(record.get('created_at') or record.get('timestamp')) or datetime.utcnow()
+    return {
+        'title': title[:200],
+        'content': content,
+        'category': category[:50] if category else 'uncategorized',
+        'summary': summary,
+        'created_at': created_at,
+        'updated_at': parse_timestamp(record.get('updated_at')) or created_at,
+    }
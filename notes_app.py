@@ -1,38 +1,22 @@
-import os
-import json
 from datetime import datetime
+from note_collection import NoteCollection
+from note_storage import open_storage
 
 class NotesApp:
     def __init__(self):
-        self.notes = []
+        self.notes = NoteCollection()
         self.filename = "notes.json"
+        self.storage = open_storage(self.filename)
         self.load_notes()
 
     def load_notes(self):
-        """Load notes from JSON file if it exists"""
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r') as file:
-                    self.notes = json.load(file)
-            except json.JSONDecodeError:
-                print("Error reading notes file. Starting with empty notes.")
-                self.notes = []
-
-    def save_notes(self):
-        """Save notes to JSON file"""
-        with open(self.filename, 'w') as file:
-            json.dump(self.notes, file, indent=4)
+        """Load notes from storage"""
+        self.notes = NoteCollection(self.storage.load(), self.storage.next_id)
 
     def add_note(self, title, content):
         """Add a new note"""
-        note = {
-            'id': len(self.notes) + 1,
-            'title': title,
-            'content': content,
-            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        self.notes.append(note)
-        self.save_notes()
+        note = self.notes.add(title, content, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        self.storage.put(note.to_dict(), self.notes.dicts())
         print(f"Note '{title}' added successfully!")
 
     def view_notes(self):
@@ -44,28 +28,26 @@ class NotesApp:
         print("\nYour Notes:")
         print("-" * 50)
         for note in self.notes:
-            print(f"\nNote ID: {note['id']}")
-            print(f"Title: {note['title']}")
-            print(f"Created: {note['timestamp']}")
-            print(f"Content:\n{note['content']}")
+            print(f"\nNote ID: {note.id}")
+            print(f"Title: {note.title}")
+            print(f"Created: {note.timestamp}")
+            print(f"Content:\n{note.content}")
             print("-" * 50)
 
     def delete_note(self, note_id):
         """Delete a note by ID"""
-        for note in self.notes:
-            if note['id'] == note_id:
-                self.notes.remove(note)
-                self.save_notes()
-                print(f"Note {note_id} deleted successfully!")
-                return
+        if self.notes.remove(note_id) is not None:
+            self.storage.delete(note_id, self.notes.dicts())
+            print(f"Note {note_id} deleted successfully!")
+            return
         print(f"Note with ID {note_id} not found!")
 
     def search_notes(self, keyword):
         """Search notes by keyword"""
         found_notes = []
         for note in self.notes:
-            if (keyword.lower() in note['title'].lower() or 
-                keyword.lower() in note['content'].lower()):
+            if (keyword.lower() in note.title.lower() or 
+                keyword.lower() in note.content.lower()):
                 found_notes.append(note)
         
         if not found_notes:
@@ -75,10 +57,10 @@ class NotesApp:
         print(f"\nFound {len(found_notes)} matching notes:")
         print("-" * 50)
         for note in found_notes:
-            print(f"\nNote ID: {note['id']}")
-            print(f"Title: {note['title']}")
-            print(f"Created: {note['timestamp']}")
-            print(f"Content:\n{note['content']}")
+            print(f"\nNote ID: {note.id}")
+            print(f"Title: {note.title}")
+            print(f"Created: {note.timestamp}")
+            print(f"Content:\n{note.content}")
             print("-" * 50)
 
 def main():
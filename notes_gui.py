@@ -1,10 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
-import json
-import os
 from datetime import datetime
 from ttkthemes import ThemedTk
 from PIL import Image, ImageTk  # Add PIL import for handling images
+from note_collection import NoteCollection
+from note_search import IncrementalSearch
+from virtual_list import VirtualList
+from note_storage import open_storage
+
+# Delay after the last keystroke before the note list is filtered
+SEARCH_DEBOUNCE_MS = 150
+# Card height plus the vertical padding around it
+CARD_ROW_HEIGHT = 220
 
 class NotesApp:
     def __init__(self, root):
@@ -13,9 +20,13 @@ class NotesApp:
         self.root.geometry("1000x600")
         
         # Initialize notes data
-        self.notes = []
+        self.notes = NoteCollection()
         self.filename = "notes.json"
+        self.storage = open_storage(self.filename)
         self.load_notes()
+        self.search = IncrementalSearch(self.notes)
+        self._search_job = None
+        self._drag = None
         
         # Configure style
         self.style = ttk.Style()
@@ -108,56 +119,33 @@ class NotesApp:
         self.search_entry.bind('<FocusIn>', self.on_search_focus_in)
         self.search_entry.bind('<FocusOut>', self.on_search_focus_out)
 
-        # Notes container (scrollable)
+        # Notes container (scrollable); only the cards in view are real widgets
         self.canvas = tk.Canvas(self.main_content, bg='#1e1e1e', 
-                              highlightthickness=0)
+                              highlightthickness=0,
+                              yscrollincrement=CARD_ROW_HEIGHT // 4)
+        self.note_list = VirtualList(self.canvas, CARD_ROW_HEIGHT,
+                                     self.create_note_card, self.bind_note_card)
         self.scrollbar = ttk.Scrollbar(self.main_content, 
                                      orient=tk.VERTICAL, 
-                                     command=self.canvas.yview)
-        self.notes_frame = ttk.Frame(self.canvas, style='Main.TFrame')
+                                     command=self.note_list.yview)
 
         self.canvas.configure(yscrollcommand=self.scrollbar.set)
         
         # Pack scrollbar and canvas
         self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        # Create window in canvas for notes
-        self.canvas_frame = self.canvas.create_window((0, 0), 
-                                                    window=self.notes_frame, 
-                                                    anchor='nw', 
-                                                    width=self.canvas.winfo_width())
-        
-        # Configure canvas scrolling
-        self.notes_frame.bind('<Configure>', self.on_frame_configure)
-        self.canvas.bind('<Configure>', self.on_canvas_configure)
 
     def load_notes(self):
-        """Load notes from JSON file if it exists"""
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r') as file:
-                    self.notes = json.load(file)
-            except json.JSONDecodeError:
-                self.notes = []
-
-    def save_notes(self):
-        """Save notes to JSON file"""
-        with open(self.filename, 'w') as file:
-            json.dump(self.notes, file, indent=4)
-
-    def create_note_frame(self, note, parent):
-        """Create a frame for a single note"""
-        # Create main note frame with fixed width
+        """Load notes from storage"""
+        self.notes = NoteCollection(self.storage.load(), self.storage.next_id)
+
+    def create_note_card(self, parent):
+        """Create an empty note card; bind_note_card fills it in for a note"""
+        # Create main note frame; its size is set by the virtual list
         note_frame = ttk.Frame(parent, style='Note.TFrame')
-        note_frame.pack(fill=tk.X, padx=20, pady=10)
         note_frame.pack_propagate(False)  # Prevent frame from auto-resizing
-        note_frame.configure(height=200)  # Set fixed height for note cards
-        
-        # Make the frame draggable
-        note_frame.bind('<Button-1>', lambda e: self.start_drag(e, note_frame))
-        note_frame.bind('<B1-Motion>', lambda e: self.drag(e, note_frame))
-        note_frame.bind('<ButtonRelease-1>', lambda e: self.stop_drag(e, note_frame))
+        note_frame.note = None
+        note_frame.index = None
         
         # Content frame to hold all note elements
         content_frame = ttk.Frame(note_frame, style='Note.TFrame')
@@ -174,44 +162,36 @@ class NotesApp:
         category_label.pack(anchor='w', pady=(0, 10))
 
         # Title
-        title_label = ttk.Label(
+        note_frame.title_label = ttk.Label(
             content_frame,
-            text=note['title'],
             font=('Helvetica', 12, 'bold'),
             foreground='white',
             background='#333333',
             wraplength=400
         )
-        title_label.pack(anchor='w', pady=(0, 10))
+        note_frame.title_label.pack(anchor='w', pady=(0, 10))
 
-        # Content preview with ellipsis
-        content_text = note['content']
-        if len(content_text) > 100:
-            content_text = content_text[:100] + "..."
-            
-        content_label = ttk.Label(
+        note_frame.content_label = ttk.Label(
             content_frame,
-            text=content_text,
             wraplength=400,
             foreground='#cccccc',
             background='#333333',
             justify=tk.LEFT
         )
-        content_label.pack(anchor='w', pady=(0, 10))
+        note_frame.content_label.pack(anchor='w', pady=(0, 10))
 
         # Bottom frame for timestamp and buttons
         bottom_frame = ttk.Frame(content_frame, style='Note.TFrame')
         bottom_frame.pack(fill=tk.X, side=tk.BOTTOM)
 
         # Timestamp on the left
-        time_label = ttk.Label(
+        note_frame.time_label = ttk.Label(
             bottom_frame,
-            text=note['timestamp'],
             font=('Helvetica', 8),
             foreground='#888888',
             background='#333333'
         )
-        time_label.pack(side=tk.LEFT)
+        note_frame.time_label.pack(side=tk.LEFT)
 
         # Action buttons on the right
         button_frame = ttk.Frame(bottom_frame, style='Note.TFrame')
@@ -229,7 +209,7 @@ class NotesApp:
             relief=tk.FLAT,
             borderwidth=0,
             cursor='hand2',
-            command=lambda: self.edit_note(note)
+            command=lambda: self.edit_note(note_frame.note)
         )
         edit_button.pack(side=tk.LEFT, padx=2)
 
@@ -245,68 +225,72 @@ class NotesApp:
             relief=tk.FLAT,
             borderwidth=0,
             cursor='hand2',
-            command=lambda: self.delete_note(note['id'])
+            command=lambda: self.delete_note(note_frame.note.id)
         )
         delete_button.pack(side=tk.LEFT, padx=2)
 
-        # Make the note clickable for focus view
-        for widget in [note_frame, content_frame, title_label, content_label]:
-            widget.bind('<Button-1>', lambda e, n=note: self.show_note_in_focus(n))
+        # Click opens the focus view, dragging moves the note
+        for widget in [note_frame, content_frame, note_frame.title_label, note_frame.content_label]:
+            widget.bind('<Button-1>', lambda e: self.start_drag(e, note_frame))
+            widget.bind('<B1-Motion>', lambda e: self.drag(e, note_frame))
+            widget.bind('<ButtonRelease-1>', lambda e: self.stop_drag(e, note_frame))
             widget.configure(cursor='hand2')
 
+        return note_frame
+
+    def bind_note_card(self, note_frame, note, index):
+        """Show `note` in a pooled card"""
+        note_frame.note = note
+        note_frame.index = index
+        note_frame.title_label.configure(text=note.title)
+
+        # Content preview with ellipsis
+        content_text = note.content
+        if len(content_text) > 100:
+            content_text = content_text[:100] + "..."
+        note_frame.content_label.configure(text=content_text)
+        note_frame.time_label.configure(text=note.timestamp)
+
     def start_drag(self, event, widget):
         """Start dragging a note card"""
-        widget._drag_start_x = event.x
-        widget._drag_start_y = event.y
-        widget._drag_start_pos = widget.winfo_y()
-        widget.configure(style='Dragging.TFrame')
-        
+        self._drag = {'card': widget, 'note': widget.note, 'source': widget.index, 'target': widget.index}
+
     def drag(self, event, widget):
-        """Handle dragging of a note card"""
-        if hasattr(widget, '_drag_start_y'):
-            # Calculate new position
-            new_y = widget._drag_start_pos + (event.y - widget._drag_start_y)
-            
-            # Get all note frames
-            all_notes = [w for w in widget.master.winfo_children() 
-                        if isinstance(w, ttk.Frame) and w != widget]
-            
-            # Find the note we're hovering over
-            for note in all_notes:
-                note_y = note.winfo_y()
-                if abs(new_y - note_y) < 50:  # If we're close to another note
-                    # Swap positions
-                    if new_y < note_y:
-                        note.pack_forget()
-                        note.pack(fill=tk.X, padx=20, pady=10, before=widget)
-                    else:
-                        note.pack_forget()
-                        note.pack(fill=tk.X, padx=20, pady=10, after=widget)
-                    break
-            
-            # Update the dragged widget's position
-            widget.pack_forget()
-            widget.pack(fill=tk.X, padx=20, pady=10)
-            
+        """Highlight the card being dragged and track the row under the pointer"""
+        if self._drag is None:
+            return
+        self._drag['target'] = self.note_list.index_at(event.y_root)
+        style = 'Dragging.TFrame' if self._drag['target'] != self._drag['source'] else 'Note.TFrame'
+        self._drag['card'].configure(style=style)
+
     def stop_drag(self, event, widget):
-        """Stop dragging a note card"""
-        if hasattr(widget, '_drag_start_y'):
-            del widget._drag_start_x
-            del widget._drag_start_y
-            del widget._drag_start_pos
-            widget.configure(style='Note.TFrame')
-            
-    def display_notes(self, filter_text=""):
-        """Display all notes or filtered notes"""
-        # Clear existing notes
-        for widget in self.notes_frame.winfo_children():
-            widget.destroy()
-
-        # Filter and display notes
-        for note in self.notes:
-            if (filter_text.lower() in note['title'].lower() or 
-                filter_text.lower() in note['content'].lower()):
-                self.create_note_frame(note, self.notes_frame)
+        """Drop the note at the row under the pointer, or open it if it wasn't moved"""
+        if self._drag is None:
+            return
+        drag, self._drag = self._drag, None
+        drag['card'].configure(style='Note.TFrame')
+        source, target = drag['source'], drag['target']
+        if source == target:
+            self.show_note_in_focus(drag['note'])
+            return
+
+        items = self.note_list.items
+        if target > source:
+            before = items[target + 1].id if target + 1 < len(items) else None
+        else:
+            before = items[target].id
+        self.notes.move(drag['note'].id, before)
+        self.search.invalidate()
+        self.filter_notes(self.current_search())
+
+    def display_notes(self):
+        """Redraw the note list with the current search applied"""
+        self.filter_notes(self.current_search())
+
+    def filter_notes(self, search_text):
+        """Show the notes matching the search; only cards in view are rebound"""
+        matches = self.search.search(search_text, self.notes)
+        self.note_list.set_items(self.notes.get(note_id) for note_id in matches)
 
     def show_add_note_dialog(self):
         """Show dialog to add a new note"""
@@ -339,15 +323,9 @@ class NotesApp:
                 messagebox.showerror("Error", "Both title and content are required!")
                 return
 
-            note = {
-                'id': len(self.notes) + 1,
-                'title': title,
-                'content': content,
-                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-            
-            self.notes.append(note)
-            self.save_notes()
+            note = self.notes.add(title, content, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            self.storage.put(note.to_dict(), self.notes.dicts())
+            self.search.update(note)
             self.display_notes()
             dialog.destroy()
 
@@ -368,7 +346,7 @@ class NotesApp:
         title_label.pack(padx=20, pady=(20, 5))
         
         title_entry = ttk.Entry(dialog, width=50)
-        title_entry.insert(0, note['title'])
+        title_entry.insert(0, note.title)
         title_entry.pack(padx=20, pady=(0, 20))
 
         # Content text
@@ -377,7 +355,7 @@ class NotesApp:
         content_label.pack(padx=20, pady=(0, 5))
         
         content_text = scrolledtext.ScrolledText(dialog, width=50, height=10)
-        content_text.insert("1.0", note['content'])
+        content_text.insert("1.0", note.content)
         content_text.pack(padx=20, pady=(0, 20))
 
         def save():
@@ -389,11 +367,12 @@ class NotesApp:
                 return
 
             # Update note
-            note['title'] = title
-            note['content'] = content
-            note['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            note.title = title
+            note.content = content
+            note.timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
-            self.save_notes()
+            self.storage.put(note.to_dict(), self.notes.dicts())
+            self.search.update(note)
             self.display_notes()
             dialog.destroy()
 
@@ -404,15 +383,25 @@ class NotesApp:
     def delete_note(self, note_id):
         """Delete a note"""
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this note?"):
-            self.notes = [note for note in self.notes if note['id'] != note_id]
-            self.save_notes()
+            self.notes.remove(note_id)
+            self.storage.delete(note_id, self.notes.dicts())
+            self.search.remove(note_id)
             self.display_notes()
 
-    def on_search_change(self, *args):
-        """Handle search input changes"""
+    def current_search(self):
+        """Search box text, ignoring the placeholder"""
         search_text = self.search_var.get()
-        if search_text != "Search notes...":
-            self.display_notes(search_text)
+        return "" if search_text == "Search notes..." else search_text
+
+    def on_search_change(self, *args):
+        """Handle search input changes, debounced so fast typing filters once"""
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(SEARCH_DEBOUNCE_MS, self.run_search)
+
+    def run_search(self):
+        self._search_job = None
+        self.filter_notes(self.current_search())
 
     def on_search_focus_in(self, event):
         """Clear placeholder text when search entry is focused"""
@@ -424,19 +413,11 @@ class NotesApp:
         if not self.search_var.get():
             self.search_var.set("Search notes...")
 
-    def on_frame_configure(self, event=None):
-        """Reset the scroll region to encompass the inner frame"""
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-
-    def on_canvas_configure(self, event):
-        """When canvas is resized, resize the inner frame to match"""
-        self.canvas.itemconfig(self.canvas_frame, width=event.width)
-
     def show_note_in_focus(self, note):
         """Show a single note in focus/detail view"""
         # Create a new dialog window
         dialog = tk.Toplevel(self.root)
-        dialog.title(note['title'])
+        dialog.title(note.title)
         dialog.geometry("800x600")
         dialog.configure(bg='#1e1e1e')
         
@@ -461,7 +442,7 @@ class NotesApp:
         # Title
         title_label = ttk.Label(
             main_frame,
-            text=note['title'],
+            text=note.title,
             font=('Helvetica', 16, 'bold'),
             foreground='white',
             background='#333333'
@@ -471,7 +452,7 @@ class NotesApp:
         # Content
         content_label = ttk.Label(
             main_frame,
-            text=note['content'],
+            text=note.content,
             wraplength=700,
             justify=tk.LEFT,
             foreground='#cccccc',
@@ -495,7 +476,7 @@ class NotesApp:
         # Add timestamp at the bottom
         time_label = ttk.Label(
             main_frame,
-            text=note['timestamp'],
+            text=note.timestamp,
             font=('Helvetica', 8),
             foreground='#888888',
             background='#333333'
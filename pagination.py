@@ -0,0 +1,83 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    """Pack the sort key of the last row on a page into an opaque token"""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises PaginationError for tokens we didn't issue"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise PaginationError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(values, list):
+        raise PaginationError(f"Invalid cursor: {cursor}")
+    return values
+
+
+def parse_limit(value):
+    """Clamp a `limit` query parameter to 1..MAX_LIMIT"""
+    if value is None:
+        return DEFAULT_LIMIT
+    try:
+        return max(1, min(MAX_LIMIT, int(value)))
+    except ValueError:
+        raise PaginationError(f"Invalid limit: {value}")
+
+
+def keyset_page(query, columns, cursor, limit, descending=False):
+    """Fetch one page of `query` ordered by `columns`, starting after `cursor`.
+
+    `columns` must end with a unique column so the ordering is total.
+    Returns the rows and the cursor for the next page (None on the last page).
+    Because the cursor is a position rather than an offset, every page is a
+    single index range scan regardless of how deep into the results it is.
+    """
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(columns):
+            raise PaginationError(f"Invalid cursor: {cursor}")
+        values = [_coerce(column, value) for column, value in zip(columns, values)]
+        query = query.filter(_after(columns, values, descending))
+
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, column.key) for column in columns])
+
+
+def _after(columns, values, descending):
+    # (a, b) > (x, y)  ==  a > x OR (a = x AND b > y), spelled out for portability
+    clauses = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        compare = column < value if descending else column > value
+        equal = [c == v for c, v in zip(columns[:i], values[:i])]
+        clauses.append(and_(*equal, compare))
+    return or_(*clauses)
+
+
+def _coerce(column, value):
+    if value is not None and column.type.python_type is datetime:
+        try:
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError) as e:
+            raise PaginationError(f"Invalid cursor value: {value}") from e
+    return value
@@ -0,0 +1,115 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+# Response headers that are recomputed for every reply instead of cached
+_SKIPPED_HEADERS = {'content-length', 'content-type', 'content-encoding', 'set-cookie', 'vary', 'etag'}
+
+
+class CachedResponse:
+    """A serialized 200 response plus its compressed variants, made on first use"""
+
+    def __init__(self, body, mimetype, headers):
+        self.body = body
+        self.mimetype = mimetype
+        self.headers = headers
+        self.variants = {'identity': body}
+
+    @property
+    def size(self):
+        return sum(len(data) for data in self.variants.values())
+
+
+class ResponseCache:
+    """Bounded in-process LRU of serialized responses.
+
+    Keys are (user_id, notes_version, request path with query string).
+    Any change to a user's notes bumps the version, so stale entries are
+    never read again and just age out of the LRU; nothing is invalidated
+    explicitly. Bodies of at least `compress_min_bytes` are served gzip
+    or, if the `brotli` package is installed, brotli compressed; the
+    compressed bytes are cached alongside the original.
+    """
+
+    def __init__(self, max_entries=512, max_bytes=32 * 1024 * 1024, compress_min_bytes=1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.compress_min_bytes = compress_min_bytes
+        self.encodings = (['br'] if brotli else []) + ['gzip']
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'not_modified': 0}
+
+    def etag(self, key, encoding):
+        """Strong ETag for one representation of a cached response"""
+        digest = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()[:32]
+        return f"{digest}-{encoding}"
+
+    def choose_encoding(self, accept_encodings):
+        """Best content coding the client accepts, from werkzeug's request.accept_encodings"""
+        return accept_encodings.best_match(self.encodings, default='identity')
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            self._data.move_to_end(key)
+            self._counters['hits'] += 1
+            return entry
+
+    def put(self, key, response):
+        """Cache a Flask response's body and headers; returns the CachedResponse"""
+        headers = [(name, value) for name, value in response.headers
+                   if name.lower() not in _SKIPPED_HEADERS]
+        entry = CachedResponse(response.get_data(), response.mimetype, headers)
+        with self._lock:
+            self._store(key, entry)
+        return entry
+
+    def body(self, key, entry, encoding):
+        """(bytes, content coding actually applied) for a cached response"""
+        if encoding == 'identity' or len(entry.body) < self.compress_min_bytes:
+            return entry.body, 'identity'
+        data = entry.variants.get(encoding)
+        if data is None:
+            if encoding == 'br':
+                data = brotli.compress(entry.body, quality=5)
+            else:
+                data = gzip.compress(entry.body, compresslevel=6)
+            with self._lock:
+                entry.variants[encoding] = data
+                if self._data.get(key) is entry:
+                    self._bytes += len(data)
+                    self._evict()
+        return data, encoding
+
+    def count_not_modified(self):
+        with self._lock:
+            self._counters['not_modified'] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, entries=len(self._data), bytes=self._bytes,
+                        encodings=self.encodings)
+
+    def _store(self, key, entry):
+        old = self._data.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+        self._data[key] = entry
+        self._bytes += entry.size
+        self._evict()
+
+    def _evict(self):
+        while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+            _, old = self._data.popitem(last=False)
+            self._bytes -= old.size
@@ -0,0 +1,151 @@
+import re
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+# Ranking weights for title, content and summary matches
+SQLITE_WEIGHTS = (10.0, 1.0, 2.0)
+
+# The Postgres expression index and queries must use exactly this expression
+PG_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(content, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(summary, '')), 'C')"
+)
+
+SQLITE_SETUP = [
+    """CREATE VIRTUAL TABLE note_fts USING fts5(
+        title, content, summary,
+        content='note', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS note_fts_insert AFTER INSERT ON note BEGIN
+        INSERT INTO note_fts(rowid, title, content, summary)
+        VALUES (new.id, new.title, new.content, new.summary);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS note_fts_delete AFTER DELETE ON note BEGIN
+        INSERT INTO note_fts(note_fts, rowid, title, content, summary)
+        VALUES ('delete', old.id, old.title, old.content, old.summary);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS note_fts_update AFTER UPDATE OF title, content, summary ON note BEGIN
+        INSERT INTO note_fts(note_fts, rowid, title, content, summary)
+        VALUES ('delete', old.id, old.title, old.content, old.summary);
+        INSERT INTO note_fts(rowid, title, content, summary)
+        VALUES (new.id, new.title, new.content, new.summary);
+    END""",
+    # Fill the index from notes that existed before it did
+    "INSERT INTO note_fts(note_fts) VALUES ('rebuild')",
+]
+
+# Built by migrate_db.py with CREATE INDEX CONCURRENTLY; a build at startup
+# would lock the table and outlast the app's statement timeout
+PG_INDEX_CHECK = (
+    "SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+    "WHERE c.relname = 'ix_note_fts'"
+)
+
+
+def query_terms(query):
+    """Split a search string into index terms"""
+    return re.findall(r'\w+', query.lower())
+
+
+class SearchIndex:
+    """Full-text note search backed by SQLite FTS5 or a Postgres GIN index.
+
+    On SQLite the index is an external-content FTS5 table kept in sync by
+    triggers; on Postgres it's an expression index, which the database
+    maintains itself once migrate_db.py has built it. Other databases,
+    SQLite builds without FTS5 and Postgres databases still missing the
+    index leave `enabled` False and callers fall back to substring matching.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.enabled = False
+
+    @property
+    def dialect(self):
+        return self.db.engine.dialect.name
+
+    def install(self):
+        """Create the SQLite index objects if they don't exist yet, or check the Postgres index is built"""
+        try:
+            with self.db.engine.begin() as conn:
+                if self.dialect == 'sqlite':
+                    exists = conn.execute(text(
+                        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'note_fts'")).first()
+                    if not exists:
+                        for statement in SQLITE_SETUP:
+                            conn.execute(text(statement))
+                elif self.dialect == 'postgresql':
+                    if not conn.execute(text(PG_INDEX_CHECK)).scalar():
+                        print("Full-text search index not built yet; run migrate_db.py. "
+                              "Using substring search until then.")
+                        return
+                else:
+                    return
+            self.enabled = True
+        except SQLAlchemyError as e:
+            print(f"Full-text search unavailable, falling back to substring search: {e}")
+
+    def search(self, user_id, query, limit=None, offset=0, category=None):
+        """Ranked matches for a user's notes as (note_id, snippet) rows, best first.
+
+        Every term must match and the last one is treated as a prefix, so
+        results narrow as the user types.
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+        category_filter = "AND note.category = :category" if category else ""
+        if self.dialect == 'sqlite':
+            sql, match = self._sqlite_query(terms, category_filter)
+        else:
+            sql, match = self._pg_query(terms, category_filter)
+        if limit is not None:
+            sql += " LIMIT :limit OFFSET :offset"
+        params = {'match': match, 'user_id': user_id, 'limit': limit, 'offset': offset,
+                  'category': category}
+        rows = self.db.session.execute(text(sql), params)
+        return [(row.id, row.snippet) for row in rows]
+
+    def document_frequencies(self, user_id, terms):
+        """How many of the user's notes match each term (the last one as a prefix)"""
+        counts = []
+        for i, term in enumerate(terms):
+            prefix = i == len(terms) - 1
+            if self.dialect == 'sqlite':
+                sql = """SELECT count(*) FROM note_fts JOIN note ON note.id = note_fts.rowid
+                         WHERE note_fts MATCH :match AND note.user_id = :user_id"""
+                match = f'"{term}"' + ('*' if prefix else '')
+            else:
+                sql = f"""SELECT count(*) FROM note
+                          WHERE user_id = :user_id AND ({PG_DOCUMENT}) @@ to_tsquery('simple', :match)"""
+                match = term + (':*' if prefix else '')
+            counts.append(self.db.session.execute(text(sql), {'match': match, 'user_id': user_id}).scalar())
+        return counts
+
+    def _sqlite_query(self, terms, category_filter):
+        match = ' '.join(f'"{term}"' for term in terms) + '*'
+        weights = ', '.join(str(w) for w in SQLITE_WEIGHTS)
+        sql = f"""
+            SELECT note.id AS id,
+                   snippet(note_fts, -1, '<mark>', '</mark>', '...', 16) AS snippet
+            FROM note_fts JOIN note ON note.id = note_fts.rowid
+            WHERE note_fts MATCH :match AND note.user_id = :user_id {category_filter}
+            ORDER BY bm25(note_fts, {weights}), note.id DESC
+        """
+        return sql, match
+
+    def _pg_query(self, terms, category_filter):
+        match = ' & '.join(terms) + ':*'
+        sql = f"""
+            SELECT id,
+                   ts_headline('simple', content, to_tsquery('simple', :match),
+                               'StartSel=<mark>, StopSel=</mark>, MaxWords=24, MinWords=8') AS snippet
+            FROM note
+            WHERE note.user_id = :user_id AND ({PG_DOCUMENT}) @@ to_tsquery('simple', :match) {category_filter}
+            ORDER BY ts_rank({PG_DOCUMENT}, to_tsquery('simple', :match)) DESC, id DESC
+        """
+        return sql, match
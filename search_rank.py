@@ -0,0 +1,76 @@
+import math
+from collections import Counter
+from datetime import datetime
+
+from search_index import SQLITE_WEIGHTS, query_terms
+
+FIELDS = ('title', 'content', 'summary')
+# Same title/content/summary boosts as the index's own ranking
+FIELD_WEIGHTS = dict(zip(FIELDS, SQLITE_WEIGHTS))
+
+
+class SearchRanker:
+    """Re-scores a small pool of search candidates, best first.
+
+    The text score is BM25F: each query term's frequency is weighted per
+    field and normalized by field length, then saturated with `k1` and
+    scaled by the term's IDF. It's divided by the pool's best text score
+    and blended with a recency decay on `updated_at` (halving every
+    `half_life_days`) and the note's place in the user's manual order.
+    """
+
+    def __init__(self, recency_weight=0.2, half_life_days=30.0, order_weight=0.1, k1=1.2, b=0.75):
+        self.recency_weight = recency_weight
+        self.half_life_days = half_life_days
+        self.order_weight = order_weight
+        self.k1 = k1
+        self.b = b
+
+    def rank(self, rows, terms, total=None, doc_freqs=None, now=None):
+        """Note ids from `rows` (with title, content, summary, updated_at, order) in ranked order.
+
+        The last term matches as a prefix, like the index does. Without
+        `total` and `doc_freqs` every term gets the same IDF.
+        """
+        if not rows:
+            return []
+        now = now or datetime.utcnow()
+        idfs = [1.0] * len(terms)
+        if total is not None and doc_freqs is not None:
+            idfs = [math.log(1 + (total - df + 0.5) / (df + 0.5)) for df in doc_freqs]
+
+        counts = [{field: Counter(query_terms(getattr(row, field) or '')) for field in FIELDS} for row in rows]
+        lengths = [{field: sum(c[field].values()) for field in FIELDS} for c in counts]
+        average = {field: max(1.0, sum(length[field] for length in lengths) / len(rows)) for field in FIELDS}
+
+        text_scores = []
+        for count, length in zip(counts, lengths):
+            score = 0.0
+            for i, (term, idf) in enumerate(zip(terms, idfs)):
+                prefix = i == len(terms) - 1
+                tf = 0.0
+                for field in FIELDS:
+                    hits = sum(n for word, n in count[field].items() if word.startswith(term)) \
+                        if prefix else count[field][term]
+                    if hits:
+                        norm = 1 - self.b + self.b * length[field] / average[field]
+                        tf += FIELD_WEIGHTS[field] * hits / norm
+                score += idf * tf / (self.k1 + tf)
+            text_scores.append(score)
+        best = max(text_scores) or 1.0
+
+        # Position in the manual order (top of the list = 1), among the candidates
+        by_order = sorted(range(len(rows)), key=lambda i: (rows[i].order is None, rows[i].order or 0))
+        order_scores = [0.0] * len(rows)
+        for position, i in enumerate(by_order):
+            order_scores[i] = 1 - position / max(1, len(rows) - 1)
+
+        scored = []
+        for row, text_score, order_score in zip(rows, text_scores, order_scores):
+            age_days = max(0.0, (now - row.updated_at).total_seconds() / 86400) if row.updated_at else None
+            recency = 0.5 ** (age_days / self.half_life_days) if age_days is not None else 0.0
+            score = (text_score / best + self.recency_weight * recency
+                     + self.order_weight * order_score)
+            scored.append((score, row.id))
+        scored.sort(key=lambda item: (-item[0], -item[1]))
+        return [note_id for _, note_id in scored]
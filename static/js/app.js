@@ -57,9 +57,6 @@ document.addEventListener('DOMContentLoaded', () => {
     let currentNoteId = null;
     let currentCategory = 'all';
 
-    // Load initial notes
-    fetchNotes();
-
     // Event Listeners
     addNoteBtn.addEventListener('click', () => showModal());
     cancelBtn.addEventListener('click', hideModal);
@@ -75,37 +72,37 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     });
 
-    // Add event listener for edit and delete buttons using event delegation
-    document.addEventListener('click', async (e) => {
-        const editBtn = e.target.closest('.edit-btn');
-        const deleteBtn = e.target.closest('.delete-btn');
-        
-        if (editBtn) {
-            e.stopPropagation(); // Prevent event bubbling
-            const noteId = editBtn.dataset.id;
-            const note = await fetchNoteById(noteId);
-            if (note) showModal(note);
-        } else if (deleteBtn) {
-            e.stopPropagation(); // Prevent event bubbling
+    // Cards are created and recycled by the grid, so all card events are
+    // handled by listeners on the container rather than on each card
+    notesContainer.addEventListener('click', async (e) => {
+        const note = notesGrid.noteFor(e.target);
+        if (!note) return;
+
+        if (e.target.closest('.edit-btn')) {
+            const fullNote = await fetchNoteById(note.id);
+            if (fullNote) showModal(fullNote);
+        } else if (e.target.closest('.delete-btn')) {
             if (confirm('Are you sure you want to delete this note?')) {
-                const noteId = deleteBtn.dataset.id;
                 try {
-                    await fetch(`/notes/${noteId}`, { method: 'DELETE' });
-                    fetchNotes();
+                    await fetch(`/notes/${note.id}`, { method: 'DELETE' });
+                    refreshUnlessLive();
                 } catch (error) {
                     console.error('Error deleting note:', error);
                     alert('Error deleting note. Please try again.');
                 }
             }
+        } else if (!e.target.closest('.note-actions')) {
+            const fullNote = await fetchNoteById(note.id);
+            if (fullNote) showExpandedNote(fullNote);
         }
     });
 
-    // Add this new function to fetch a single note
+    // List responses only carry a preview, so full notes are fetched on demand
     async function fetchNoteById(noteId) {
         try {
-            const response = await fetch(`/notes/search?q=id:${noteId}`);
-            const notes = await response.json();
-            return notes.length > 0 ? notes[0] : null;
+            const response = await fetch(`/notes/${noteId}`);
+            if (!response.ok) return null;
+            return await response.json();
         } catch (error) {
             console.error('Error fetching note:', error);
             return null;
@@ -175,8 +172,9 @@ document.addEventListener('DOMContentLoaded', () => {
                                 <line x1="10" y1="9" x2="8" y2="9"></line>
                             </svg>
                             <span>Summary</span>
+                            <button class="action-btn regenerate-btn" title="Regenerate summary">↻</button>
                         </div>
-                        ${note.summary ? `<p>${note.summary}</p>` : '<p class="no-summary">No summary available.</p>'}
+                        <div class="summary-body">${renderSummary(note, 'No summary available.')}</div>
                     </div>
                     <div class="note-footer">
                         <span class="note-timestamp">${formatDate(note.created_at)}</span>
@@ -189,7 +187,12 @@ document.addEventListener('DOMContentLoaded', () => {
         const closeBtn = modalContent.querySelector('.close-btn');
         const editBtn = modalContent.querySelector('.edit-btn');
 
+        const regenerateBtn = modalContent.querySelector('.regenerate-btn');
+
         closeBtn.addEventListener('click', hideModal);
+        regenerateBtn.addEventListener('click', () => {
+            streamSummary(note.id, modalContent.querySelector('.summary-body'), regenerateBtn);
+        });
         editBtn.addEventListener('click', () => {
             hideModal();
             showModal(note);
@@ -249,200 +252,277 @@ document.addEventListener('DOMContentLoaded', () => {
             }
 
             hideModal();
-            fetchNotes();
+            refreshUnlessLive();
         } catch (error) {
             console.error('Error saving note:', error);
             alert('Error saving note. Please try again.');
         }
     }
 
-    async function fetchNotes() {
+    // Notes are loaded a page at a time; the next page is requested when the
+    // sentinel below the grid scrolls into view
+    const PAGE_SIZE = 50;
+    const notesSentinel = document.getElementById('notes-sentinel');
+    const notesGrid = new NoteGrid(notesContainer);
+    let loadedNotes = [];
+    let nextCursor = null;
+    let loadingPage = false;
+    let fetchGeneration = 0;
+
+    const pageObserver = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting) && nextCursor && !loadingPage) {
+            loadNextPage();
+        }
+    }, { rootMargin: '400px' });
+    pageObserver.observe(notesSentinel);
+
+    function notesUrl(cursor) {
+        const query = searchInput.value.trim();
+        const params = new URLSearchParams({ limit: PAGE_SIZE, view: 'card' });
+        if (cursor) params.set('cursor', cursor);
+        if (currentCategory !== 'all') params.set('category', currentCategory);
+        if (query) {
+            params.set('q', query);
+            return `/notes/search?${params}`;
+        }
+        params.set('sort', 'order');
+        return `/notes?${params}`;
+    }
+
+    function fetchNotes() {
+        fetchGeneration++;
+        loadedNotes = [];
+        nextCursor = null;
+        updateCategoryCounts();
+        return loadNextPage();
+    }
+
+    async function loadNextPage() {
+        const generation = fetchGeneration;
+        loadingPage = true;
         try {
-            const response = await fetch('/notes/search' + (searchInput.value ? `?q=${searchInput.value}` : ''));
+            const response = await fetch(notesUrl(nextCursor));
             const notes = await response.json();
-            displayNotes(notes);
-            updateCategoryCounts(notes);
+            // A newer search started while this page was in flight
+            if (generation !== fetchGeneration) return;
+
+            nextCursor = response.headers.get('X-Next-Cursor');
+            loadedNotes = loadedNotes.concat(notes);
+            notesGrid.setNotes(loadedNotes);
+            schedulePendingRefresh(loadedNotes);
         } catch (error) {
             console.error('Error fetching notes:', error);
-            notesContainer.innerHTML = '<p class="error">Error loading notes. Please try again.</p>';
+            notesGrid.showMessage('<p class="error">Error loading notes. Please try again.</p>');
+        } finally {
+            if (generation === fetchGeneration) {
+                loadingPage = false;
+                // Re-observing fires again if the sentinel is still on screen
+                pageObserver.unobserve(notesSentinel);
+                pageObserver.observe(notesSentinel);
+            }
         }
     }
 
-    function displayNotes(notes) {
-        const filteredNotes = currentCategory === 'all' 
-            ? notes 
-            : notes.filter(note => note.category === currentCategory);
-
-        notesContainer.innerHTML = filteredNotes.length === 0 
-            ? '<p class="no-notes">No notes found</p>'
-            : filteredNotes.map(note => createNoteCard(note)).join('');
-
-        // Add drag and drop functionality
-        setupDragAndDrop();
-
-        // Add click event listeners to note cards
-        document.querySelectorAll('.note-card').forEach(card => {
-            card.addEventListener('click', (e) => {
-                if (!e.target.closest('.note-actions')) {
-                    const noteId = card.querySelector('.edit-btn').dataset.id;
-                    const note = notes.find(n => n.id === parseInt(noteId));
-                    showExpandedNote(note);
-                }
-            });
-        });
-
-        // Add event listeners to action buttons
-        document.querySelectorAll('.edit-btn').forEach(btn => {
-            btn.addEventListener('click', () => {
-                const noteId = btn.dataset.id;
-                const note = notes.find(n => n.id === parseInt(noteId));
-                if (note) showModal(note);
-            });
-        });
+    // Summaries are filled in by a background worker; without the live feed,
+    // check back while any are pending
+    let pendingRefreshTimeout;
+    function schedulePendingRefresh(notes) {
+        clearTimeout(pendingRefreshTimeout);
+        const hasPending = notes.some(note =>
+            note.summary_status === 'pending' || note.summary_status === 'running');
+        if (hasPending && !liveFeedConnected()) {
+            pendingRefreshTimeout = setTimeout(fetchNotes, 3000);
+        }
+    }
 
-        document.querySelectorAll('.delete-btn').forEach(btn => {
-            btn.addEventListener('click', async () => {
-                if (confirm('Are you sure you want to delete this note?')) {
-                    const noteId = btn.dataset.id;
-                    try {
-                        await fetch(`/notes/${noteId}`, { method: 'DELETE' });
-                        fetchNotes();
-                    } catch (error) {
-                        console.error('Error deleting note:', error);
-                        alert('Error deleting note. Please try again.');
-                    }
-                }
-            });
+    // Changes from this tab, other tabs and devices, and the summary worker
+    // arrive as diffs over a Server-Sent Events feed and are patched into the
+    // grid in place. EventSource reconnects by itself and resumes from the
+    // last event id, so no change is missed while it's away. The server closes
+    // feeds after a while, or at once when it's at its feed limit, and the
+    // `retry` it sends sets how soon the browser comes back.
+    let liveFeed = null;
+    let initialLoadDone = false;
+
+    function connectLiveFeed() {
+        if (!window.EventSource) {
+            loadInitialNotes();
+            return;
+        }
+        liveFeed = new EventSource('/notes/events');
+        // The first page is loaded once the feed is subscribed, so no change
+        // can fall between the two
+        liveFeed.addEventListener('ready', loadInitialNotes);
+        liveFeed.addEventListener('reset', () => {
+            initialLoadDone = true;
+            fetchNotes();
         });
+        liveFeed.addEventListener('changes', (e) => applyChanges(JSON.parse(e.data)));
+        liveFeed.onerror = loadInitialNotes;
     }
 
-    function setupDragAndDrop() {
-        const cards = document.querySelectorAll('.note-card');
-        let draggedCard = null;
+    function loadInitialNotes() {
+        if (initialLoadDone) return;
+        initialLoadDone = true;
+        fetchNotes();
+    }
 
-        cards.forEach(card => {
-            card.setAttribute('draggable', true);
-            
-            card.addEventListener('dragstart', (e) => {
-                draggedCard = card;
-                card.classList.add('dragging');
-                e.dataTransfer.effectAllowed = 'move';
-            });
+    function liveFeedConnected() {
+        return liveFeed !== null && liveFeed.readyState === EventSource.OPEN;
+    }
 
-            card.addEventListener('dragend', () => {
-                draggedCard.classList.remove('dragging');
-                document.querySelectorAll('.note-card').forEach(card => {
-                    card.classList.remove('drag-over');
-                });
-                draggedCard = null;
-            });
+    function refreshUnlessLive() {
+        if (!liveFeedConnected()) fetchNotes();
+    }
 
-            card.addEventListener('dragover', (e) => {
-                e.preventDefault();
-                if (draggedCard !== card) {
-                    card.classList.add('drag-over');
-                }
-            });
+    const noteKey = note => [note.order === null ? Infinity : note.order, note.id];
+    const keyBefore = (a, b) => a[0] < b[0] || (a[0] === b[0] && a[1] < b[1]);
 
-            card.addEventListener('dragleave', () => {
-                card.classList.remove('drag-over');
-            });
+    function applyChanges({ notes, deleted }) {
+        updateCategoryCounts();
+        if (searchInput.value.trim()) {
+            // Search results are ranked on the server, so run the search again
+            handleSearch();
+            return;
+        }
 
-            card.addEventListener('drop', (e) => {
-                e.preventDefault();
-                if (draggedCard !== card) {
-                    const allCards = [...document.querySelectorAll('.note-card')];
-                    const draggedIndex = allCards.indexOf(draggedCard);
-                    const droppedIndex = allCards.indexOf(card);
-
-                    // Update the order in the DOM
-                    if (draggedIndex < droppedIndex) {
-                        card.parentNode.insertBefore(draggedCard, card.nextSibling);
-                    } else {
-                        card.parentNode.insertBefore(draggedCard, card);
-                    }
-
-                    // Save the new order to the server
-                    saveNotesOrder();
-                }
-                card.classList.remove('drag-over');
-            });
-        });
+        const gone = new Set(deleted.concat(notes.map(note => note.id)));
+        const kept = loadedNotes.filter(note => !gone.has(note.id));
+        const lastKey = loadedNotes.length ? noteKey(loadedNotes[loadedNotes.length - 1]) : null;
+        for (const note of notes) {
+            if (currentCategory !== 'all' && note.category !== currentCategory) continue;
+            const key = noteKey(note);
+            // Notes past the last loaded one arrive with a later page
+            if (nextCursor && lastKey && keyBefore(lastKey, key)) continue;
+            const index = kept.findIndex(other => keyBefore(key, noteKey(other)));
+            kept.splice(index === -1 ? kept.length : index, 0, note);
+        }
+        loadedNotes = kept;
+        notesGrid.setNotes(loadedNotes);
+        schedulePendingRefresh(loadedNotes);
     }
 
-    async function saveNotesOrder() {
-        const cards = document.querySelectorAll('.note-card');
-        const order = Array.from(cards).map(card => {
-            const noteId = card.querySelector('.edit-btn').dataset.id;
-            return parseInt(noteId);
+    connectLiveFeed();
+
+    // Drag and drop works on note ids, so it keeps working when the dragged
+    // card scrolls out of the rendered window
+    let draggedId = null;
+
+    notesContainer.addEventListener('dragstart', (e) => {
+        const note = notesGrid.noteFor(e.target);
+        if (!note) return;
+        // Search results are in ranked order, not the user's, so their
+        // neighbours don't say where a dropped note belongs
+        if (searchInput.value.trim()) {
+            e.preventDefault();
+            return;
+        }
+        draggedId = note.id;
+        e.target.closest('.note-card').classList.add('dragging');
+        e.dataTransfer.effectAllowed = 'move';
+    });
+
+    notesContainer.addEventListener('dragend', () => {
+        draggedId = null;
+        notesContainer.querySelectorAll('.dragging, .drag-over').forEach(card => {
+            card.classList.remove('dragging', 'drag-over');
         });
+    });
+
+    notesContainer.addEventListener('dragover', (e) => {
+        const note = notesGrid.noteFor(e.target);
+        if (!note || draggedId === null) return;
+        e.preventDefault();
+        if (note.id !== draggedId) {
+            e.target.closest('.note-card').classList.add('drag-over');
+        }
+    });
+
+    notesContainer.addEventListener('dragleave', (e) => {
+        const card = e.target.closest('.note-card');
+        if (card) card.classList.remove('drag-over');
+    });
+
+    notesContainer.addEventListener('drop', (e) => {
+        const target = notesGrid.noteFor(e.target);
+        if (!target || draggedId === null) return;
+        e.preventDefault();
+        e.target.closest('.note-card').classList.remove('drag-over');
+        if (target.id === draggedId) return;
+
+        // Dropping on a later card puts the note after it, on an earlier card before it
+        const from = loadedNotes.findIndex(note => note.id === draggedId);
+        const to = loadedNotes.indexOf(target);
+        const [moved] = loadedNotes.splice(from, 1);
+        loadedNotes.splice(to, 0, moved);
+        notesGrid.setNotes(loadedNotes);
+        saveNotePosition(to);
+    });
 
+    // Only the moved note and its new neighbours are sent, so the server
+    // usually updates a single row
+    async function saveNotePosition(index) {
+        const noteId = i => loadedNotes[i] ? loadedNotes[i].id : null;
         try {
             await fetch('/notes/reorder', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ order })
+                body: JSON.stringify({
+                    id: noteId(index),
+                    prev_id: noteId(index - 1),
+                    next_id: noteId(index + 1)
+                })
             });
         } catch (error) {
             console.error('Error saving notes order:', error);
         }
     }
 
-    function createNoteCard(note) {
-        return `
-            <div class="note-card">
-                <div class="note-content-wrapper">
-                    <span class="note-category category-${note.category}">${note.category}</span>
-                    <h3 class="note-title">${note.title}</h3>
-                    <p class="note-content">${note.content}</p>
-                    <div class="note-summary">
-                        <div class="summary-header">
-                            <svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-                                <path d="M14 2H6a2 2 0 0 0-2 2v16a2 2 0 0 0 2 2h12a2 2 0 0 0 2-2V8z"></path>
-                                <polyline points="14 2 14 8 20 8"></polyline>
-                                <line x1="16" y1="13" x2="8" y2="13"></line>
-                                <line x1="16" y1="17" x2="8" y2="17"></line>
-                                <line x1="10" y1="9" x2="8" y2="9"></line>
-                            </svg>
-                            <span>Summary</span>
-                        </div>
-                        ${note.summary ? `<p>${note.summary}</p>` : '<p class="no-summary">No summary yet. Click to generate one.</p>'}
-                    </div>
-                </div>
-                <div class="note-footer">
-                    <span class="note-timestamp">${formatDate(note.created_at)}</span>
-                    <div class="note-actions">
-                        <button class="action-btn edit-btn" data-id="${note.id}" title="Edit">✏️</button>
-                        <button class="action-btn delete-btn" data-id="${note.id}" title="Delete">🗑️</button>
-                    </div>
-                </div>
-            </div>
-        `;
-    }
+    // Tokens are appended as the server streams them, so the summary starts
+    // appearing as soon as the model produces its first words
+    function streamSummary(noteId, target, button) {
+        const paragraph = document.createElement('p');
+        target.replaceChildren(paragraph);
+        button.disabled = true;
 
-    function formatDate(dateString) {
-        const date = new Date(dateString);
-        return date.toLocaleString('en-US', {
-            month: 'short',
-            day: 'numeric',
-            year: 'numeric',
-            hour: '2-digit',
-            minute: '2-digit'
+        const source = new EventSource(`/notes/${noteId}/summarize/stream?refresh=1`);
+        source.onmessage = (e) => {
+            paragraph.textContent += JSON.parse(e.data).text;
+        };
+        source.addEventListener('done', () => {
+            source.close();
+            button.disabled = false;
+            refreshUnlessLive();
         });
-    }
-
-    function updateCategoryCounts(notes) {
-        const counts = {
-            all: notes.length,
-            work: notes.filter(note => note.category === 'work').length,
-            personal: notes.filter(note => note.category === 'personal').length,
-            ideas: notes.filter(note => note.category === 'ideas').length
+        source.addEventListener('failed', () => {
+            source.close();
+            button.disabled = false;
+            target.innerHTML = '<p class="no-summary">Summary generation failed.</p>';
+        });
+        source.onerror = () => {
+            source.close();
+            button.disabled = false;
         };
+    }
 
-        Object.entries(counts).forEach(([category, count]) => {
-            const countElement = document.getElementById(`${category}-count`);
-            if (countElement) countElement.textContent = count;
-        });
+    async function updateCategoryCounts() {
+        try {
+            const response = await fetch('/notes/stats');
+            const stats = await response.json();
+            const counts = {
+                all: stats.all,
+                work: stats.categories.work || 0,
+                personal: stats.categories.personal || 0,
+                ideas: stats.categories.ideas || 0
+            };
+
+            Object.entries(counts).forEach(([category, count]) => {
+                const countElement = document.getElementById(`${category}-count`);
+                if (countElement) countElement.textContent = count;
+            });
+        } catch (error) {
+            console.error('Error fetching note counts:', error);
+        }
     }
 
     let searchTimeout;
@@ -0,0 +1,226 @@
+// Note card markup and a keyed, windowed renderer for the notes grid.
+// Loaded as a plain script by the page, and with require() by benchmarks/render_bench.js.
+(function (root) {
+    const SUMMARY_ICON = `
+        <svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
+            <path d="M14 2H6a2 2 0 0 0-2 2v16a2 2 0 0 0 2 2h12a2 2 0 0 0 2-2V8z"></path>
+            <polyline points="14 2 14 8 20 8"></polyline>
+            <line x1="16" y1="13" x2="8" y2="13"></line>
+            <line x1="16" y1="17" x2="8" y2="17"></line>
+            <line x1="10" y1="9" x2="8" y2="9"></line>
+        </svg>`;
+
+    function renderNoteCard(note) {
+        return `
+            <div class="note-card" data-id="${note.id}" draggable="true">
+                <div class="note-content-wrapper">
+                    <span class="note-category category-${note.category}">${note.category}</span>
+                    <h3 class="note-title">${note.title}</h3>
+                    <p class="note-content">${note.snippet || note.preview}</p>
+                    <div class="note-summary">
+                        <div class="summary-header">
+                            ${SUMMARY_ICON}
+                            <span>Summary</span>
+                        </div>
+                        ${renderSummary(note, 'No summary yet. Click to generate one.')}
+                    </div>
+                </div>
+                <div class="note-footer">
+                    <span class="note-timestamp">${formatDate(note.created_at)}</span>
+                    <div class="note-actions">
+                        <button class="action-btn edit-btn" data-id="${note.id}" title="Edit">✏️</button>
+                        <button class="action-btn delete-btn" data-id="${note.id}" title="Delete">🗑️</button>
+                    </div>
+                </div>
+            </div>
+        `;
+    }
+
+    function renderSummary(note, emptyText) {
+        if (note.summary) return `<p>${note.summary}</p>`;
+        if (note.summary_status === 'pending' || note.summary_status === 'running') {
+            return '<p class="no-summary summary-pending">Generating summary...</p>';
+        }
+        if (note.summary_status === 'failed') {
+            return '<p class="no-summary">Summary generation failed.</p>';
+        }
+        return `<p class="no-summary">${emptyText}</p>`;
+    }
+
+    function formatDate(dateString) {
+        const date = new Date(dateString);
+        return date.toLocaleString('en-US', {
+            month: 'short',
+            day: 'numeric',
+            year: 'numeric',
+            hour: '2-digit',
+            minute: '2-digit'
+        });
+    }
+
+    // Only the rows around the viewport exist in the DOM; padding on the
+    // container stands in for the rest so the scrollbar stays accurate.
+    // Cards are keyed by note id and only re-created when their markup
+    // changes, so refreshing or re-filtering the list touches just the
+    // cards that differ.
+    class NoteGrid {
+        constructor(container, {
+            renderCard = renderNoteCard,
+            emptyHtml = '<p class="no-notes">No notes found</p>',
+            rowHeight = 380,
+            columns = 1,
+            gap = 25,
+            overscan = 2
+        } = {}) {
+            this.container = container;
+            this.document = container.ownerDocument;
+            this.window = this.document.defaultView;
+            this.renderCard = renderCard;
+            this.emptyHtml = emptyHtml;
+            this.rowHeight = rowHeight;
+            this.columns = columns;
+            this.gap = gap;
+            this.overscan = overscan;
+
+            this.notes = [];
+            this.indexById = new Map();
+            this.cards = new Map();      // note id -> { el, html }
+            this.markup = new WeakMap(); // note object -> card html
+            this.message = null;
+            this.frame = null;
+
+            container.replaceChildren();
+            const schedule = () => this.scheduleRender();
+            this.window.addEventListener('scroll', schedule, { passive: true });
+            this.window.addEventListener('resize', schedule);
+        }
+
+        setNotes(notes) {
+            this.notes = notes;
+            this.indexById = new Map(notes.map((note, index) => [String(note.id), index]));
+            this.render();
+        }
+
+        // Replace the grid with a message, e.g. after a failed fetch
+        showMessage(html) {
+            this.setNotes([]);
+            this.message.outerHTML = html;
+            this.message = this.container.firstElementChild;
+        }
+
+        noteFor(element) {
+            const card = element.closest('.note-card');
+            if (!card || !this.container.contains(card)) return null;
+            const index = this.indexById.get(card.dataset.id);
+            return index === undefined ? null : this.notes[index];
+        }
+
+        scheduleRender() {
+            if (this.frame) return;
+            const requestFrame = this.window.requestAnimationFrame
+                ? cb => this.window.requestAnimationFrame(cb)
+                : cb => setTimeout(cb, 16);
+            this.frame = requestFrame(() => {
+                this.frame = null;
+                this.render();
+            });
+        }
+
+        // Column count and row size come from the computed grid when the
+        // browser has laid it out, and from the constructor options otherwise
+        measure() {
+            const style = this.window.getComputedStyle(this.container);
+            const tracks = (style.gridTemplateColumns || '').split(' ').filter(t => t.endsWith('px'));
+            const rowHeight = parseFloat(style.gridAutoRows) || this.rowHeight;
+            const gap = parseFloat(style.rowGap);
+            return {
+                columns: tracks.length || this.columns,
+                stride: rowHeight + (Number.isNaN(gap) ? this.gap : gap)
+            };
+        }
+
+        render() {
+            const notes = this.notes;
+            if (notes.length === 0) {
+                this.clear();
+                if (!this.message) {
+                    this.container.insertAdjacentHTML('afterbegin', this.emptyHtml);
+                    this.message = this.container.firstElementChild;
+                }
+                return;
+            }
+            if (this.message) {
+                this.message.remove();
+                this.message = null;
+            }
+
+            const { columns, stride } = this.measure();
+            const rows = Math.ceil(notes.length / columns);
+            const top = this.container.getBoundingClientRect().top;
+            const viewport = this.window.innerHeight;
+            const firstRow = Math.min(rows, Math.max(0, Math.floor(-top / stride) - this.overscan));
+            const lastRow = Math.min(rows, Math.max(firstRow, Math.ceil((viewport - top) / stride) + this.overscan));
+            const start = firstRow * columns;
+            const end = Math.min(notes.length, lastRow * columns);
+
+            this.container.style.paddingTop = `${firstRow * stride}px`;
+            this.container.style.paddingBottom = `${(rows - lastRow) * stride}px`;
+
+            const visible = new Set();
+            for (let i = start; i < end; i++) visible.add(String(notes[i].id));
+            for (const [id, card] of this.cards) {
+                if (!visible.has(id)) {
+                    card.el.remove();
+                    this.cards.delete(id);
+                }
+            }
+
+            let previous = null;
+            for (let i = start; i < end; i++) {
+                const note = notes[i];
+                const id = String(note.id);
+                let html = this.markup.get(note);
+                if (html === undefined) {
+                    html = this.renderCard(note);
+                    this.markup.set(note, html);
+                }
+
+                let card = this.cards.get(id);
+                if (!card) {
+                    card = { el: this.createElement(html), html };
+                    this.cards.set(id, card);
+                } else if (card.html !== html) {
+                    const el = this.createElement(html);
+                    card.el.replaceWith(el);
+                    card.el = el;
+                    card.html = html;
+                }
+
+                // Move a card only when it's out of place
+                const expected = previous ? previous.nextSibling : this.container.firstChild;
+                if (expected !== card.el) this.container.insertBefore(card.el, expected);
+                previous = card.el;
+            }
+        }
+
+        clear() {
+            for (const card of this.cards.values()) card.el.remove();
+            this.cards.clear();
+            this.container.style.paddingTop = '';
+            this.container.style.paddingBottom = '';
+        }
+
+        createElement(html) {
+            const template = this.document.createElement('template');
+            template.innerHTML = html.trim();
+            return template.content.firstElementChild;
+        }
+    }
+
+    const exports = { NoteGrid, renderNoteCard, renderSummary, formatDate };
+    if (typeof module !== 'undefined' && module.exports) {
+        module.exports = exports;
+    } else {
+        Object.assign(root, exports);
+    }
+})(typeof window !== 'undefined' ? window : globalThis);
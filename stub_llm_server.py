@@ -0,0 +1,62 @@
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from summary_providers import stub_reply
+
+class StubCompletionsHandler(BaseHTTPRequestHandler):
+    """Answers OpenAI-style /chat/completions requests with stub summaries"""
+    latency = 0.0
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        if not self.path.endswith('/chat/completions'):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        reply = stub_reply(body['messages'][-1]['content'])
+        if body.get('stream'):
+            self.send_stream(reply)
+        else:
+            time.sleep(self.latency)
+            self.send_json({'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': reply}}]})
+
+    def send_json(self, data):
+        payload = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def send_stream(self, reply):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        words = reply.split(' ')
+        for i, word in enumerate(words):
+            time.sleep(self.latency / len(words))
+            chunk = {'choices': [{'index': 0, 'delta': {'content': word if i == 0 else ' ' + word}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline OpenAI-compatible server for load testing summaries")
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.5, help="Seconds per reply (default: 0.5)")
+    args = parser.parse_args()
+
+    StubCompletionsHandler.latency = args.latency
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), StubCompletionsHandler)
+    print(f"Stub model listening on http://127.0.0.1:{args.port}/v1")
+    server.serve_forever()
+
+if __name__ == '__main__':
+    main()
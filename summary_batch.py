@@ -0,0 +1,110 @@
+import json
+import re
+import threading
+import time
+
+# The notes follow this line as a JSON object of {"1": content, ...}
+BATCH_PROMPT = (
+    "Summarize each of the following notes in one or two sentences. "
+    "Reply with only a JSON object that maps each note's number to its summary.\n"
+    "Notes:\n"
+)
+
+
+def pack_notes(notes, max_notes=8, max_chars=4000):
+    """Group (id, content length) pairs into batches that fit in one prompt.
+
+    Short notes are packed together until a batch reaches `max_notes`
+    notes or `max_chars` characters of content; a note longer than
+    `max_chars` gets a batch of its own. Input order is kept.
+    """
+    batches = []
+    batch, size = [], 0
+    for note_id, length in notes:
+        if batch and (len(batch) >= max_notes or size + length > max_chars):
+            batches.append(batch)
+            batch, size = [], 0
+        batch.append(note_id)
+        size += length
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def batch_prompt(contents):
+    """Prompt asking for a summary of each content string, numbered from 1"""
+    numbered = {str(i): content for i, content in enumerate(contents, 1)}
+    return BATCH_PROMPT + json.dumps(numbered, ensure_ascii=False)
+
+
+def batch_contents(prompt):
+    """The content strings in a prompt made by batch_prompt(), or None for other prompts"""
+    if not prompt.startswith(BATCH_PROMPT):
+        return None
+    numbered = json.loads(prompt[len(BATCH_PROMPT):])
+    return [numbered[str(i)] for i in range(1, len(numbered) + 1)]
+
+
+def parse_batch_summaries(text, count):
+    """Pull `count` summaries out of a batch reply, or return None if it doesn't parse.
+
+    Models often wrap JSON in a Markdown code fence, so the outermost
+    {...} in the reply is what gets parsed.
+    """
+    match = re.search(r'\{.*\}', text or '', re.DOTALL)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    summaries = [data.get(str(i)) for i in range(1, count + 1)]
+    if not all(isinstance(summary, str) and summary.strip() for summary in summaries):
+        return None
+    return [summary.strip() for summary in summaries]
+
+
+def is_rate_limit_error(error):
+    """Whether a model error looks like HTTP 429 / quota exhausted"""
+    if type(error).__name__ in ('ResourceExhausted', 'TooManyRequests', 'RateLimitError'):
+        return True
+    return getattr(error, 'code', None) == 429 or getattr(error, 'status_code', None) == 429
+
+
+class RateLimiter:
+    """Spaces out model calls to at most `per_minute`, shared by all threads.
+
+    After a rate-limit error, `cool_down()` pauses every caller for a
+    while, doubling the pause on repeated errors. `per_minute` of 0 only
+    applies the cool-downs.
+    """
+
+    def __init__(self, per_minute=0, cooldown=10.0, max_cooldown=300.0):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._next = 0.0
+        self._penalty = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until the next call is allowed"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+    def cool_down(self):
+        with self._lock:
+            self._penalty = min(self.max_cooldown, self._penalty * 2 or self.cooldown)
+            self._next = max(self._next, time.monotonic() + self._penalty)
+            penalty = self._penalty
+        print(f"Summary model is rate limited; pausing calls for {penalty:.0f}s")
+
+    def succeeded(self):
+        with self._lock:
+            self._penalty = 0.0
@@ -0,0 +1,159 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import SQLAlchemyError
+
+
+def normalize_content(content):
+    """Collapse whitespace so formatting-only differences share a cache entry"""
+    return re.sub(r'\s+', ' ', content).strip()
+
+
+def content_key(content, model_name, prompt_version):
+    """Cache key for a summary: normalized content hash plus model and prompt version"""
+    raw = f"{model_name}\0{prompt_version}\0{normalize_content(content)}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class LRUCache:
+    """Small thread-safe LRU mapping"""
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SummaryCache:
+    """Two-level summary cache: an in-process LRU in front of a database table.
+
+    `entry_model` is a model with `key`, `summary` and `created_at` columns.
+    Entries older than `ttl` are ignored and the table is trimmed back to
+    `max_rows` (oldest first) every `evict_every` writes.
+    """
+
+    def __init__(self, db, entry_model, model_name, prompt_version,
+                 lru_size=1024, ttl=timedelta(days=30), max_rows=10000, evict_every=100):
+        self.db = db
+        self.entry_model = entry_model
+        self.model_name = model_name
+        self.prompt_version = prompt_version
+        self.lru = LRUCache(lru_size)
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.evict_every = evict_every
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._counters = {'memory_hits': 0, 'db_hits': 0, 'misses': 0}
+        self._miss_seconds = 0.0
+
+    def key_for(self, content, stage=None):
+        """Cache key for `content`; `stage` keeps e.g. chunk summaries apart from note summaries"""
+        version = self.prompt_version if stage is None else f"{self.prompt_version}:{stage}"
+        return content_key(content, self.model_name, version)
+
+    def get(self, key):
+        """Look a summary up in memory, then in the table"""
+        summary = self.lru.get(key)
+        if summary is not None:
+            self._count('memory_hits')
+            return summary
+
+        entry = self.db.session.get(self.entry_model, key)
+        if entry is not None and entry.created_at >= datetime.utcnow() - self.ttl:
+            self.lru.put(key, entry.summary)
+            self._count('db_hits')
+            return entry.summary
+        return None
+
+    def put(self, key, summary):
+        """Store a summary in both layers"""
+        self.lru.put(key, summary)
+        try:
+            self.db.session.merge(self.entry_model(key=key, summary=summary, created_at=datetime.utcnow()))
+            self.db.session.commit()
+        except SQLAlchemyError as e:
+            # Another worker stored the same key first; the memory layer is enough
+            self.db.session.rollback()
+            print(f"Error storing cached summary: {e}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % self.evict_every == 0
+        if evict:
+            self.evict()
+
+    def get_or_create(self, key, create, refresh=False):
+        """Return the cached summary for `key`, calling `create()` on a miss"""
+        if not refresh:
+            summary = self.get(key)
+            if summary is not None:
+                return summary
+
+        self._count('misses')
+        started = time.monotonic()
+        summary = create()
+        with self._lock:
+            self._miss_seconds += time.monotonic() - started
+        if summary:
+            self.put(key, summary)
+        return summary
+
+    def evict(self):
+        """Drop expired entries and trim the table to `max_rows`"""
+        model = self.entry_model
+        session = self.db.session
+        try:
+            session.query(model).filter(model.created_at < datetime.utcnow() - self.ttl).delete(
+                synchronize_session=False)
+            cutoff = session.query(model.created_at).order_by(model.created_at.desc()).offset(
+                self.max_rows).limit(1).scalar()
+            if cutoff is not None:
+                session.query(model).filter(model.created_at <= cutoff).delete(synchronize_session=False)
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            print(f"Error evicting cached summaries: {e}")
+
+    def stats(self):
+        """Hit/miss counters plus an estimate of the model time saved"""
+        with self._lock:
+            counters = dict(self._counters)
+            miss_seconds = self._miss_seconds
+        hits = counters['memory_hits'] + counters['db_hits']
+        lookups = hits + counters['misses']
+        avg_miss = miss_seconds / counters['misses'] if counters['misses'] else 0.0
+        return {
+            **counters,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'api_calls_saved': hits,
+            'avg_model_seconds': round(avg_miss, 3),
+            'seconds_saved_estimate': round(hits * avg_miss, 3),
+            'memory_entries': len(self.lru),
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
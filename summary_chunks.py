@@ -0,0 +1,43 @@
+import re
+import zlib
+
+CHUNK_PROMPT = "Summarize this part of a longer note in two or three sentences: {content}"
+REDUCE_PROMPT = ("These are summaries of consecutive parts of one note. "
+                 "Summarize the whole note in one or two sentences: {content}")
+
+# 1 in N words that end a sentence is a chunk boundary, and 1 in N of any other word
+SENTENCE_CUT_ODDS = 4
+WORD_CUT_ODDS = 64
+
+_SENTENCE_END = re.compile(r'([.!?]["\')\]]*\s+|\n\s*)$')
+
+
+def split_chunks(content, min_chars=2000, max_chars=6000):
+    """Split long text into chunks whose boundaries depend on the text around them.
+
+    A chunk ends after a word when it's at least `min_chars` long and a
+    hash of that word picks it as a boundary (sentence ends are favoured),
+    or when it reaches `max_chars`. Because boundaries don't depend on
+    absolute positions, an edit only changes the chunk it's in (and
+    rarely the next one); every other chunk keeps exactly the same text
+    and so hits the chunk summary cache.
+    """
+    chunks = []
+    start = size = 0
+    for match in re.finditer(r'\S+\s*', content):
+        word = match.group(0)
+        size = match.end() - start
+        if size < min_chars:
+            continue
+        odds = SENTENCE_CUT_ODDS if _SENTENCE_END.search(word) else WORD_CUT_ODDS
+        if size >= max_chars or zlib.crc32(word.strip().encode('utf-8')) % odds == 0:
+            chunks.append(content[start:match.end()])
+            start = match.end()
+    if start < len(content):
+        tail = content[start:]
+        # Fold a short tail into the previous chunk rather than summarizing a scrap
+        if chunks and len(tail) < min_chars // 2:
+            chunks[-1] += tail
+        else:
+            chunks.append(tail)
+    return chunks
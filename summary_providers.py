@@ -0,0 +1,304 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import google.generativeai as genai
+import requests
+from requests.adapters import HTTPAdapter
+
+from summary_batch import batch_contents
+
+
+class ProviderError(RuntimeError):
+    """A summary model call failed; `status_code` is set for HTTP errors"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ProviderUnavailable(ProviderError):
+    """The call was refused without reaching the model (circuit open or no free slot)"""
+
+
+class ProviderTimeout(ProviderError):
+    pass
+
+
+class CircuitBreaker:
+    """Fails fast while a provider is down instead of piling more calls onto it.
+
+    After `threshold` consecutive failures the circuit opens and calls are
+    refused for `reset_timeout` seconds. The next call after that is a
+    trial: if it succeeds the circuit closes, otherwise it opens again.
+    """
+
+    def __init__(self, threshold=5, reset_timeout=30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = 'half-open'
+                self._trial_running = False
+            if self.state == 'half-open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self._failures = 0
+            self._trial_running = False
+
+    def release(self):
+        """End a call that proved nothing either way; a half-open circuit lets the next call be the trial"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == 'half-open' or self._failures >= self.threshold:
+                if self.state != 'open':
+                    print(f"Summary provider failed {self._failures} times; "
+                          f"refusing calls for {self.reset_timeout:g}s")
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+                self._trial_running = False
+
+
+class SummaryProvider:
+    """A summary model behind a deadline, a concurrency cap and a circuit breaker.
+
+    Subclasses implement `_complete(prompt)`, returning the reply text,
+    and `_stream(prompt)`, yielding it in chunks. Calls run on a small
+    thread pool so the caller gets its answer or a ProviderTimeout
+    within `timeout` seconds even if the SDK never returns. A call that
+    hangs keeps its slot until it finishes, so a stuck upstream fills up
+    the `max_concurrency` slots and further calls fail fast.
+    """
+
+    def __init__(self, model_name, timeout=30.0, max_concurrency=4, breaker=None):
+        self.model_name = model_name
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.breaker = breaker or CircuitBreaker()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency,
+                                        thread_name_prefix=type(self).__name__)
+        self._lock = threading.Lock()
+        self._counters = {'calls': 0, 'failures': 0, 'timeouts': 0, 'rejected': 0, 'in_flight': 0}
+
+    def complete(self, prompt):
+        """The model's reply to `prompt`; raises ProviderError on failure or timeout"""
+        deadline = self._start()
+        future = None
+        try:
+            future = self._pool.submit(self._complete, prompt)
+            text = self._result(future, deadline)
+        except BaseException as e:
+            self._failed(e)
+            raise
+        finally:
+            self._release_after(future)
+        self.breaker.record_success()
+        return text
+
+    def stream(self, prompt):
+        """Yield the reply in chunks; the whole stream shares one deadline"""
+        deadline = self._start()
+        future = None
+        chunks = self._stream(prompt)
+        try:
+            end = object()
+            while True:
+                future = self._pool.submit(next, chunks, end)
+                chunk = self._result(future, deadline)
+                if chunk is end:
+                    break
+                yield chunk
+        except GeneratorExit:
+            # The client went away; that says nothing about the provider's health
+            self.breaker.release()
+            raise
+        except BaseException as e:
+            self._failed(e)
+            raise
+        finally:
+            # A chunk still being fetched after a timeout can't be interrupted
+            if future is None or future.done():
+                chunks.close()
+            self._release_after(future)
+        self.breaker.record_success()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        return {'provider': type(self).__name__, 'model': self.model_name,
+                'circuit': self.breaker.state, **counters}
+
+    def _start(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            self._count('rejected')
+            raise ProviderUnavailable(f"All {self.max_concurrency} {self.model_name} slots are busy")
+        if not self.breaker.allow():
+            self._slots.release()
+            self._count('rejected')
+            raise ProviderUnavailable(f"{self.model_name} is failing; not calling it for now")
+        self._count('calls')
+        self._count('in_flight')
+        return time.monotonic() + self.timeout
+
+    def _result(self, future, deadline):
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            raise ProviderTimeout(f"{self.model_name} did not answer within {self.timeout:g}s")
+
+    def _failed(self, error):
+        self._count('timeouts' if isinstance(error, ProviderTimeout) else 'failures')
+        self.breaker.record_failure()
+
+    def _release_after(self, future):
+        # The slot is only free once the underlying call has actually returned
+        def release(_=None):
+            self._count('in_flight', -1)
+            self._slots.release()
+        if future is None or future.done():
+            release()
+        else:
+            future.add_done_callback(release)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _complete(self, prompt):
+        raise NotImplementedError
+
+    def _stream(self, prompt):
+        raise NotImplementedError
+
+
+class GeminiProvider(SummaryProvider):
+    def __init__(self, model_name, api_key, **kwargs):
+        super().__init__(model_name, **kwargs)
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    def _complete(self, prompt):
+        return self.model.generate_content(prompt).text
+
+    def _stream(self, prompt):
+        for chunk in self.model.generate_content(prompt, stream=True):
+            yield chunk.text
+
+
+class OpenAICompatibleProvider(SummaryProvider):
+    """Any server with the OpenAI chat completions API: OpenAI itself, vLLM,
+    llama.cpp, Ollama, or stub_llm_server.py for offline load tests"""
+
+    def __init__(self, model_name, base_url='https://api.openai.com/v1', api_key=None, **kwargs):
+        super().__init__(model_name, **kwargs)
+        self.url = base_url.rstrip('/') + '/chat/completions'
+        # Keep-alive connections are reused across calls, one per concurrent call
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if api_key:
+            self.session.headers['Authorization'] = f'Bearer {api_key}'
+
+    def _post(self, prompt, stream):
+        try:
+            response = self.session.post(self.url, stream=stream, timeout=(min(5.0, self.timeout), self.timeout), json={
+                'model': self.model_name,
+                'messages': [{'role': 'user', 'content': prompt}],
+                'stream': stream,
+            })
+        except requests.RequestException as e:
+            raise ProviderError(f"Error calling {self.url}: {e}")
+        if response.status_code != 200:
+            raise ProviderError(f"{self.url} returned HTTP {response.status_code}: {response.text[:200]}",
+                                status_code=response.status_code)
+        return response
+
+    def _complete(self, prompt):
+        return self._post(prompt, stream=False).json()['choices'][0]['message']['content']
+
+    def _stream(self, prompt):
+        with self._post(prompt, stream=True) as response:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    return
+                text = json.loads(data)['choices'][0].get('delta', {}).get('content')
+                if text:
+                    yield text
+
+
+def stub_reply(prompt):
+    """Deterministic fake summary; batch prompts get the JSON reply the real models are asked for"""
+    contents = batch_contents(prompt)
+    if contents is not None:
+        return json.dumps({str(i): f"Summary: {content[:100]}" for i, content in enumerate(contents, 1)})
+    return f"Summary: {prompt.split(': ', 1)[-1][:100]}"
+
+
+class StubProvider(SummaryProvider):
+    """Offline stand-in for a real model, for load testing without network"""
+
+    def __init__(self, latency=0.0, **kwargs):
+        super().__init__('stub', **kwargs)
+        self.latency = latency
+
+    def _complete(self, prompt):
+        time.sleep(self.latency)
+        return stub_reply(prompt)
+
+    def _stream(self, prompt):
+        words = stub_reply(prompt).split(' ')
+        for i, word in enumerate(words):
+            time.sleep(self.latency / len(words))
+            yield word if i == 0 else ' ' + word
+
+
+def create_provider():
+    """Build the provider chosen by SUMMARY_PROVIDER: gemini (default), openai or stub"""
+    options = {
+        'timeout': float(os.getenv('SUMMARY_TIMEOUT', '30')),
+        'max_concurrency': int(os.getenv('SUMMARY_CONCURRENCY', '4')),
+        'breaker': CircuitBreaker(int(os.getenv('SUMMARY_BREAKER_FAILURES', '5')),
+                                  float(os.getenv('SUMMARY_BREAKER_RESET', '30'))),
+    }
+    model_name = os.getenv('SUMMARY_MODEL')
+    # SUMMARY_MODEL=stub predates SUMMARY_PROVIDER and still selects the stub
+    kind = os.getenv('SUMMARY_PROVIDER') or ('stub' if model_name == 'stub' else 'gemini')
+
+    if kind == 'stub':
+        return StubProvider(latency=float(os.getenv('SUMMARY_STUB_LATENCY', '0')), **options)
+    if kind == 'openai':
+        return OpenAICompatibleProvider(model_name or 'gpt-4o-mini',
+                                        base_url=os.getenv('SUMMARY_API_BASE', 'https://api.openai.com/v1'),
+                                        api_key=os.getenv('OPENAI_API_KEY'), **options)
+    if kind == 'gemini':
+        api_key = os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            print("Warning: GEMINI_API_KEY environment variable is not set")
+            api_key = "dummy_key"  # Fallback for development
+        return GeminiProvider(model_name or 'gemini-2.0-flash', api_key, **options)
+    raise ValueError(f"Unknown summary provider: {kind}")
@@ -0,0 +1,30 @@
+import os
+import tempfile
+
+import pytest
+
+# app.py reads its configuration at import time; point it at a scratch
+# database before any test imports it
+_scratch = tempfile.mkdtemp(prefix='notes-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_scratch, 'notes.db')}"
+os.environ['SEMANTIC_INDEX_DIR'] = os.path.join(_scratch, 'vectors')
+os.environ['SUMMARY_PROVIDER'] = 'stub'
+os.environ.pop('EVENT_BUS_URL', None)
+
+
+@pytest.fixture
+def app_context():
+    from app import app
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def user(app_context):
+    from app import User, db
+    count = User.query.count()
+    user = User(username=f'user{count}', email=f'user{count}@example.com')
+    user.set_password('password')
+    db.session.add(user)
+    db.session.commit()
+    return user
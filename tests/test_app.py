@@ -0,0 +1,396 @@
+from datetime import datetime, timedelta
+
+from app import Note, db, process_embedding_job
+
+
+def test_embedding_job_keeps_updated_at(user):
+    edited = datetime(2020, 1, 1, 12, 0, 0)
+    note = Note(title='Old note', content='written long ago', user_id=user.id, order=0,
+                created_at=edited, updated_at=edited)
+    db.session.add(note)
+    db.session.commit()
+
+    process_embedding_job(note.id)
+
+    db.session.expire_all()
+    note = db.session.get(Note, note.id)
+    assert note.embedding is not None
+    assert note.updated_at == edited
+
+
+def test_search_skips_notes_deleted_after_matching(user, monkeypatch):
+    import app as notes_app
+    db.session.add(Note(title='Kept apple', content='apple', user_id=user.id, order=0))
+    db.session.add(Note(title='Gone apple', content='apple', user_id=user.id, order=1))
+    db.session.commit()
+    gone = Note.query.filter_by(title='Gone apple').one()
+    rerank = notes_app.rerank
+
+    def delete_after_ranking(*args, **kwargs):
+        matches = rerank(*args, **kwargs)
+        Note.query.filter_by(id=gone.id).delete()
+        db.session.commit()
+        return matches
+    monkeypatch.setattr(notes_app, 'rerank', delete_after_ranking)
+
+    client = notes_app.app.test_client()
+    with client.session_transaction() as login:
+        login['user_id'] = user.id
+    response = client.get('/notes/search?q=apple')
+
+    assert response.status_code == 200
+    assert [note['title'] for note in response.json] == ['Kept apple']
+
+
+def test_pruned_tombstones_expire_old_sync_tokens(user):
+    import app as notes_app
+    from app import NoteTombstone, bump_notes_version
+    from pagination import encode_cursor
+    for i in range(5):
+        note = Note(title=f'Note {i}', content='text', user_id=user.id, order=i)
+        db.session.add(note)
+        db.session.flush()
+        bump_notes_version(user.id, [note.id])
+        db.session.commit()
+    old_token = encode_cursor([user.notes_version, None])
+
+    client = notes_app.app.test_client()
+    with client.session_transaction() as login:
+        login['user_id'] = user.id
+    first = Note.query.filter_by(user_id=user.id).first()
+    client.delete(f'/notes/{first.id}')
+    NoteTombstone.query.filter_by(user_id=user.id).update({'created_at': datetime(2000, 1, 1)})
+    db.session.commit()
+    # The next delete prunes the expired tombstone
+    second = Note.query.filter_by(user_id=user.id).first()
+    client.delete(f'/notes/{second.id}')
+
+    assert client.get('/notes/changes', query_string={'since': old_token}).status_code == 400
+    # A full download pages through versions older than the pruned tombstone
+    ids, token = [], None
+    while True:
+        page = client.get('/notes/changes', query_string={'limit': 1, **({'since': token} if token else {})}).json
+        ids += [note['id'] for note in page['notes']]
+        token = page['token']
+        if not page['more']:
+            break
+    assert sorted(ids) == sorted(note.id for note in Note.query.filter_by(user_id=user.id))
+
+
+def test_change_feed_falls_back_to_polling_when_feeds_are_full(user, monkeypatch):
+    import threading
+    import app as notes_app
+    monkeypatch.setattr(notes_app, 'feed_slots', threading.BoundedSemaphore(1))
+    monkeypatch.setattr(notes_app, 'EVENTS_MAX_SECONDS', 0)
+    client = notes_app.app.test_client()
+    with client.session_transaction() as login:
+        login['user_id'] = user.id
+
+    # A live feed ends at its deadline and gives its slot back
+    live = client.get('/notes/events')
+    assert live.get_data(as_text=True).startswith('retry: 3000\n')
+    live.close()
+    assert notes_app.feed_slots.acquire(blocking=False)
+
+    # With no slot free the feed answers at once and asks to be polled later
+    polled = client.get('/notes/events').get_data(as_text=True)
+    assert polled.startswith(f"retry: {int(notes_app.EVENTS_POLL_SECONDS * 1000)}\n")
+    assert 'event: ready' in polled
+
+
+def test_summary_left_running_by_a_dead_worker_is_reclaimed(user, monkeypatch):
+    import app as notes_app
+    from app import needs_summary, process_summary_job
+    stale = datetime.utcnow() - timedelta(seconds=notes_app.SUMMARY_LEASE_SECONDS + 60)
+    orphan = Note(title='Orphan', content='claimed by a worker that died', user_id=user.id,
+                  order=0, summary_status='running', summary_claimed_at=stale)
+    busy = Note(title='Busy', content='being summarized right now', user_id=user.id,
+                order=1, summary_status='running', summary_claimed_at=datetime.utcnow())
+    db.session.add_all([orphan, busy])
+    db.session.commit()
+
+    backlog = {note.id for note in Note.query.filter(Note.user_id == user.id, needs_summary())}
+    assert backlog == {orphan.id}
+
+    queued = []
+    monkeypatch.setattr(notes_app.summary_queue, 'enqueue', lambda kind, *args: queued.append((kind, *args)))
+    notes_app.recover_background_jobs()
+    assert ('summary', orphan.id) in queued
+    assert ('summary', busy.id) not in queued
+
+    process_summary_job(orphan.id)
+    process_summary_job(busy.id)
+    db.session.expire_all()
+    assert db.session.get(Note, orphan.id).summary_status == 'done'
+    assert db.session.get(Note, busy.id).summary_status == 'running'
+
+
+def test_backfill_selects_pending_and_stale_summaries(user):
+    from app import mark_pending, plan_summary_backfill
+    notes = [
+        Note(title='Interrupted', content='marked by a backfill that stopped', user_id=user.id, order=0),
+        Note(title='Stale', content='edited a little since', summary='Old summary', summary_status='done',
+             summary_drift=0.05, user_id=user.id, order=1),
+        Note(title='Current', content='summary matches', summary='Summary', summary_status='done',
+             summary_drift=0.0, user_id=user.id, order=2),
+    ]
+    db.session.add_all(notes)
+    db.session.commit()
+    interrupted, stale, current = notes
+    mark_pending([interrupted.id])
+
+    planned = {note_id for batch in plan_summary_backfill(user.id) for note_id in batch}
+    assert planned == {interrupted.id, stale.id}
+
+
+def test_cli_import_leaves_notes_for_the_backfill(user):
+    from app import embed_missing_notes, import_note_records, plan_summary_backfill
+    result = import_note_records(user.id, [{'title': 'One', 'content': 'first'},
+                                           {'title': 'Two', 'content': 'second'}], enqueue=False)
+    assert result['imported'] == 2
+    after_id = 0
+    while after_id is not None:
+        after_id = embed_missing_notes(after_id, user_id=user.id, update_index=False)
+
+    imported = Note.query.filter_by(user_id=user.id).all()
+    assert all(note.embedding is not None for note in imported)
+    planned = {note_id for batch in plan_summary_backfill(user.id) for note_id in batch}
+    assert planned == {note.id for note in imported}
+
+
+def test_background_writes_and_reorders_keep_updated_at(user):
+    import app as notes_app
+    from app import mark_pending, process_summary_batch_job
+    edited = datetime(2020, 1, 1, 12, 0, 0)
+    notes = [Note(title=f'Note {i}', content=f'content {i}', user_id=user.id, order=i,
+                  created_at=edited, updated_at=edited) for i in range(2)]
+    db.session.add_all(notes)
+    db.session.commit()
+    ids = [note.id for note in notes]
+
+    mark_pending(ids)
+    process_summary_batch_job(ids)
+    client = notes_app.app.test_client()
+    with client.session_transaction() as login:
+        login['user_id'] = user.id
+    client.post('/notes/reorder', json={'order': ids[::-1]})
+
+    db.session.expire_all()
+    for note in Note.query.filter(Note.id.in_(ids)):
+        assert note.summary_status == 'done'
+        assert note.updated_at == edited
+
+
+def client_for(user):
+    import app as notes_app
+    client = notes_app.app.test_client()
+    with client.session_transaction() as login:
+        login['user_id'] = user.id
+    return client
+
+
+def user_orders(user):
+    db.session.expire_all()
+    return {note.id: note.order for note in Note.query.filter_by(user_id=user.id)}
+
+
+def test_move_reorder_updates_only_the_moved_note(user):
+    from app import ORDER_GAP
+    notes = [Note(title=f'Note {i}', content='text', user_id=user.id, order=i * ORDER_GAP) for i in range(4)]
+    db.session.add_all(notes)
+    db.session.commit()
+    a, b, c, d = (note.id for note in notes)
+    before = user_orders(user)
+
+    client = client_for(user)
+    assert client.post('/notes/reorder', json={'id': d, 'prev_id': a, 'next_id': b}).status_code == 200
+    after = user_orders(user)
+    assert sorted(after, key=after.get) == [a, d, b, c]
+    assert {k: v for k, v in after.items() if k != d} == {k: v for k, v in before.items() if k != d}
+
+    assert client.post('/notes/reorder', json={'id': c, 'prev_id': None, 'next_id': a}).status_code == 200
+    after = user_orders(user)
+    assert sorted(after, key=after.get) == [c, a, d, b]
+    assert client.post('/notes/reorder', json={'id': 999999, 'prev_id': a, 'next_id': None}).status_code == 404
+
+
+def test_move_with_out_of_order_neighbours_goes_after_prev(user):
+    from app import ORDER_GAP
+    notes = [Note(title=f'Note {i}', content='text', user_id=user.id, order=i * ORDER_GAP) for i in range(4)]
+    db.session.add_all(notes)
+    db.session.commit()
+    a, b, c, d = (note.id for note in notes)
+    before = user_orders(user)
+
+    # As sent by a drag inside ranked search results: prev comes after next
+    client_for(user).post('/notes/reorder', json={'id': d, 'prev_id': b, 'next_id': a})
+    after = user_orders(user)
+    assert sorted(after, key=after.get) == [a, b, d, c]
+    assert len(set(after.values())) == len(after)
+    # Nothing but the moved note was renumbered
+    assert {k: v for k, v in after.items() if k != d} == {k: v for k, v in before.items() if k != d}
+
+
+def test_embedding_writes_leave_notes_version_alone(user):
+    from app import User, process_embedding_job
+    note = Note(title='Note', content='text', user_id=user.id, order=0)
+    db.session.add(note)
+    db.session.commit()
+    notes_version = user.notes_version
+
+    process_embedding_job(note.id)
+
+    db.session.expire_all()
+    user = db.session.get(User, user.id)
+    assert user.notes_version == notes_version
+    assert user.embeddings_version > 0
+
+
+def test_embedding_backfill_runs_in_the_process_holding_the_lease(user, monkeypatch):
+    import app as notes_app
+    from app import JobLease, process_embedding_backfill_job
+    notes = [Note(title=f'Note {i}', content='text', user_id=user.id, order=i) for i in range(3)]
+    db.session.add_all(notes)
+    db.session.commit()
+    queued = []
+    monkeypatch.setattr(notes_app.summary_queue, 'enqueue', lambda kind, *args: queued.append((kind, *args)))
+    monkeypatch.setattr(notes_app, 'EMBEDDING_BACKFILL_BATCH', 2)
+
+    # Another worker is already backfilling
+    db.session.add(JobLease(name='embedding_backfill', holder='elsewhere:1',
+                            expires_at=datetime.utcnow() + timedelta(minutes=5)))
+    db.session.commit()
+    process_embedding_backfill_job(0)
+    assert queued == []
+    assert all(note.embedding is None for note in Note.query.filter_by(user_id=user.id))
+
+    # Its lease runs out, so this process takes over, a batch at a time
+    JobLease.query.filter_by(name='embedding_backfill').update({'expires_at': datetime.utcnow()})
+    db.session.commit()
+    process_embedding_backfill_job(0)
+    while queued:
+        kind, after_id = queued.pop()
+        assert kind == 'embedding_backfill'
+        process_embedding_backfill_job(after_id)
+
+    db.session.expire_all()
+    assert all(note.embedding is not None for note in Note.query.filter_by(user_id=user.id))
+    assert JobLease.query.filter_by(name='embedding_backfill').first() is None
+
+
+def test_summary_stream_returns_its_connection_while_the_model_runs(user, monkeypatch):
+    import app as notes_app
+    note = Note(title='Note', content='some text to summarize', user_id=user.id, order=0)
+    db.session.add(note)
+    db.session.commit()
+    holding = []
+
+    def stream(prompt):
+        # A session in a transaction holds a pooled connection
+        holding.append(db.session.registry.has() and db.session.in_transaction())
+        yield 'A summary.'
+
+    monkeypatch.setattr(notes_app.summary_provider, 'stream', stream)
+    client = notes_app.app.test_client()
+    with client.session_transaction() as login:
+        login['user_id'] = user.id
+    note_id = note.id
+    db.session.close()
+    body = client.get(f'/notes/{note_id}/summarize/stream?refresh=1').get_data(as_text=True)
+
+    assert 'event: done' in body
+    assert holding == [False]
+
+
+def test_keyset_paging_crosses_page_boundaries(user):
+    same_time = datetime(2024, 1, 1)
+    # Ties on created_at straddle the page boundaries, so the id tiebreak matters
+    notes = [Note(title=f'Note {i}', content='text', user_id=user.id, order=(i % 3) * 10,
+                  created_at=same_time if i < 3 else datetime(2024, 1, 1 + i)) for i in range(7)]
+    db.session.add_all(notes)
+    db.session.commit()
+    client = client_for(user)
+
+    for sort, key, reverse in (('created', lambda n: (n.created_at, n.id), True),
+                               ('order', lambda n: (n.order, n.id), False)):
+        pages, cursor = [], None
+        while True:
+            response = client.get('/notes', query_string={'sort': sort, 'limit': 2,
+                                                          **({'cursor': cursor} if cursor else {})})
+            assert response.status_code == 200
+            pages.append([note['id'] for note in response.json])
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+        assert [len(page) for page in pages] == [2, 2, 2, 1]
+        expected = [n.id for n in sorted(notes, key=key, reverse=reverse)]
+        assert [note_id for page in pages for note_id in page] == expected
+
+
+def test_needs_resummary_thresholds_and_drift(app_context):
+    from app import SUMMARY_CHANGE_THRESHOLD, needs_resummary
+    from content_change import content_hash
+    words = [f'word{i}' for i in range(40)]
+    original = ' '.join(words)
+
+    def edit(note, content):
+        old, note.content = note.content, content
+        return needs_resummary(note, old)
+
+    note = Note(content=original, summary='Summary', summary_status='done',
+                summary_hash=content_hash(original), summary_drift=0.0)
+    # A one-word typo fix keeps the summary but is remembered
+    assert not edit(note, original.replace('word5', 'wrod5'))
+    assert 0 < note.summary_drift < SUMMARY_CHANGE_THRESHOLD
+    # Whitespace alone changes nothing
+    assert not edit(note, note.content.replace(' ', '  ', 1))
+    # Going back to the summarized text clears the drift
+    assert not edit(note, original)
+    assert note.summary_drift == 0.0
+
+    # Small edits add up until they cross the threshold
+    content, crossed = original, None
+    for i in range(len(words)):
+        content = content.replace(f'word{i} ', f'changed{i} ')
+        if edit(note, content):
+            crossed = i + 1
+            break
+    assert crossed is not None and crossed > 1
+    assert note.summary_drift >= SUMMARY_CHANGE_THRESHOLD
+
+    # A rewrite re-summarizes straight away
+    fresh = Note(content=original, summary='Summary', summary_status='done',
+                 summary_hash=content_hash(original), summary_drift=0.0)
+    assert edit(fresh, 'an entirely different note about something else')
+
+    # Without a summary any real change asks for one, unless a job is already queued
+    empty = Note(content=original, summary=None, summary_status='failed', summary_drift=0.0)
+    assert edit(empty, original + ' more')
+    empty.summary_status = 'pending'
+    assert not edit(empty, original + ' more still')
+
+
+def test_conditional_get_until_the_notes_change(user):
+    note = Note(title='Note', content='text', user_id=user.id, order=0)
+    db.session.add(note)
+    db.session.commit()
+    note_id = note.id
+    client = client_for(user)
+    url = '/notes?sort=order&view=card'
+
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    unchanged = client.get(url, headers={'If-None-Match': etag})
+    assert unchanged.status_code == 304
+    assert unchanged.headers['ETag'] == etag
+
+    # Embeddings are derived data and leave the listing's ETag alone
+    process_embedding_job(note_id)
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    client.put(f'/notes/{note_id}', json={'title': 'Note', 'content': 'text', 'category': 'work'})
+    changed = client.get(url, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert changed.json[0]['category'] == 'work'
@@ -0,0 +1,21 @@
+from app import Note
+from import_notes import import_file
+from note_storage import AppendLogStorage
+
+
+def note(note_id, title):
+    return {'id': note_id, 'title': title, 'content': 'text', 'timestamp': '2024-01-01 00:00:00'}
+
+
+def test_desktop_import_includes_changes_still_in_the_log(user, tmp_path):
+    filename = str(tmp_path / 'notes.json')
+    storage = AppendLogStorage(filename, fsync=False)
+    storage.save_all([note(1, 'Kept'), note(2, 'Deleted')])
+    storage.put(note(1, 'Edited'), [])
+    storage.delete(2, [])
+    storage.put(note(3, 'Added'), [])
+
+    result = import_file(user.id, filename)
+
+    assert result['imported'] == 2
+    assert sorted(n.title for n in Note.query.filter_by(user_id=user.id)) == ['Added', 'Edited']
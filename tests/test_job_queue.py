@@ -0,0 +1,23 @@
+import threading
+
+from flask import Flask
+
+from job_queue import JobQueue
+
+
+def test_worker_survives_a_failing_failure_callback():
+    queue = JobQueue(Flask(__name__), workers=1, max_retries=0)
+    ran = threading.Event()
+
+    def fail():
+        raise RuntimeError('model down')
+
+    def broken_on_failure():
+        raise RuntimeError('database down')
+
+    queue.register('fail', fail, on_failure=broken_on_failure)
+    queue.register('ok', ran.set)
+    queue.enqueue('fail')
+    queue.enqueue('ok')
+
+    assert ran.wait(5)
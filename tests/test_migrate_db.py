@@ -0,0 +1,71 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The schema the app shipped with before migrate_db.py had any steps
+BASELINE_SCHEMA = """
+CREATE TABLE user (
+    id INTEGER PRIMARY KEY,
+    username VARCHAR(80) NOT NULL UNIQUE,
+    email VARCHAR(120) NOT NULL UNIQUE,
+    password_hash VARCHAR(128),
+    created_at DATETIME
+);
+CREATE TABLE note (
+    id INTEGER PRIMARY KEY,
+    title VARCHAR(200) NOT NULL,
+    content TEXT NOT NULL,
+    category VARCHAR(50),
+    summary TEXT,
+    created_at DATETIME,
+    updated_at DATETIME,
+    user_id INTEGER NOT NULL REFERENCES user (id),
+    "order" INTEGER
+);
+"""
+
+
+def run_migrations(tmp_path, database):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database}", PYTHONPATH=REPO,
+               SEMANTIC_INDEX_DIR=str(tmp_path / 'vectors'), SUMMARY_PROVIDER='stub')
+    return subprocess.run([sys.executable, os.path.join(REPO, 'migrate_db.py'), '--batch-size', '2'],
+                          cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120)
+
+
+def test_migrates_a_baseline_database(tmp_path):
+    database = str(tmp_path / 'baseline.db')
+    conn = sqlite3.connect(database)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.execute("INSERT INTO user (id, username, email) VALUES (1, 'a', 'a@example.com'), (2, 'b', 'b@example.com')")
+    conn.executemany(
+        "INSERT INTO note (id, title, content, summary, created_at, updated_at, user_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(i, f'Note {i}', 'text', 'Summary', f'2024-01-0{i} 00:00:00', f'2024-01-0{i} 00:00:00', 1 + i % 2)
+         for i in range(1, 6)])
+    conn.commit()
+    conn.close()
+
+    result = run_migrations(tmp_path, database)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'Migration completed successfully!' in result.stdout
+
+    conn = sqlite3.connect(database)
+    applied = [version for (version,) in conn.execute("SELECT version FROM schema_migrations ORDER BY version")]
+    assert applied == list(range(1, len(applied) + 1))
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(note)")}
+    assert {'summary_status', 'summary_hash', 'version', 'embedding', 'summary_claimed_at'} <= columns
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(note)")}
+    assert {'ix_note_user_order', 'ix_note_user_category_created', 'ix_note_user_version'} <= indexes
+    # Existing notes were numbered newest first within each user, and count as summarized
+    for user_id in (1, 2):
+        ordered = [note_id for (note_id,) in conn.execute(
+            'SELECT id FROM note WHERE user_id = ? ORDER BY "order"', (user_id,))]
+        assert ordered == sorted(ordered, reverse=True)
+    assert {status for (status,) in conn.execute("SELECT summary_status FROM note")} == {'done'}
+    conn.close()
+
+    again = run_migrations(tmp_path, database)
+    assert again.returncode == 0
+    assert 'Database is up to date.' in again.stdout
@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+from note_collection import NoteCollection
+from note_storage import AppendLogStorage, open_storage
+
+
+def note(note_id):
+    return {'id': note_id, 'title': f'Note {note_id}', 'content': 'text',
+            'timestamp': '2024-01-01 00:00:00'}
+
+
+def test_replays_log_over_snapshot(tmp_path):
+    filename = str(tmp_path / 'notes.json')
+    storage = AppendLogStorage(filename, fsync=False)
+    storage.save_all([note(1), note(2)])
+    storage.put(dict(note(2), title='Edited'), [])
+    storage.delete(1, [])
+
+    notes = AppendLogStorage(filename).load()
+    assert [(n['id'], n['title']) for n in notes] == [(2, 'Edited')]
+
+
+def test_torn_append_does_not_swallow_later_changes(tmp_path):
+    filename = str(tmp_path / 'notes.json')
+    storage = AppendLogStorage(filename, fsync=False)
+    storage.put(note(1), [])
+    # A crash halfway through writing the next line
+    with open(storage.log_filename, 'a') as file:
+        file.write(json.dumps({'op': 'put', 'note': note(9)})[:25])
+
+    storage = AppendLogStorage(filename, fsync=False)
+    assert [n['id'] for n in storage.load()] == [1]
+    storage.put(note(2), [])
+    storage.put(note(3), [])
+
+    assert [n['id'] for n in AppendLogStorage(filename).load()] == [1, 2, 3]
+
+
+def test_record_missing_only_its_newline_is_kept(tmp_path):
+    filename = str(tmp_path / 'notes.json')
+    storage = AppendLogStorage(filename, fsync=False)
+    storage.put(note(1), [])
+    with open(storage.log_filename, 'a') as file:
+        file.write(json.dumps({'op': 'put', 'note': note(2)}))
+
+    storage = AppendLogStorage(filename, fsync=False)
+    assert [n['id'] for n in storage.load()] == [1, 2]
+    storage.put(note(3), [])
+
+    assert [n['id'] for n in AppendLogStorage(filename).load()] == [1, 2, 3]
+
+
+def test_log_holding_only_a_torn_line(tmp_path):
+    filename = str(tmp_path / 'notes.json')
+    storage = AppendLogStorage(filename, fsync=False)
+    with open(storage.log_filename, 'w') as file:
+        file.write('{"op": "put", "no')
+
+    assert storage.load() == []
+    storage.put(note(1), [])
+    assert [n['id'] for n in AppendLogStorage(filename).load()] == [1]
+
+
+@pytest.mark.parametrize('backend', ['json', 'log', 'sqlite'])
+def test_deleted_newest_id_is_not_reused_after_restart(tmp_path, backend):
+    filename = str(tmp_path / 'notes.json')
+    storage = open_storage(filename, backend)
+    notes = NoteCollection(storage.load(), storage.next_id)
+    for title in ('a', 'b', 'c'):
+        added = notes.add(title, 'text', '2024-01-01 00:00:00')
+        storage.put(added.to_dict(), notes.dicts())
+    notes.remove(3)
+    storage.delete(3, notes.dicts())
+
+    storage = open_storage(filename, backend)
+    notes = NoteCollection(storage.load(), storage.next_id)
+    assert notes.add('d', 'text', '2024-01-01 00:00:00').id == 4
+
+
+def test_next_id_survives_compaction(tmp_path):
+    filename = str(tmp_path / 'notes.json')
+    storage = AppendLogStorage(filename, compact_every=2, fsync=False)
+    storage.put(note(1), [note(1)])
+    storage.put(note(2), [note(1), note(2)])
+    storage.delete(2, [note(1)])
+    storage.delete(1, [])
+
+    storage = AppendLogStorage(filename)
+    assert storage.load() == []
+    assert storage.next_id == 3
+
+
+@pytest.mark.parametrize('backend', ['json', 'log', 'sqlite'])
+def test_apply_changes_writes_a_batch(tmp_path, backend):
+    filename = str(tmp_path / 'notes.json')
+    storage = open_storage(filename, backend)
+    storage.save_all([note(1), note(2)])
+    storage.apply_changes([dict(note(2), title='Edited'), note(3)], [1], [dict(note(2), title='Edited'), note(3)])
+
+    storage = open_storage(filename, backend)
+    assert sorted((n['id'], n['title']) for n in storage.load()) == [(2, 'Edited'), (3, 'Note 3')]
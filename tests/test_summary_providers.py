@@ -0,0 +1,26 @@
+from summary_providers import CircuitBreaker, StubProvider
+
+
+def half_open_provider():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    return StubProvider(breaker=breaker)
+
+
+def test_abandoned_stream_does_not_close_a_half_open_circuit():
+    provider = half_open_provider()
+    stream = provider.stream('one two three four five six seven eight')
+    next(stream)
+    # The client disconnects partway through the trial call
+    stream.close()
+
+    assert provider.breaker.state == 'half-open'
+    # The trial slot is free again for the next call
+    assert provider.breaker.allow()
+
+
+def test_finished_stream_closes_a_half_open_circuit():
+    provider = half_open_provider()
+    list(provider.stream('one two three'))
+
+    assert provider.breaker.state == 'closed'
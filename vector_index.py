@@ -0,0 +1,195 @@
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: fine for the single-process development server
+    fcntl = None
+
+
+class IVFIndex:
+    """Inverted-file index for approximate nearest neighbours on large matrices.
+
+    Rows are clustered around `lists` centroids (spherical k-means on a
+    sample). A query scores the centroids, then only the rows in the
+    `probes` closest clusters, instead of every row.
+    """
+
+    def __init__(self, matrix, lists=None, probes=None, iterations=8, seed=0):
+        self.rows = len(matrix)
+        lists = lists or max(1, int(np.sqrt(self.rows)))
+        self.probes = probes or max(1, lists // 10)
+        rng = np.random.default_rng(seed)
+        sample = np.asarray(matrix[np.sort(rng.choice(self.rows, min(self.rows, lists * 40), replace=False))])
+        centroids = sample[rng.choice(len(sample), lists, replace=False)]
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # A centroid that lost all its rows stays where it was
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+        self.centroids = centroids.astype(np.float32)
+
+        # Assign every row in slices so the score matrix stays small
+        assignment = np.concatenate([np.argmax(matrix[i:i + 8192] @ self.centroids.T, axis=1)
+                                     for i in range(0, self.rows, 8192)])
+        self.order = np.argsort(assignment, kind='stable')
+        self.bounds = np.searchsorted(assignment[self.order], np.arange(lists + 1))
+
+    def candidates(self, vector):
+        """Row numbers in the clusters closest to `vector`"""
+        scores = self.centroids @ vector
+        probes = min(self.probes, len(scores))
+        closest = np.argpartition(-scores, probes - 1)[:probes]
+        return np.concatenate([self.order[self.bounds[c]:self.bounds[c + 1]] for c in closest])
+
+
+class VectorIndex:
+    """Per-user note embeddings in memory-mapped files, searched by cosine top-k.
+
+    `<directory>/<user_id>.vec` holds one float32 row per note and
+    `<user_id>.ids` the matching note ids, with -1 marking a deleted row.
+    An edit overwrites the note's row in place and a new note is
+    appended, so keeping the index current is O(1) per change. Searches
+    map the files read-only and remap when another process has changed
+    them. The files are a cache of Note.embedding and can be rebuilt
+    from it at any time.
+
+    Users with at least `ann_threshold` notes are searched through an
+    IVF index first (0 disables it); rows appended since the IVF index
+    was built are always scored exactly.
+    """
+
+    def __init__(self, directory, dim, ann_threshold=50000):
+        self.directory = directory
+        self.dim = dim
+        self.ann_threshold = ann_threshold
+        self._maps = {}  # user_id -> (file signature, ids, matrix, ann)
+        self._lock = threading.Lock()
+
+    def count(self, user_id):
+        """Number of live rows in the user's index"""
+        ids, _, _ = self._load(user_id)
+        return int(np.count_nonzero(ids >= 0))
+
+    def rebuild(self, user_id, items):
+        """Replace the user's index with (note_id, vector) pairs"""
+        items = list(items)
+        ids = np.array([note_id for note_id, _ in items], dtype=np.int64)
+        matrix = np.array([vector for _, vector in items], dtype=np.float32).reshape(-1, self.dim)
+        vec_path, ids_path = self._paths(user_id)
+        with self._file_lock(user_id):
+            for path, array in ((vec_path, matrix), (ids_path, ids)):
+                tmp_path = f"{path}.tmp"
+                array.tofile(tmp_path)
+                os.replace(tmp_path, path)
+
+    def upsert(self, user_id, items):
+        """Write (note_id, vector) pairs, replacing a note's existing row if it has one"""
+        vec_path, ids_path = self._paths(user_id)
+        row_bytes = 4 * self.dim
+        with self._file_lock(user_id):
+            for path in (vec_path, ids_path):
+                open(path, 'ab').close()
+            ids = np.fromfile(ids_path, dtype=np.int64)
+            row_of = {int(note_id): row for row, note_id in enumerate(ids) if note_id >= 0}
+            next_row = len(ids)
+            with open(vec_path, 'r+b') as vec_file, open(ids_path, 'r+b') as ids_file:
+                for note_id, vector in items:
+                    row = row_of.get(note_id)
+                    vec_file.seek((next_row if row is None else row) * row_bytes)
+                    vec_file.write(np.asarray(vector, dtype=np.float32).tobytes())
+                    if row is None:
+                        # The id goes in after its vector: readers only use rows that have one
+                        vec_file.flush()
+                        ids_file.seek(next_row * 8)
+                        ids_file.write(np.int64(note_id).tobytes())
+                        ids_file.flush()
+                        row_of[note_id] = next_row
+                        next_row += 1
+
+    def delete(self, user_id, note_ids):
+        _, ids_path = self._paths(user_id)
+        if not os.path.exists(ids_path):
+            return
+        with self._file_lock(user_id):
+            ids = np.fromfile(ids_path, dtype=np.int64)
+            with open(ids_path, 'r+b') as ids_file:
+                for row in np.flatnonzero(np.isin(ids, list(note_ids))):
+                    ids_file.seek(int(row) * 8)
+                    ids_file.write(np.int64(-1).tobytes())
+
+    def search(self, user_id, vector, k, allowed_ids=None):
+        """Top-k (note_id, score) pairs, optionally only among `allowed_ids`"""
+        ids, matrix, ann = self._load(user_id)
+        if not len(ids) or k <= 0:
+            return []
+        vector = np.asarray(vector, dtype=np.float32)
+
+        rows = None
+        if ann is not None:
+            rows = np.concatenate([ann.candidates(vector), np.arange(ann.rows, len(ids))])
+            if len(rows) < k:
+                rows = None
+        if rows is None:
+            scores = matrix @ vector
+            candidate_ids = ids
+        else:
+            scores = matrix[rows] @ vector
+            candidate_ids = ids[rows]
+
+        keep = candidate_ids >= 0
+        if allowed_ids is not None:
+            keep &= np.isin(candidate_ids, allowed_ids)
+        scores, candidate_ids = scores[keep], candidate_ids[keep]
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            scores, candidate_ids = scores[top], candidate_ids[top]
+        order = np.argsort(-scores, kind='stable')
+        return [(int(candidate_ids[i]), float(scores[i])) for i in order]
+
+    def _paths(self, user_id):
+        base = os.path.join(self.directory, str(user_id))
+        return f"{base}.vec", f"{base}.ids"
+
+    @contextmanager
+    def _file_lock(self, user_id):
+        """Serialize writers to one user's files, across threads and processes"""
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, open(os.path.join(self.directory, f"{user_id}.lock"), 'w') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _load(self, user_id):
+        vec_path, ids_path = self._paths(user_id)
+        try:
+            vec_stat, ids_stat = os.stat(vec_path), os.stat(ids_path)
+        except FileNotFoundError:
+            return np.empty(0, np.int64), np.empty((0, self.dim), np.float32), None
+        signature = (vec_stat.st_ino, vec_stat.st_size, ids_stat.st_ino, ids_stat.st_size)
+
+        cached = self._maps.get(user_id)
+        if cached and cached[0] == signature:
+            return cached[1:]
+
+        rows = min(vec_stat.st_size // (4 * self.dim), ids_stat.st_size // 8)
+        if rows == 0:
+            ids, matrix = np.empty(0, np.int64), np.empty((0, self.dim), np.float32)
+        else:
+            ids = np.memmap(ids_path, dtype=np.int64, mode='r', shape=(rows,))
+            matrix = np.memmap(vec_path, dtype=np.float32, mode='r', shape=(rows, self.dim))
+
+        # Appends keep the old IVF index usable until it covers too little of
+        # the matrix; a rebuilt file (new inode) always gets a new one
+        ann = cached[3] if cached and cached[0][0] == signature[0] else None
+        if not self.ann_threshold or rows < self.ann_threshold:
+            ann = None
+        elif ann is None or ann.rows > rows or rows > ann.rows * 1.1:
+            ann = IVFIndex(matrix)
+        self._maps[user_id] = (signature, ids, matrix, ann)
+        return ids, matrix, ann
@@ -0,0 +1,88 @@
+class VirtualList:
+    """Scrollable list on a Tk canvas that only creates widgets for rows in view.
+
+    Rows have a fixed height. Row widgets come from a small pool made by
+    `create_row(parent)` and are rebound to whichever item scrolled into
+    their slot with `bind_row(widget, item, index)`. Memory and redraw
+    cost depend on the viewport height, not on how many items there are.
+    """
+
+    def __init__(self, canvas, row_height, create_row, bind_row, overscan=2, padding=(20, 10)):
+        self.canvas = canvas
+        self.row_height = row_height
+        self.create_row = create_row
+        self.bind_row = bind_row
+        self.overscan = overscan
+        self.padx, self.pady = padding
+        self.items = []
+        self._pool = []   # [(widget, canvas window id)]
+        self._bound = {}  # pool slot -> index of the item it currently shows
+
+        canvas.bind('<Configure>', lambda e: self.render(force=True))
+        # Wheel events go to whatever card is under the pointer, so listen globally
+        canvas.bind_all('<MouseWheel>', self._on_wheel, add='+')
+        canvas.bind_all('<Button-4>', self._on_wheel, add='+')
+        canvas.bind_all('<Button-5>', self._on_wheel, add='+')
+
+    def set_items(self, items):
+        """Replace the list contents and redraw"""
+        self.items = list(items)
+        self.render(force=True)
+
+    def yview(self, *args):
+        """Scrollbar command"""
+        self.canvas.yview(*args)
+        self.render()
+
+    def index_at(self, y_root):
+        """Index of the item under a screen y coordinate (clamped to the list)"""
+        y = self.canvas.canvasy(y_root - self.canvas.winfo_rooty())
+        return max(0, min(len(self.items) - 1, int(y // self.row_height)))
+
+    def render(self, force=False):
+        """Place pooled rows over the visible items, rebinding only slots that changed"""
+        width = max(1, self.canvas.winfo_width())
+        height = max(1, self.canvas.winfo_height())
+        self.canvas.configure(scrollregion=(0, 0, width, len(self.items) * self.row_height))
+
+        top = self.canvas.canvasy(0)
+        first = max(0, int(top // self.row_height) - self.overscan)
+        last = min(len(self.items), int((top + height) // self.row_height) + 1 + self.overscan)
+
+        # Size the pool for the viewport, and keep slot = index % pool size so
+        # scrolling by one row only rebinds the one row that came into view
+        pool_size = int(height // self.row_height) + 2 + 2 * self.overscan
+        if pool_size > len(self._pool):
+            while len(self._pool) < pool_size:
+                widget = self.create_row(self.canvas)
+                window = self.canvas.create_window(0, 0, window=widget, anchor='nw')
+                self._pool.append((widget, window))
+            force = True
+        if force:
+            self._bound = {}
+
+        used = set()
+        for index in range(first, last):
+            slot = index % len(self._pool)
+            widget, window = self._pool[slot]
+            used.add(slot)
+            if self._bound.get(slot) != index:
+                self.bind_row(widget, self.items[index], index)
+                self._bound[slot] = index
+            self.canvas.coords(window, self.padx, index * self.row_height + self.pady)
+            self.canvas.itemconfigure(window, state='normal', width=width - 2 * self.padx,
+                                      height=self.row_height - 2 * self.pady)
+
+        for slot, (widget, window) in enumerate(self._pool):
+            if slot not in used:
+                self.canvas.itemconfigure(window, state='hidden')
+                self._bound.pop(slot, None)
+
+    def _on_wheel(self, event):
+        if not str(event.widget).startswith(str(self.canvas)):
+            return
+        if event.num == 4 or event.delta > 0:
+            self.canvas.yview_scroll(-1, 'units')
+        else:
+            self.canvas.yview_scroll(1, 'units')
+        self.render()